@@ -1,13 +1,147 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.core.exceptions import FieldDoesNotExist
+from django.urls import reverse
+from django.utils import timezone
 from django.utils.safestring import mark_safe
 from django.utils.html import format_html
 from .models import *
+from .autocompletar import atualizar_autocompletar
+from .busca import reindexar_modelo
+from .emails import agendar_envio, metricas_envio
+from .exportacao import resposta_exportacao
+from .paginas import invalidar_faqs
+from .signals import invalidar_usuarios
+from .tarefas import chave_da_selecao, enfileirar
+
+# ===============================================================
+# LISTAGENS SEM N+1
+# ===============================================================
+class ListagemProjetada(ChangeList):
+    """ChangeList que carrega só as colunas usadas pela página exibida."""
+    def get_results(self, request):
+        campos = self.model_admin.campos_da_listagem(self.list_display)
+        if campos is not None:
+            self.queryset = self.queryset.only(*campos)
+        super().get_results(request)
+
+
+class ListagemOtimizadaMixin:
+    """Deriva list_select_related e a projeção (only) da listagem do list_display.
+
+    Chaves estrangeiras exibidas entram no select_related, junto com as
+    relações que o __str__ do modelo relacionado lê (RELACIONADOS_STR).
+    Colunas calculadas declaram o que leem, como já fazem com
+    short_description:
+
+        usuario_info.campos = ['email', 'usuario__nome', 'usuario__email']
+
+    Uma coluna sem essa declaração desliga a projeção da listagem (o
+    select_related continua valendo). Ações e formulários recebem sempre
+    o queryset completo.
+    """
+
+    def campos_da_coluna(self, coluna):
+        """Caminhos (com __) lidos por uma coluna do list_display; None se desconhecidos."""
+        if coluna == 'action_checkbox':
+            return []
+        if callable(coluna):
+            return getattr(coluna, 'campos', None)
+        try:
+            campo = self.model._meta.get_field(coluna)
+        except FieldDoesNotExist:
+            atributo = getattr(self, coluna, None) or getattr(self.model, coluna, None)
+            return getattr(atributo, 'campos', None)
+        if campo.many_to_one or campo.one_to_one:
+            return [campo.name] + [
+                f'{campo.name}__{relacao}' for relacao in getattr(campo.related_model, 'RELACIONADOS_STR', ())
+            ]
+        return [campo.name]
+
+    def relacoes_do_caminho(self, caminho):
+        """'usuario__nome' -> ['usuario']: prefixos do caminho que são chaves estrangeiras."""
+        modelo, relacoes, partes = self.model, [], []
+        for nome in caminho.split('__'):
+            try:
+                campo = modelo._meta.get_field(nome)
+            except FieldDoesNotExist:
+                break
+            if not (campo.many_to_one or campo.one_to_one):
+                break
+            partes.append(nome)
+            relacoes.append('__'.join(partes))
+            modelo = campo.related_model
+        return relacoes
+
+    def get_list_select_related(self, request):
+        relacoes = set(self.list_select_related) if isinstance(self.list_select_related, (list, tuple)) else set()
+        for coluna in self.get_list_display(request):
+            for caminho in self.campos_da_coluna(coluna) or []:
+                relacoes.update(self.relacoes_do_caminho(caminho))
+        # Só as relações mais longas: select_related('a__b') já inclui 'a'
+        return sorted(r for r in relacoes if not any(o.startswith(r + '__') for o in relacoes)) or False
+
+    def campos_da_listagem(self, list_display):
+        """Campos locais para QuerySet.only(); None quando alguma coluna não os declara."""
+        campos = {self.model._meta.pk.name}
+        for coluna in list_display:
+            caminhos = self.campos_da_coluna(coluna)
+            if caminhos is None:
+                return None
+            campos.update(caminho.split('__')[0] for caminho in caminhos)
+        return sorted(campos)
+
+    def get_changelist(self, request, **kwargs):
+        return ListagemProjetada
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        # Selects de FAQ/característica/etc. mostram o título do jogo em cada opção
+        relacionados = getattr(db_field.related_model, 'RELACIONADOS_STR', ())
+        if relacionados and 'queryset' not in kwargs:
+            queryset = self.get_field_queryset(kwargs.get('using'), db_field, request)
+            if queryset is None:
+                queryset = db_field.related_model._default_manager.using(kwargs.get('using'))
+            kwargs['queryset'] = queryset.select_related(*relacionados)
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
+# ===============================================================
+# AÇÕES EM SEGUNDO PLANO
+# ===============================================================
+def enfileirar_acao(modeladmin, request, acao, tipo, ids, **parametros):
+    """Enfileira a ação (ver app/tarefas.py) e avisa no admin onde acompanhar."""
+    tarefa = enfileirar(tipo, chave=chave_da_selecao(acao, ids), **parametros)
+    url = reverse('admin:app_tarefa_change', args=[tarefa.pk])
+    modeladmin.message_user(request, format_html(
+        'Tarefa <a href="{}">#{}</a> na fila para {} item(ns); o progresso aparece na página da tarefa.',
+        url, tarefa.pk, len(ids)
+    ))
+    return tarefa
+
+
+def usuario_do_admin(request):
+    """Usuario do site com o mesmo email do usuário logado no admin, se houver."""
+    return Usuario.objects.filter(email=request.user.email).values_list('pk', flat=True).first()
+
+
+# ===============================================================
+# EXPORTAÇÃO
+# ===============================================================
+def exportar_csv(modeladmin, request, queryset):
+    return resposta_exportacao(queryset, 'csv')
+exportar_csv.short_description = "Exportar selecionados (CSV)"
+
+
+def exportar_jsonl(modeladmin, request, queryset):
+    return resposta_exportacao(queryset, 'jsonl')
+exportar_jsonl.short_description = "Exportar selecionados (JSONL)"
+
 
 # ===============================================================
 # USUÁRIO ADMIN CONFIG
 # ===============================================================
 @admin.register(Usuario)
-class UsuarioAdmin(admin.ModelAdmin):
+class UsuarioAdmin(ListagemOtimizadaMixin, admin.ModelAdmin):
     list_display = ['id', 'nome', 'email', 'tipo', 'data', 'imagem_preview']
     search_fields = ['nome', 'email', 'tipo']
     list_filter = ['tipo', 'data']
@@ -33,15 +167,18 @@ class UsuarioAdmin(admin.ModelAdmin):
         return "Sem imagem"
     
     imagem_preview.short_description = 'Avatar'
+    imagem_preview.campos = ['imagem']
     
-    actions = ['tornar_administrador', 'tornar_usuario_padrao']
+    actions = ['tornar_administrador', 'tornar_usuario_padrao', exportar_csv, exportar_jsonl]
     
     def tornar_administrador(self, request, queryset):
         updated = queryset.update(tipo='admin')
+        invalidar_usuarios(*queryset.values_list('id', flat=True))
         self.message_user(request, f'{updated} usuário(s) tornaram-se administrador(es).')
     
     def tornar_usuario_padrao(self, request, queryset):
         updated = queryset.update(tipo='usuario')
+        invalidar_usuarios(*queryset.values_list('id', flat=True))
         self.message_user(request, f'{updated} usuário(s) tornaram-se usuário(s) padrão.')
     
     tornar_administrador.short_description = "Tornar selecionados Administradores"
@@ -51,7 +188,7 @@ class UsuarioAdmin(admin.ModelAdmin):
 # DESASTRE
 # ===============================================================
 @admin.register(Desastre)
-class DesastreAdmin(admin.ModelAdmin):
+class DesastreAdmin(ListagemOtimizadaMixin, admin.ModelAdmin):
     list_display = ['id', 'titulo', 'descricao_curta', 'icone']
     search_fields = ['titulo', 'descricao']
     list_filter = ['titulo']
@@ -61,12 +198,13 @@ class DesastreAdmin(admin.ModelAdmin):
             return obj.descricao[:50] + '...' if len(obj.descricao) > 50 else obj.descricao
         return "Sem descrição"
     descricao_curta.short_description = 'Descrição'
+    descricao_curta.campos = ['descricao']
 
 # ===============================================================
 # ACONTECIMENTO
 # ===============================================================
 @admin.register(Acontecimento)
-class AcontecimentoAdmin(admin.ModelAdmin):
+class AcontecimentoAdmin(ListagemOtimizadaMixin, admin.ModelAdmin):
     list_display = ['id', 'titulo', 'dataAcontecimento', 'risco', 'descricao_curta']
     search_fields = ['titulo', 'risco']
     list_filter = ['risco', 'dataAcontecimento']
@@ -77,12 +215,13 @@ class AcontecimentoAdmin(admin.ModelAdmin):
             return obj.descricao[:100] + '...' if len(obj.descricao) > 100 else obj.descricao
         return "Sem descrição"
     descricao_curta.short_description = 'Descrição'
+    descricao_curta.campos = ['descricao']
 
 # ===============================================================
 # RISCO
 # ===============================================================
 @admin.register(Risco)
-class RiscoAdmin(admin.ModelAdmin):
+class RiscoAdmin(ListagemOtimizadaMixin, admin.ModelAdmin):
     list_display = ['id', 'nome', 'nivel', 'localizacao', 'desastre']
     search_fields = ['nome', 'localizacao', 'nivel']
     list_filter = ['nivel', 'desastre']
@@ -92,7 +231,7 @@ class RiscoAdmin(admin.ModelAdmin):
 # ARTIGO
 # ===============================================================
 @admin.register(Artigo)
-class ArtigoAdmin(admin.ModelAdmin):
+class ArtigoAdmin(ListagemOtimizadaMixin, admin.ModelAdmin):
     list_display = ['id', 'titulo', 'usuario', 'dataPublicacao', 'resumo_curto']
     search_fields = ['titulo', 'resumo']
     list_filter = ['dataPublicacao']
@@ -104,12 +243,13 @@ class ArtigoAdmin(admin.ModelAdmin):
             return obj.resumo[:100] + '...' if len(obj.resumo) > 100 else obj.resumo
         return "Sem resumo"
     resumo_curto.short_description = 'Resumo'
+    resumo_curto.campos = ['resumo']
 
 # ===============================================================
 # JOGO
 # ===============================================================
 @admin.register(Jogo)
-class JogoAdmin(admin.ModelAdmin):
+class JogoAdmin(ListagemOtimizadaMixin, admin.ModelAdmin):
     list_display = ['id', 'titulo', 'desenvolvedor', 'versao', 'ativo', 'data_lancamento']
     search_fields = ['titulo', 'desenvolvedor']
     list_filter = ['ativo', 'data_lancamento']
@@ -132,13 +272,19 @@ class JogoAdmin(admin.ModelAdmin):
                       'tempo_jogo_medio', 'aprendizado_efetivo'),
             'classes': ('collapse',)
         }),
+        ('Estatísticas de Avaliações', {
+            'fields': Jogo.CAMPOS_ESTATISTICA_AVALIACOES,
+            'classes': ('collapse',)
+        }),
     )
+    
+    readonly_fields = Jogo.CAMPOS_ESTATISTICA_AVALIACOES
 
 # ===============================================================
 # PÁGINA
 # ===============================================================
 @admin.register(Pagina)
-class PaginaAdmin(admin.ModelAdmin):
+class PaginaAdmin(ListagemOtimizadaMixin, admin.ModelAdmin):
     list_display = ['id', 'titulo', 'artigo', 'desastre', 'jogo', 'acontecimento']
     search_fields = ['titulo']
     list_filter = ['artigo', 'desastre', 'jogo', 'acontecimento']
@@ -148,24 +294,26 @@ class PaginaAdmin(admin.ModelAdmin):
 # AVALIAÇÃO
 # ===============================================================
 @admin.register(Avaliacao)
-class AvaliacaoAdmin(admin.ModelAdmin):
+class AvaliacaoAdmin(ListagemOtimizadaMixin, admin.ModelAdmin):
     list_display = ['id', 'usuario', 'jogo', 'nota', 'horario', 'texto_curto']
     search_fields = ['texto']
     list_filter = ['nota', 'horario']
     date_hierarchy = 'horario'
     raw_id_fields = ['usuario', 'jogo']
+    actions = [exportar_csv, exportar_jsonl]
     
     def texto_curto(self, obj):
         if obj.texto:
             return obj.texto[:50] + '...' if len(obj.texto) > 50 else obj.texto
         return "Sem texto"
     texto_curto.short_description = 'Avaliação'
+    texto_curto.campos = ['texto']
 
 # ===============================================================
 # TÓPICO ARTIGO
 # ===============================================================
 @admin.register(TopicoArtigo)
-class TopicoArtigoAdmin(admin.ModelAdmin):
+class TopicoArtigoAdmin(ListagemOtimizadaMixin, admin.ModelAdmin):
     list_display = ['id', 'titulo', 'artigo', 'texto_curto']
     search_fields = ['titulo', 'texto']
     list_filter = ['artigo']
@@ -176,12 +324,13 @@ class TopicoArtigoAdmin(admin.ModelAdmin):
             return obj.texto[:100] + '...' if len(obj.texto) > 100 else obj.texto
         return "Sem texto"
     texto_curto.short_description = 'Conteúdo'
+    texto_curto.campos = ['texto']
 
 # ===============================================================
 # TÓPICO DESASTRE
 # ===============================================================
 @admin.register(TopicoDesastre)
-class TopicoDesastreAdmin(admin.ModelAdmin):
+class TopicoDesastreAdmin(ListagemOtimizadaMixin, admin.ModelAdmin):
     list_display = ['id', 'titulo', 'desastre', 'texto_curto']
     search_fields = ['titulo', 'texto']
     list_filter = ['desastre']
@@ -192,12 +341,13 @@ class TopicoDesastreAdmin(admin.ModelAdmin):
             return obj.texto[:100] + '...' if len(obj.texto) > 100 else obj.texto
         return "Sem texto"
     texto_curto.short_description = 'Conteúdo'
+    texto_curto.campos = ['texto']
 
 # ===============================================================
 # PERGUNTA
 # ===============================================================
 @admin.register(Pergunta)
-class PerguntaAdmin(admin.ModelAdmin):
+class PerguntaAdmin(ListagemOtimizadaMixin, admin.ModelAdmin):
     list_display = ['id', 'pergunta_curta', 'jogo', 'usuario', 'resposta_curta']
     search_fields = ['pergunta', 'resposta']
     list_filter = ['jogo']
@@ -206,18 +356,20 @@ class PerguntaAdmin(admin.ModelAdmin):
     def pergunta_curta(self, obj):
         return obj.pergunta[:50] + '...' if len(obj.pergunta) > 50 else obj.pergunta
     pergunta_curta.short_description = 'Pergunta'
+    pergunta_curta.campos = ['pergunta']
     
     def resposta_curta(self, obj):
         if obj.resposta:
             return obj.resposta[:50] + '...' if len(obj.resposta) > 50 else obj.resposta
         return "Sem resposta"
     resposta_curta.short_description = 'Resposta'
+    resposta_curta.campos = ['resposta']
 
 # ===============================================================
 # CARACTERÍSTICA JOGO
 # ===============================================================
 @admin.register(CaracteristicaJogo)
-class CaracteristicaJogoAdmin(admin.ModelAdmin):
+class CaracteristicaJogoAdmin(ListagemOtimizadaMixin, admin.ModelAdmin):
     list_display = ['jogo', 'descricao_curta', 'icone', 'ordem']
     list_filter = ['jogo']
     list_editable = ['ordem']
@@ -226,12 +378,13 @@ class CaracteristicaJogoAdmin(admin.ModelAdmin):
     def descricao_curta(self, obj):
         return obj.descricao[:100] + '...' if len(obj.descricao) > 100 else obj.descricao
     descricao_curta.short_description = 'Descrição'
+    descricao_curta.campos = ['descricao']
 
 # ===============================================================
 # REQUISITO JOGO
 # ===============================================================
 @admin.register(RequisitoJogo)
-class RequisitoJogoAdmin(admin.ModelAdmin):
+class RequisitoJogoAdmin(ListagemOtimizadaMixin, admin.ModelAdmin):
     list_display = ['jogo', 'tipo', 'descricao']
     list_filter = ['jogo', 'tipo']
     search_fields = ['descricao']
@@ -240,7 +393,7 @@ class RequisitoJogoAdmin(admin.ModelAdmin):
 # ATUALIZAÇÃO JOGO
 # ===============================================================
 @admin.register(AtualizacaoJogo)
-class AtualizacaoJogoAdmin(admin.ModelAdmin):
+class AtualizacaoJogoAdmin(ListagemOtimizadaMixin, admin.ModelAdmin):
     list_display = ['jogo', 'versao', 'data', 'descricao_curta']
     list_filter = ['jogo', 'data']
     search_fields = ['versao', 'descricao']
@@ -249,12 +402,13 @@ class AtualizacaoJogoAdmin(admin.ModelAdmin):
     def descricao_curta(self, obj):
         return obj.descricao[:100] + '...' if len(obj.descricao) > 100 else obj.descricao
     descricao_curta.short_description = 'Descrição'
+    descricao_curta.campos = ['descricao']
 
 # ===============================================================
 # FAQ JOGO
 # ===============================================================
 @admin.register(FAQJogo)
-class FAQJogoAdmin(admin.ModelAdmin):
+class FAQJogoAdmin(ListagemOtimizadaMixin, admin.ModelAdmin):
     list_display = [
         'pergunta_curta', 
         'jogo', 
@@ -293,71 +447,57 @@ class FAQJogoAdmin(admin.ModelAdmin):
     def pergunta_curta(self, obj):
         return obj.pergunta[:100] + '...' if len(obj.pergunta) > 100 else obj.pergunta
     pergunta_curta.short_description = 'Pergunta'
+    pergunta_curta.campos = ['pergunta']
     
     def data_criacao_formatada(self, obj):
         return obj.data_criacao.strftime('%d/%m/%Y %H:%M')
     data_criacao_formatada.short_description = 'Criada em'
+    data_criacao_formatada.campos = ['data_criacao']
     
     # Ações personalizadas
     def tornar_visivel(self, request, queryset):
         updated = queryset.update(visivel=True)
+        invalidar_faqs(*queryset.values_list('jogo_id', flat=True))
+        reindexar_modelo(FAQJogo, queryset)
+        atualizar_autocompletar(*queryset)
         self.message_user(request, f'{updated} FAQ(s) tornada(s) visível(eis) no site.')
     tornar_visivel.short_description = "Tornar visível no site"
     
     def tornar_invisivel(self, request, queryset):
         updated = queryset.update(visivel=False)
+        invalidar_faqs(*queryset.values_list('jogo_id', flat=True))
+        reindexar_modelo(FAQJogo, queryset)
+        atualizar_autocompletar(*queryset)
         self.message_user(request, f'{updated} FAQ(s) tornada(s) invisível(eis) no site.')
     tornar_invisivel.short_description = "Tornar invisível no site"
     
     def ativar(self, request, queryset):
         updated = queryset.update(ativo=True)
+        invalidar_faqs(*queryset.values_list('jogo_id', flat=True))
+        reindexar_modelo(FAQJogo, queryset)
+        atualizar_autocompletar(*queryset)
         self.message_user(request, f'{updated} FAQ(s) ativada(s).')
     ativar.short_description = "Ativar FAQ"
     
     def desativar(self, request, queryset):
         updated = queryset.update(ativo=False)
+        invalidar_faqs(*queryset.values_list('jogo_id', flat=True))
+        reindexar_modelo(FAQJogo, queryset)
+        atualizar_autocompletar(*queryset)
         self.message_user(request, f'{updated} FAQ(s) desativada(s).')
     desativar.short_description = "Desativar FAQ"
     
     def criar_do_template(self, request, queryset):
-        templates = [
-            {
-                'pergunta': 'O jogo é gratuito?',
-                'resposta': 'Sim, a versão básica é gratuita. Temos uma versão premium com recursos adicionais.',
-                'categoria': 'geral'
-            },
-            {
-                'pergunta': 'Posso jogar offline?',
-                'resposta': 'Sim, após o download o jogo funciona totalmente offline.',
-                'categoria': 'tecnico'
-            },
-            {
-                'pergunta': 'Quantos níveis tem o jogo?',
-                'resposta': 'O jogo possui 50 níveis principais e 20 desafios especiais.',
-                'categoria': 'jogabilidade'
-            },
-        ]
-        
-        count = 0
-        for jogo in queryset:
-            for template in templates:
-                FAQJogo.objects.create(
-                    jogo=jogo,
-                    pergunta=template['pergunta'],
-                    resposta=template['resposta'],
-                    categoria=template['categoria'],
-                    ordem=FAQJogo.objects.filter(jogo=jogo).count() + 1
-                )
-                count += 1
-        
-        self.message_user(request, f'{count} FAQ(s) criada(s) a partir de templates.')
+        # Um conjunto de templates por jogo das FAQs selecionadas
+        jogo_ids = list(queryset.order_by('jogo_id').values_list('jogo_id', flat=True).distinct())
+        enfileirar_acao(self, request, 'criar_do_template', 'criar_faqs_de_template', jogo_ids, jogo_ids=jogo_ids)
     criar_do_template.short_description = "Criar FAQs de template"
 
 # ===============================================================
 # IMAGEM JOGO
 # ===============================================================
 @admin.register(ImagemJogo)
-class ImagemJogoAdmin(admin.ModelAdmin):
+class ImagemJogoAdmin(ListagemOtimizadaMixin, admin.ModelAdmin):
     list_display = ['jogo', 'legenda_curta', 'ordem']
     list_filter = ['jogo']
     list_editable = ['ordem']
@@ -367,12 +507,13 @@ class ImagemJogoAdmin(admin.ModelAdmin):
             return obj.legenda[:50] + '...' if len(obj.legenda) > 50 else obj.legenda
         return "Sem legenda"
     legenda_curta.short_description = 'Legenda'
+    legenda_curta.campos = ['legenda']
 
 # ===============================================================
 # PERGUNTA USUÁRIO
 # ===============================================================
 @admin.register(PerguntaUsuario)
-class PerguntaUsuarioAdmin(admin.ModelAdmin):
+class PerguntaUsuarioAdmin(ListagemOtimizadaMixin, admin.ModelAdmin):
     list_display = [
         'pergunta_curta',
         'usuario_info',
@@ -390,7 +531,9 @@ class PerguntaUsuarioAdmin(admin.ModelAdmin):
         'marcar_como_respondida',
         'marcar_como_pendente',
         'publicar_como_faq',
-        'enviar_resposta_email'
+        'enviar_resposta_email',
+        exportar_csv,
+        exportar_jsonl,
     ]
     
     fieldsets = (
@@ -412,16 +555,19 @@ class PerguntaUsuarioAdmin(admin.ModelAdmin):
     def pergunta_curta(self, obj):
         return obj.pergunta[:80] + '...' if len(obj.pergunta) > 80 else obj.pergunta
     pergunta_curta.short_description = 'Pergunta'
+    pergunta_curta.campos = ['pergunta']
     
     def usuario_info(self, obj):
         if obj.usuario:
             return f"{obj.usuario.nome} ({obj.usuario.email})"
         return f"Anônimo: {obj.email}"
     usuario_info.short_description = 'Usuário'
+    usuario_info.campos = ['email', 'usuario__nome', 'usuario__email']
     
     def data_envio_formatada(self, obj):
         return obj.data_envio.strftime('%d/%m/%Y %H:%M')
     data_envio_formatada.short_description = 'Enviada em'
+    data_envio_formatada.campos = ['data_envio']
     
     def status_badge(self, obj):
         colors = {
@@ -438,10 +584,12 @@ class PerguntaUsuarioAdmin(admin.ModelAdmin):
         )
     status_badge.short_description = 'Status'
     status_badge.admin_order_field = 'status'
+    status_badge.campos = ['status']
     
     def tempo_decorrido(self, obj):
         return obj.tempo_decorrido
     tempo_decorrido.short_description = 'Tempo'
+    tempo_decorrido.campos = ['data_envio']
     
     # Ações personalizadas
     def marcar_como_respondida(self, request, queryset):
@@ -449,7 +597,7 @@ class PerguntaUsuarioAdmin(admin.ModelAdmin):
         updated = queryset.update(
             status='respondida',
             data_resposta=timezone.now(),
-            admin_respondeu=request.user
+            admin_respondeu_id=usuario_do_admin(request)
         )
         self.message_user(request, f'{updated} pergunta(s) marcada(s) como respondida(s).')
     marcar_como_respondida.short_description = "Marcar como respondida"
@@ -460,31 +608,84 @@ class PerguntaUsuarioAdmin(admin.ModelAdmin):
     marcar_como_pendente.short_description = "Marcar como pendente"
     
     def publicar_como_faq(self, request, queryset):
-        count = 0
-        for pergunta in queryset:
-            if pergunta.status != 'publicada' and pergunta.resposta_admin:
-                faq = FAQJogo.objects.create(
-                    jogo=pergunta.jogo,
-                    pergunta=pergunta.pergunta,
-                    resposta=pergunta.resposta_admin,
-                    categoria='geral',
-                    ordem=FAQJogo.objects.filter(jogo=pergunta.jogo).count() + 1,
-                    visivel=True,
-                    ativo=True
-                )
-                pergunta.status = 'publicada'
-                pergunta.publicado_como_faq = faq
-                pergunta.save()
-                count += 1
-        
-        self.message_user(request, f'{count} pergunta(s) publicada(s) como FAQ.')
+        ids = list(queryset.values_list('pk', flat=True))
+        enfileirar_acao(self, request, 'publicar_como_faq', 'publicar_como_faq', ids, pergunta_ids=ids)
     publicar_como_faq.short_description = "Publicar como FAQ"
     
     def enviar_resposta_email(self, request, queryset):
-        self.marcar_como_respondida(request, queryset)
-        self.message_user(request, f'Respostas preparadas para {queryset.count()} pergunta(s).')
+        ids = list(queryset.values_list('pk', flat=True))
+        enfileirar_acao(self, request, 'enviar_resposta_email', 'enviar_respostas', ids,
+                        pergunta_ids=ids, admin_id=usuario_do_admin(request))
     enviar_resposta_email.short_description = "Enviar resposta por email"
 
+# ===============================================================
+# TAREFA
+# ===============================================================
+@admin.register(Tarefa)
+class TarefaAdmin(ListagemOtimizadaMixin, admin.ModelAdmin):
+    list_display = ['id', 'tipo', 'status', 'barra_progresso', 'tentativas', 'resultado', 'criada_em', 'concluida_em']
+    list_filter = ['status', 'tipo']
+    search_fields = ['tipo', 'chave', 'resultado']
+    readonly_fields = [
+        'tipo', 'parametros', 'chave', 'status', 'barra_progresso', 'resultado', 'tentativas',
+        'maximo_tentativas', 'erro', 'trabalhador', 'disponivel_em', 'prazo',
+        'criada_em', 'iniciada_em', 'concluida_em',
+    ]
+    exclude = ['progresso', 'total']
+    actions = ['tentar_novamente']
+
+    def has_add_permission(self, request):
+        return False
+
+    def barra_progresso(self, obj):
+        total = obj.total if obj.total is not None else '?'
+        return format_html(
+            '<progress value="{}" max="100" style="width: 120px;"></progress> {}/{}',
+            obj.percentual, obj.progresso, total
+        )
+    barra_progresso.short_description = 'Progresso'
+    barra_progresso.campos = ['status', 'progresso', 'total']
+
+    def tentar_novamente(self, request, queryset):
+        updated = queryset.filter(status='falhou').update(
+            status='pendente', tentativas=0, disponivel_em=timezone.now(), erro=''
+        )
+        self.message_user(request, f'{updated} tarefa(s) voltaram para a fila.')
+    tentar_novamente.short_description = "Tentar novamente as que falharam"
+
+# ===============================================================
+# CAIXA DE SAÍDA DE EMAILS
+# ===============================================================
+@admin.register(EmailPendente)
+class EmailPendenteAdmin(ListagemOtimizadaMixin, admin.ModelAdmin):
+    list_display = ['destinatario', 'assunto', 'status', 'tentativas', 'criado_em', 'enviado_em']
+    list_filter = ['status', 'criado_em']
+    search_fields = ['destinatario', 'assunto', 'chave']
+    readonly_fields = [
+        'pergunta', 'destinatario', 'assunto', 'corpo', 'chave', 'status', 'tentativas', 'erro',
+        'disponivel_em', 'reservado_ate', 'lote', 'criado_em', 'enviado_em',
+    ]
+    actions = ['tentar_novamente']
+
+    def has_add_permission(self, request):
+        return False
+
+    def changelist_view(self, request, extra_context=None):
+        metricas = metricas_envio()
+        resumo = f"{metricas['enviados']} enviado(s), {metricas['pendentes']} na fila, {metricas['falhas']} falha(s)"
+        if metricas['espera_media'] is not None:
+            resumo += f"; espera média até o envio: {metricas['espera_media'].total_seconds():.0f}s"
+        return super().changelist_view(request, {**(extra_context or {}), 'subtitle': resumo})
+
+    def tentar_novamente(self, request, queryset):
+        updated = queryset.filter(status='falhou').update(
+            status='pendente', tentativas=0, disponivel_em=timezone.now()
+        )
+        if updated:
+            agendar_envio()
+        self.message_user(request, f'{updated} email(s) voltaram para a fila.')
+    tentar_novamente.short_description = "Tentar novamente os que falharam"
+
 # ===============================================================
 # CONFIGURAÇÃO DO SITE ADMIN
 # ===============================================================
@@ -0,0 +1,236 @@
+import bisect
+import heapq
+import threading
+import time
+from dataclasses import dataclass
+
+from django.db import connections
+from django.db.models import Count
+from django.urls import reverse
+
+from .busca import PALAVRA, STOPWORDS, sem_acentos
+from .models import Artigo, Desastre, FAQJogo, Jogo
+
+# ===============================================================
+# AUTOCOMPLETAR (BUSCA ENQUANTO DIGITA)
+# ===============================================================
+# Títulos de desastres, artigos, jogos e perguntas do FAQ ficam numa lista
+# ordenada de chaves sem acento, uma para cada início de palavra do título
+# ("enchentes urbanas" e "urbanas"). Um prefixo digitado vira um intervalo
+# da lista via bisect; nada é consultado no banco a cada tecla.
+#
+# A lista é montada na inicialização do processo (config/wsgi.py) e corrigida
+# pelos sinais de save/delete (app/signals.py). Como cada processo tem a sua,
+# ela é remontada depois de RECONSTRUIR_APOS segundos para pegar alterações
+# feitas em outros processos; a remontagem roda numa thread e a lista antiga
+# continua respondendo até a nova ficar pronta.
+LIMITE_SUGESTOES = 8
+MAXIMO_SUGESTOES = 20
+RECONSTRUIR_APOS = 10 * 60
+TAMANHO_CHAVE = 60
+
+# Prefixos curtos cobrem boa parte da lista; as respostas deles são guardadas
+# até a próxima alteração
+TAMANHO_PREFIXO_MEMORIZADO = 3
+
+
+@dataclass(frozen=True)
+class Sugestao:
+    tipo: str
+    pk: int
+    titulo: str
+    url: str
+    popularidade: int
+
+    def como_dict(self):
+        return {'tipo': self.tipo, 'titulo': self.titulo, 'url': self.url}
+
+
+# ===============================================================
+# O QUE É SUGERIDO
+# ===============================================================
+# Popularidade: riscos cadastrados (desastre), tópicos (artigo), avaliações
+# (jogo) e a ordem de exibição (FAQ). Cada função recebe o objeto e a
+# popularidade já calculada, ou None quando o objeto não deve ser sugerido.
+def sugestao_desastre(desastre, popularidade):
+    return Sugestao('desastre', desastre.pk, desastre.titulo,
+                    reverse('desastre_detalhe', args=[desastre.pk]), popularidade)
+
+
+def sugestao_artigo(artigo, popularidade):
+    return Sugestao('artigo', artigo.pk, artigo.titulo,
+                    reverse('artigo_detalhe', args=[artigo.pk]), popularidade)
+
+
+def sugestao_jogo(jogo, popularidade):
+    if not jogo.ativo:
+        return None
+    return Sugestao('jogo', jogo.pk, jogo.titulo, reverse('jogo'), popularidade)
+
+
+def sugestao_faq(faq, popularidade):
+    if not (faq.ativo and faq.visivel):
+        return None
+    return Sugestao('faq', faq.pk, faq.pergunta, reverse('jogo') + '#faq', popularidade)
+
+
+def popularidade_padrao(objeto):
+    """Popularidade de um objeto salvo agora, sem consultar o banco."""
+    if isinstance(objeto, Jogo):
+        return objeto.avaliacoes_total
+    if isinstance(objeto, FAQJogo):
+        return -objeto.ordem
+    return 0
+
+
+# modelo -> (tipo, função, queryset anotado com `popularidade`)
+MODELOS_AUTOCOMPLETAR = {
+    Desastre: ('desastre', sugestao_desastre, lambda: Desastre.objects.annotate(popularidade=Count('risco'))),
+    Artigo: ('artigo', sugestao_artigo, lambda: Artigo.objects.annotate(popularidade=Count('topicoartigo'))),
+    Jogo: ('jogo', sugestao_jogo, lambda: Jogo.objects.all()),
+    FAQJogo: ('faq', sugestao_faq, lambda: FAQJogo.objects.all()),
+}
+
+
+def normalizar(texto):
+    return PALAVRA.findall(sem_acentos(texto.lower()))
+
+
+def chaves(titulo):
+    """Uma chave por início de palavra; artigos e preposições só no começo."""
+    palavras = normalizar(titulo)
+    return {
+        ' '.join(palavras[i:])[:TAMANHO_CHAVE]
+        for i in range(len(palavras))
+        if i == 0 or palavras[i] not in STOPWORDS
+    }
+
+
+class IndicePrefixos:
+    """Lista ordenada de (chave, tipo, pk) com busca de prefixo por bisect."""
+
+    def __init__(self):
+        self.entradas = []
+        self.sugestoes = {}  # (tipo, pk) -> Sugestao
+        self.memoria = {}    # prefixo curto -> resposta
+        self.trava = threading.Lock()
+        self.montado_em = time.monotonic()
+
+    @classmethod
+    def montar(cls):
+        indice = cls()
+        for modelo, (_, funcao, queryset) in MODELOS_AUTOCOMPLETAR.items():
+            for objeto in queryset().iterator(chunk_size=2000):
+                popularidade = getattr(objeto, 'popularidade', None)
+                sugestao = funcao(objeto, popularidade_padrao(objeto) if popularidade is None else popularidade)
+                if sugestao is not None:
+                    indice.sugestoes[sugestao.tipo, sugestao.pk] = sugestao
+        indice.entradas = sorted(
+            (chave, tipo, pk)
+            for (tipo, pk), sugestao in indice.sugestoes.items()
+            for chave in chaves(sugestao.titulo)
+        )
+        return indice
+
+    def atualizar(self, objeto):
+        tipo, funcao, _ = MODELOS_AUTOCOMPLETAR[type(objeto)]
+        with self.trava:
+            anterior = self._remover(tipo, objeto.pk)
+            popularidade = anterior.popularidade if anterior else popularidade_padrao(objeto)
+            sugestao = funcao(objeto, popularidade)
+            if sugestao is not None:
+                self.sugestoes[tipo, objeto.pk] = sugestao
+                for chave in chaves(sugestao.titulo):
+                    bisect.insort(self.entradas, (chave, tipo, objeto.pk))
+            self.memoria.clear()
+
+    def remover(self, modelo, *pks):
+        tipo = MODELOS_AUTOCOMPLETAR[modelo][0]
+        with self.trava:
+            for pk in pks:
+                self._remover(tipo, pk)
+            self.memoria.clear()
+
+    def _remover(self, tipo, pk):
+        sugestao = self.sugestoes.pop((tipo, pk), None)
+        if sugestao is not None:
+            for chave in chaves(sugestao.titulo):
+                posicao = bisect.bisect_left(self.entradas, (chave, tipo, pk))
+                if posicao < len(self.entradas) and self.entradas[posicao] == (chave, tipo, pk):
+                    del self.entradas[posicao]
+        return sugestao
+
+    def sugerir(self, consulta, limite=LIMITE_SUGESTOES):
+        prefixo = ' '.join(normalizar(consulta))
+        if not prefixo:
+            return []
+        memorizar = len(prefixo) <= TAMANHO_PREFIXO_MEMORIZADO
+        with self.trava:
+            if memorizar and prefixo in self.memoria:
+                return self.memoria[prefixo][:limite]
+            inicio = bisect.bisect_left(self.entradas, (prefixo,))
+            fim = bisect.bisect_left(self.entradas, (prefixo + '\uffff',), inicio)
+            encontradas = {(tipo, pk) for _, tipo, pk in self.entradas[inicio:fim]}
+            melhores = heapq.nsmallest(
+                MAXIMO_SUGESTOES if memorizar else limite,
+                (self.sugestoes[chave] for chave in encontradas),
+                key=lambda s: (-s.popularidade, len(s.titulo), s.titulo, s.pk),
+            )
+            if memorizar:
+                self.memoria[prefixo] = melhores
+        return melhores[:limite]
+
+
+_indice = None
+_trava_montagem = threading.Lock()  # uma montagem por vez no processo
+
+
+def aquecer_autocompletar():
+    """Monta a lista se ainda não existir; quem chega durante a montagem espera por ela."""
+    global _indice
+    with _trava_montagem:
+        if _indice is None:
+            _indice = IndicePrefixos.montar()
+        return _indice
+
+
+def remontar():
+    """Corpo da thread de remontagem; recebe a trava já adquirida."""
+    global _indice
+    try:
+        _indice = IndicePrefixos.montar()
+    finally:
+        _trava_montagem.release()
+        connections.close_all()  # conexões desta thread
+
+
+def indice_autocompletar():
+    indice = _indice
+    if indice is None:
+        return aquecer_autocompletar()
+    if time.monotonic() - indice.montado_em > RECONSTRUIR_APOS and _trava_montagem.acquire(blocking=False):
+        threading.Thread(target=remontar, name='remontar-autocompletar', daemon=True).start()
+    return indice
+
+
+def sugerir(consulta, limite=LIMITE_SUGESTOES):
+    if not (consulta or '').strip():
+        return []
+    return indice_autocompletar().sugerir(consulta, limite)
+
+
+def atualizar_autocompletar(*objetos):
+    """Corrige a lista já montada; sem lista, nada a fazer (ela nasce atualizada)."""
+    if _indice is not None:
+        for objeto in objetos:
+            _indice.atualizar(objeto)
+
+
+def remover_do_autocompletar(modelo, *pks):
+    if _indice is not None:
+        _indice.remover(modelo, *pks)
+
+
+def descartar_autocompletar():
+    global _indice
+    _indice = None
@@ -0,0 +1,308 @@
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+
+from django.db import connection
+from django.urls import reverse
+
+from .models import Artigo, DocumentoBusca, FAQJogo, TopicoArtigo, TopicoDesastre
+
+# ===============================================================
+# BUSCA NO SITE
+# ===============================================================
+# Artigos, tópicos e FAQs visíveis são copiados para DocumentoBusca a cada
+# save/delete (app/signals.py). No PostgreSQL a busca usa a coluna gerada
+# `vetor` (to_tsvector('portuguese', ...)) com índice GIN; nos demais
+# bancos, um índice invertido em memória com BM25 e um radicalizador leve.
+LIMITE_RESULTADOS = 20
+TAMANHO_TRECHO = 200
+
+
+@dataclass(frozen=True)
+class Resultado:
+    tipo: str
+    titulo: str
+    trecho: str
+    url: str
+    relevancia: float
+
+    def como_dict(self):
+        return {
+            'tipo': self.tipo, 'titulo': self.titulo, 'trecho': self.trecho,
+            'url': self.url, 'relevancia': round(self.relevancia, 4),
+        }
+
+
+# ===============================================================
+# O QUE É INDEXADO
+# ===============================================================
+# Cada função devolve (titulo, texto, url) ou None quando o objeto não
+# deve aparecer na busca.
+def documento_artigo(artigo):
+    return artigo.titulo, artigo.resumo or '', reverse('artigo_detalhe', args=[artigo.pk])
+
+
+def documento_topico_artigo(topico):
+    return topico.titulo, topico.texto or '', reverse('artigo_detalhe', args=[topico.artigo_id])
+
+
+def documento_topico_desastre(topico):
+    return topico.titulo, topico.texto or '', reverse('desastre_detalhe', args=[topico.desastre_id])
+
+
+def documento_faq(faq):
+    if not (faq.ativo and faq.visivel):
+        return None
+    return faq.pergunta[:255], faq.resposta, reverse('jogo') + '#faq'
+
+
+MODELOS_BUSCA = {
+    Artigo: ('artigo', documento_artigo),
+    TopicoArtigo: ('topico_artigo', documento_topico_artigo),
+    TopicoDesastre: ('topico_desastre', documento_topico_desastre),
+    FAQJogo: ('faq', documento_faq),
+}
+
+
+def indexar(*objetos):
+    """Cria, atualiza ou remove o DocumentoBusca de cada objeto."""
+    for objeto in objetos:
+        tipo, documento = MODELOS_BUSCA[type(objeto)]
+        dados = documento(objeto)
+        if dados is None:
+            remover_do_indice(type(objeto), objeto.pk)
+            continue
+        titulo, texto, url = dados
+        documento_busca, _ = DocumentoBusca.objects.update_or_create(
+            tipo=tipo, objeto_id=objeto.pk, defaults={'titulo': titulo, 'texto': texto, 'url': url}
+        )
+        if _indice_memoria is not None:
+            _indice_memoria.adicionar(documento_busca.pk, titulo, texto)
+
+
+def remover_do_indice(modelo, *pks):
+    tipo, _ = MODELOS_BUSCA[modelo]
+    documentos = DocumentoBusca.objects.filter(tipo=tipo, objeto_id__in=pks)
+    if _indice_memoria is not None:
+        for documento_id in documentos.values_list('pk', flat=True):
+            _indice_memoria.remover(documento_id)
+    documentos.delete()
+
+
+def reindexar_modelo(modelo, queryset=None, lote=2000):
+    """Regrava em lote os documentos de um modelo (ou só dos objetos do queryset)."""
+    tipo, documento = MODELOS_BUSCA[modelo]
+    queryset = modelo.objects.all() if queryset is None else queryset
+    incluidos, excluidos = [], []
+    for objeto in queryset.order_by('pk').iterator(chunk_size=lote):
+        dados = documento(objeto)
+        if dados is None:
+            excluidos.append(objeto.pk)
+        else:
+            titulo, texto, url = dados
+            incluidos.append(DocumentoBusca(tipo=tipo, objeto_id=objeto.pk, titulo=titulo, texto=texto, url=url))
+        if len(incluidos) >= lote:
+            gravar_documentos(incluidos)
+            incluidos = []
+    gravar_documentos(incluidos)
+    if excluidos:
+        remover_do_indice(modelo, *excluidos)
+
+
+def gravar_documentos(documentos):
+    DocumentoBusca.objects.bulk_create(
+        documentos, update_conflicts=True, unique_fields=['tipo', 'objeto_id'],
+        update_fields=['titulo', 'texto', 'url', 'atualizado_em'],
+    )
+
+
+# ===============================================================
+# TEXTO -> TERMOS (fallback em memória)
+# ===============================================================
+STOPWORDS = set('''
+a ao aos as com como da das de do dos e é em entre na nas no nos o os ou para
+pela pelas pelo pelos por que se sem sob sobre um uma umas uns à às ser são foi
+'''.split())
+
+# Sufixos removidos do fim da palavra, do mais longo para o mais curto
+SUFIXOS = [
+    'amentos', 'imentos', 'amento', 'imento', 'acoes', 'icoes', 'mente', 'idade',
+    'acao', 'icao', 'ismo', 'ista', 'avel', 'ivel', 'oso', 'osa',
+]
+PLURAIS = [('oes', 'ao'), ('aes', 'ao'), ('ais', 'al'), ('eis', 'el'), ('ois', 'ol'), ('ns', 'm'), ('res', 'r'), ('s', '')]
+PALAVRA = re.compile(r'\w+')
+
+
+def sem_acentos(texto):
+    decomposto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def radical(palavra):
+    """Radicalizador leve de português: plural e sufixos mais comuns."""
+    for sufixo, troca in PLURAIS:
+        if palavra.endswith(sufixo) and len(palavra) - len(sufixo) >= 3:
+            palavra = palavra[:len(palavra) - len(sufixo)] + troca
+            break
+    for sufixo in SUFIXOS:
+        if palavra.endswith(sufixo) and len(palavra) - len(sufixo) >= 3:
+            return palavra[:-len(sufixo)]
+    if len(palavra) > 4 and palavra[-1] in 'aoe':
+        return palavra[:-1]
+    return palavra
+
+
+def termos(texto):
+    return [
+        radical(palavra) for palavra in PALAVRA.findall(sem_acentos(texto.lower()))
+        if palavra not in STOPWORDS and len(palavra) > 1
+    ]
+
+
+class IndiceInvertido:
+    """Índice invertido em memória com ranking BM25 (títulos valem PESO_TITULO)."""
+    PESO_TITULO = 3
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self):
+        self.postings = {}      # termo -> {documento_id: frequência}
+        self.termos_doc = {}    # documento_id -> Counter de termos
+        self.comprimentos = {}  # documento_id -> total de termos (com o peso do título)
+        self.total_termos = 0
+        self.trava = threading.Lock()
+        self.sincronizado_ate = None
+
+    def adicionar(self, documento_id, titulo, texto):
+        frequencias = Counter(termos(texto))
+        for termo in termos(titulo):
+            frequencias[termo] += self.PESO_TITULO
+        with self.trava:
+            self._remover(documento_id)
+            self.termos_doc[documento_id] = frequencias
+            self.comprimentos[documento_id] = sum(frequencias.values())
+            self.total_termos += self.comprimentos[documento_id]
+            for termo, frequencia in frequencias.items():
+                self.postings.setdefault(termo, {})[documento_id] = frequencia
+
+    def remover(self, documento_id):
+        with self.trava:
+            self._remover(documento_id)
+
+    def _remover(self, documento_id):
+        frequencias = self.termos_doc.pop(documento_id, None)
+        if frequencias is None:
+            return
+        self.total_termos -= self.comprimentos.pop(documento_id)
+        for termo in frequencias:
+            documentos = self.postings.get(termo)
+            if documentos is not None:
+                documentos.pop(documento_id, None)
+                if not documentos:
+                    del self.postings[termo]
+
+    def buscar(self, consulta, limite=LIMITE_RESULTADOS):
+        """[(documento_id, relevância)] com todos os termos da consulta (E)."""
+        termos_consulta = set(termos(consulta))
+        if not termos_consulta:
+            return []
+        with self.trava:
+            listas = [self.postings.get(termo, {}) for termo in termos_consulta]
+            if not all(listas):
+                return []
+            listas.sort(key=len)
+            candidatos = set(listas[0]).intersection(*listas[1:])
+            total_docs = len(self.termos_doc)
+            media = self.total_termos / total_docs if total_docs else 0
+
+            pontuacao = {}
+            for documentos in listas:
+                idf = math.log(1 + (total_docs - len(documentos) + 0.5) / (len(documentos) + 0.5))
+                for documento_id in candidatos:
+                    frequencia = documentos[documento_id]
+                    normalizacao = self.K1 * (1 - self.B + self.B * self.comprimentos[documento_id] / media)
+                    pontuacao[documento_id] = pontuacao.get(documento_id, 0) + (
+                        idf * frequencia * (self.K1 + 1) / (frequencia + normalizacao)
+                    )
+        return sorted(pontuacao.items(), key=lambda item: (-item[1], item[0]))[:limite]
+
+    def sincronizar(self):
+        """Incorpora documentos gravados por outros processos desde a última chamada."""
+        documentos = DocumentoBusca.objects.order_by('atualizado_em')
+        if self.sincronizado_ate is not None:
+            # >= e não >: dois saves no mesmo instante não podem ficar de fora
+            documentos = documentos.filter(atualizado_em__gte=self.sincronizado_ate)
+        for documento in documentos.values('pk', 'titulo', 'texto', 'atualizado_em').iterator(chunk_size=5000):
+            self.adicionar(documento['pk'], documento['titulo'], documento['texto'])
+            self.sincronizado_ate = documento['atualizado_em']
+
+
+_indice_memoria = None
+
+
+def indice_memoria():
+    global _indice_memoria
+    if _indice_memoria is None:
+        _indice_memoria = IndiceInvertido()
+    _indice_memoria.sincronizar()
+    return _indice_memoria
+
+
+def descartar_indice_memoria():
+    global _indice_memoria
+    _indice_memoria = None
+
+
+# ===============================================================
+# CONSULTA
+# ===============================================================
+SQL_BUSCA_POSTGRES = """
+    SELECT d.id, ts_rank_cd(d.vetor, q) AS relevancia
+    FROM app_documentobusca d, websearch_to_tsquery('portuguese', %s) q
+    WHERE d.vetor @@ q
+    ORDER BY relevancia DESC, d.id
+    LIMIT %s
+"""
+
+
+def trecho(texto, consulta):
+    """Pedaço do texto em volta da primeira palavra que casa com a consulta."""
+    if len(texto) <= TAMANHO_TRECHO:
+        return texto
+    procurados = set(termos(consulta))
+    inicio = 0
+    for palavra in PALAVRA.finditer(texto):
+        if radical(sem_acentos(palavra.group().lower())) in procurados:
+            inicio = max(0, palavra.start() - TAMANHO_TRECHO // 4)
+            break
+    pedaco = texto[inicio:inicio + TAMANHO_TRECHO]
+    return ('…' if inicio else '') + pedaco + ('…' if inicio + TAMANHO_TRECHO < len(texto) else '')
+
+
+def buscar(consulta, limite=LIMITE_RESULTADOS):
+    consulta = (consulta or '').strip()
+    if not consulta:
+        return []
+
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(SQL_BUSCA_POSTGRES, [consulta, limite])
+            ranking = cursor.fetchall()
+    else:
+        ranking = indice_memoria().buscar(consulta, limite)
+
+    documentos = DocumentoBusca.objects.in_bulk([documento_id for documento_id, _ in ranking])
+    return [
+        Resultado(
+            tipo=documentos[documento_id].tipo,
+            titulo=documentos[documento_id].titulo,
+            trecho=trecho(documentos[documento_id].texto, consulta),
+            url=documentos[documento_id].url,
+            relevancia=relevancia,
+        )
+        # Um documento removido por outro processo pode ainda estar no índice em memória
+        for documento_id, relevancia in ranking if documento_id in documentos
+    ]
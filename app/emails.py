@@ -0,0 +1,191 @@
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Avg, Count, F, Q
+from django.utils import timezone
+
+from .models import EmailPendente, PerguntaUsuario, Tarefa
+from .tarefas import LOTE_TAREFA, Reagendar, enfileirar, informar_progresso, tarefa
+
+# ===============================================================
+# CAIXA DE SAÍDA DE EMAILS
+# ===============================================================
+# Quem precisa mandar email grava EmailPendente e enfileira enviar_emails.
+# Cada execução reserva lotes de EMAIL_LOTE emails e os envia por uma única
+# conexão SMTP. Há no máximo EMAIL_ENVIOS_SIMULTANEOS execuções ao mesmo
+# tempo (uma chave de idempotência por vaga). Um email que falha volta para
+# a fila com espera crescente até EMAIL_MAXIMO_TENTATIVAS. A entrega é
+# "pelo menos uma vez": um trabalhador que morre depois do envio e antes de
+# marcar o lote faz esses emails saírem de novo.
+ESPERA_NOVA_TENTATIVA = timedelta(minutes=1)  # dobra a cada tentativa
+RESERVA_LOTE = timedelta(minutes=5)
+
+
+def lote_emails():
+    return getattr(settings, 'EMAIL_LOTE', 100)
+
+
+def envios_simultaneos():
+    return getattr(settings, 'EMAIL_ENVIOS_SIMULTANEOS', 2)
+
+
+def maximo_tentativas():
+    return getattr(settings, 'EMAIL_MAXIMO_TENTATIVAS', 5)
+
+
+def agendar_envio():
+    """Garante uma execução de enviar_emails por vaga de envio, disponível já."""
+    agora = timezone.now()
+    for vaga in range(envios_simultaneos()):
+        envio = enfileirar('enviar_emails', chave=f'enviar_emails:{vaga}')
+        # A vaga pode estar reagendada para a nova tentativa de um email que
+        # falhou; os emails novos não esperam por ela
+        Tarefa.objects.filter(pk=envio.pk, status='pendente', disponivel_em__gt=agora).update(disponivel_em=agora)
+
+
+# ===============================================================
+# RESPOSTAS ÀS PERGUNTAS DOS USUÁRIOS
+# ===============================================================
+def email_da_resposta(pergunta, chave):
+    return EmailPendente(
+        pergunta=pergunta,
+        destinatario=pergunta.email,
+        assunto=f'Resposta à sua pergunta sobre {pergunta.jogo.titulo}'[:255],
+        corpo=(
+            f'Olá!\n\nVocê perguntou:\n\n{pergunta.pergunta}\n\n'
+            f'Nossa resposta:\n\n{pergunta.resposta_admin}\n\nEquipe A Crise G'
+        ),
+        chave=chave,
+    )
+
+
+@tarefa('enviar_respostas')
+def tarefa_enviar_respostas(tarefa, pergunta_ids, admin_id=None):
+    respondidas = emails = 0
+    for inicio in range(0, len(pergunta_ids), LOTE_TAREFA):
+        lote = pergunta_ids[inicio:inicio + LOTE_TAREFA]
+        respondidas += PerguntaUsuario.objects.filter(pk__in=lote).update(
+            status='respondida', data_resposta=timezone.now(), admin_respondeu_id=admin_id
+        )
+        com_resposta = PerguntaUsuario.objects.filter(pk__in=lote).exclude(
+            Q(resposta_admin__isnull=True) | Q(resposta_admin='') | Q(email='')
+        ).select_related('jogo')
+        # A chave inclui a tarefa: repetir a tarefa não duplica, responder de novo depois envia outra vez
+        emails += len(EmailPendente.objects.bulk_create(
+            [email_da_resposta(pergunta, f'resposta:{pergunta.pk}:{tarefa.pk}') for pergunta in com_resposta],
+            ignore_conflicts=True,
+        ))
+        informar_progresso(tarefa, min(inicio + LOTE_TAREFA, len(pergunta_ids)), len(pergunta_ids))
+    agendar_envio()
+    return f'Respostas preparadas para {respondidas} pergunta(s); {emails} email(s) na fila.'
+
+
+# ===============================================================
+# ENVIO
+# ===============================================================
+def disponiveis(agora):
+    return Q(status='pendente', disponivel_em__lte=agora) | Q(status='enviando', reservado_ate__lt=agora)
+
+
+def reservar_lote():
+    """Marca um lote de emails como 'enviando' para esta execução; devolve os emails."""
+    agora = timezone.now()
+    candidatos = list(
+        EmailPendente.objects.filter(disponiveis(agora)).order_by('disponivel_em', 'pk')
+        .values_list('pk', flat=True)[:lote_emails()]
+    )
+    if not candidatos:
+        return []
+    # UPDATE condicional: o que outra execução reservou no meio do caminho fica de fora
+    token = uuid.uuid4().hex
+    EmailPendente.objects.filter(disponiveis(agora), pk__in=candidatos).update(
+        status='enviando', reservado_ate=agora + RESERVA_LOTE, lote=token, tentativas=F('tentativas') + 1,
+    )
+    return list(EmailPendente.objects.filter(status='enviando', lote=token).order_by('pk'))
+
+
+def enviar_lote(emails, conexao):
+    """Envia pela conexão já aberta; retorna (enviados, falhas).
+
+    Se a conexão não reabrir depois de uma falha, o resto do lote volta para
+    a fila como falha e o erro é relançado; o que já saiu fica gravado.
+    """
+    enviados, falhas = [], []
+    try:
+        for posicao, email in enumerate(emails):
+            mensagem = EmailMessage(email.assunto, email.corpo, None, [email.destinatario], connection=conexao)
+            try:
+                conexao.send_messages([mensagem])
+            except Exception as erro:
+                falhas.append((email, f'{type(erro).__name__}: {erro}'))
+                # A conexão pode ter ficado inutilizável; os próximos usam uma nova
+                try:
+                    conexao.close()
+                    conexao.open()
+                except Exception as erro:
+                    motivo = f'{type(erro).__name__}: {erro}'
+                    falhas.extend((restante, motivo) for restante in emails[posicao + 1:])
+                    raise
+            else:
+                enviados.append(email.pk)
+    finally:
+        # Gravado mesmo com erro: um email entregue não pode voltar para a fila
+        gravar_resultado(enviados, falhas)
+    return len(enviados), len(falhas)
+
+
+def gravar_resultado(enviados, falhas):
+    agora = timezone.now()
+    EmailPendente.objects.filter(pk__in=enviados).update(status='enviado', enviado_em=agora, erro='', reservado_ate=None)
+    for email, erro in falhas:
+        if email.tentativas >= maximo_tentativas():
+            campos = {'status': 'falhou'}
+        else:
+            campos = {'status': 'pendente', 'disponivel_em': agora + ESPERA_NOVA_TENTATIVA * 2 ** (email.tentativas - 1)}
+        EmailPendente.objects.filter(pk=email.pk).update(erro=erro, reservado_ate=None, **campos)
+
+
+@tarefa('enviar_emails')
+def tarefa_enviar_emails(tarefa):
+    inicio = time.perf_counter()
+    enviados = falhas = 0
+    conexao = get_connection()
+    conexao.open()
+    try:
+        while True:
+            lote = reservar_lote()
+            if not lote:
+                break
+            sucesso, erro = enviar_lote(lote, conexao)
+            enviados += sucesso
+            falhas += erro
+            informar_progresso(tarefa, enviados + falhas)
+    finally:
+        conexao.close()
+
+    resultado = f'{enviados} enviado(s), {falhas} falha(s) em {time.perf_counter() - inicio:.1f}s.'
+    # Emails esperando nova tentativa: esta mesma vaga volta quando o primeiro estiver liberado
+    proximo = EmailPendente.objects.filter(status='pendente').order_by('disponivel_em').values_list(
+        'disponivel_em', flat=True
+    ).first()
+    if proximo is not None:
+        raise Reagendar(proximo, resultado)
+    return resultado
+
+
+def metricas_envio():
+    """Totais por status e o tempo médio entre a criação e o envio."""
+    por_status = dict(EmailPendente.objects.order_by().values_list('status').annotate(Count('pk')))
+    espera = EmailPendente.objects.filter(status='enviado').aggregate(
+        media=Avg(F('enviado_em') - F('criado_em')), tentativas=Avg('tentativas')
+    )
+    return {
+        'pendentes': por_status.get('pendente', 0) + por_status.get('enviando', 0),
+        'enviados': por_status.get('enviado', 0),
+        'falhas': por_status.get('falhou', 0),
+        'espera_media': espera['media'],
+        'tentativas_media': espera['tentativas'],
+    }
@@ -0,0 +1,310 @@
+import gzip
+import logging
+import os
+import re
+import struct
+import zlib
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # opcional: sem o pacote, só os .gz são gerados
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# ===============================================================
+# ARQUIVOS ESTÁTICOS (COLLECTSTATIC)
+# ===============================================================
+# O collectstatic copia os arquivos para STATIC_ROOT e, em seguida:
+#   1. minifica CSS/JS do site (PASTAS_MINIFICADAS) e recomprime PNGs sem
+#      perda, antes do hash, para o nome refletir o conteúdo servido;
+#   2. grava cópias com o hash do conteúdo no nome (geral.3f2a9c1b7d4e.css)
+#      e o manifesto staticfiles.json, usado pelo {% static %};
+#   3. grava ao lado de cada arquivo de texto as versões .gz e, com o pacote
+#      brotli instalado, .br.
+# ArquivosEstaticosMiddleware (app/middleware.py) serve o resultado.
+PASTAS_MINIFICADAS = ('scripts/', 'styles/')
+COMPRIMIVEIS = {'.css', '.js', '.json', '.svg', '.txt', '.html', '.xml', '.map', '.ico'}
+# Uma versão comprimida que não economiza ao menos 5% não compensa o Content-Encoding
+ECONOMIA_MINIMA = 0.95
+# Imagens das meta tags sociais de base.html que ainda não existem em
+# app/static: saem com a URL sem hash. Qualquer outro arquivo fora do
+# manifesto é erro (link quebrado ou collectstatic desatualizado).
+AUSENTES_CONHECIDOS = {'images/og-image.jpg', 'images/twitter-image.jpg'}
+
+
+def etag_do_arquivo(info):
+    """ETag de um arquivo servido do disco, só com o stat (mtime e tamanho)."""
+    return f'"{info.st_mtime_ns:x}-{info.st_size:x}"'
+
+
+# ===============================================================
+# MINIFICAÇÃO
+# ===============================================================
+# Conservadora de propósito: tira comentários e espaços, mas não renomeia
+# nada. No JS as quebras de linha ficam, então a inserção automática de
+# ponto e vírgula continua valendo como no original.
+CSS_TOKENS = re.compile(
+    r"""(?P<literal>"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|/\*!.*?\*/)"""
+    r'|(?P<espaco>\s+|/\*.*?\*/)'
+    r"""|(?P<codigo>[^\s"'/]+|.)""",
+    re.S,
+)
+# Espaço encostado nestes não muda o CSS (depois de ":" só, por causa de "a :hover")
+CSS_SEM_ESPACO_ANTES = set('{};,>')
+CSS_SEM_ESPACO_DEPOIS = set('{};,>:')
+
+
+def minificar_css(texto):
+    saida, espaco = [], False
+    for casamento in CSS_TOKENS.finditer(texto):
+        tipo, valor = casamento.lastgroup, casamento.group()
+        if tipo == 'espaco':
+            espaco = bool(saida)
+            continue
+        if espaco and saida[-1][-1] not in CSS_SEM_ESPACO_DEPOIS and valor[0] not in CSS_SEM_ESPACO_ANTES:
+            saida.append(' ')
+        espaco = False
+        if tipo == 'codigo':
+            if valor[0] == '}' and saida and saida[-1].endswith(';'):
+                saida[-1] = saida[-1][:-1]
+            valor = valor.replace(';}', '}')
+        saida.append(valor)
+    return ''.join(saida)
+
+
+# Depois destes, uma "/" começa uma expressão regular, não uma divisão
+ANTES_DE_REGEX = set('(,=:[!&|?{};+-*%<>~^')
+PALAVRAS_ANTES_DE_REGEX = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete', 'void', 'throw'}
+# Espaço ao lado destes nunca separa dois tokens
+SEPARADORES_JS = set('{}()[];,:=<>?&|')
+# Quebra de linha depois/antes destes não pesa na inserção automática de ";"
+SEM_QUEBRA_DEPOIS = set('{([;,')
+SEM_QUEBRA_ANTES = set('})]')
+IDENTIFICADOR = re.compile(r'[\w$]+$')
+
+
+def minificar_js(texto):
+    saida = []
+    pilha = []  # '{' de blocos e '`' de ${...} abertos dentro de template strings
+    i, n = 0, len(texto)
+
+    def emitir_espaco(quebra):
+        if quebra and saida and saida[-1] == ' ':
+            saida.pop()  # espaço antes de um comentário de linha
+        ultimo = saida[-1][-1] if saida else '\n'
+        if ultimo in ' \n' or (quebra and ultimo in SEM_QUEBRA_DEPOIS):
+            return
+        saida.append('\n' if quebra else ' ')
+
+    while i < n:
+        c = texto[i]
+        if c in ' \t\r\n\f\v':
+            fim = i
+            while fim < n and texto[fim] in ' \t\r\n\f\v':
+                fim += 1
+            emitir_espaco('\n' in texto[i:fim])
+            i = fim
+        elif texto.startswith('//', i):
+            fim = texto.find('\n', i)
+            i = n if fim == -1 else fim
+        elif texto.startswith('/*', i):
+            fim = texto.find('*/', i + 2)
+            fim = n if fim == -1 else fim + 2
+            emitir_espaco('\n' in texto[i:fim])
+            i = fim
+        elif c in '\'"':
+            fim = _fim_da_string(texto, i, c)
+            _emitir(saida, texto[i:fim])
+            i = fim
+        elif c == '`' or (c == '}' and pilha and pilha[-1] == '`'):
+            if c == '}':
+                pilha.pop()
+            fim, abriu_expressao = _fim_do_template(texto, i + 1)
+            if abriu_expressao:
+                pilha.append('`')
+            _emitir(saida, texto[i:fim])
+            i = fim
+        elif c == '/' and _comeca_regex(''.join(saida[-16:]).rstrip()):
+            fim = _fim_da_regex(texto, i)
+            _emitir(saida, texto[i:fim])
+            i = fim
+        else:
+            if c == '{':
+                pilha.append('{')
+            elif c == '}' and pilha:
+                pilha.pop()
+            _emitir(saida, c)
+            i += 1
+    minificado = ''.join(saida).strip()
+    return minificado + '\n' if minificado else ''
+
+
+def _emitir(saida, pedaco):
+    # Tira o espaço ou a quebra já emitidos quando não separam nada
+    if len(saida) > 1 and (
+        (saida[-1] == ' ' and (pedaco[0] in SEPARADORES_JS or saida[-2][-1] in SEPARADORES_JS))
+        or (saida[-1] == '\n' and pedaco[0] in SEM_QUEBRA_ANTES)
+    ):
+        saida.pop()
+    saida.append(pedaco)
+
+
+def _comeca_regex(anterior):
+    if not anterior:
+        return True
+    if anterior.endswith(('++', '--')):
+        return False  # x++ / 2: o ++ pós-fixo fecha um operando
+    if anterior[-1] in ANTES_DE_REGEX:
+        return True
+    palavra = IDENTIFICADOR.search(anterior)
+    return bool(palavra) and palavra.group() in PALAVRAS_ANTES_DE_REGEX
+
+
+def _fim_da_string(texto, inicio, aspas):
+    i = inicio + 1
+    while i < len(texto) and texto[i] != aspas:
+        i += 2 if texto[i] == '\\' else 1
+    return i + 1
+
+
+def _fim_do_template(texto, i):
+    """Fim do trecho literal de uma template string: (posição, abriu ${)."""
+    while i < len(texto):
+        if texto[i] == '\\':
+            i += 2
+        elif texto[i] == '`':
+            return i + 1, False
+        elif texto.startswith('${', i):
+            return i + 2, True
+        else:
+            i += 1
+    return i, False
+
+
+def _fim_da_regex(texto, inicio):
+    i, classe = inicio + 1, False
+    while i < len(texto) and texto[i] != '\n':
+        c = texto[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == '[':
+            classe = True
+        elif c == ']':
+            classe = False
+        elif c == '/' and not classe:
+            i += 1
+            while i < len(texto) and (texto[i].isalnum() or texto[i] == '_'):
+                i += 1  # flags
+            return i
+        i += 1
+    return i
+
+
+# ===============================================================
+# PNG
+# ===============================================================
+# Chunks necessários para a imagem aparecer igual; o resto (texto,
+# data, resolução de impressão) é descartado
+CHUNKS_PNG_MANTIDOS = {b'IHDR', b'PLTE', b'tRNS', b'cHRM', b'gAMA', b'iCCP', b'sRGB', b'sBIT', b'IEND'}
+ASSINATURA_PNG = b'\x89PNG\r\n\x1a\n'
+
+
+def _chunk_png(tipo, dados):
+    return struct.pack('>I', len(dados)) + tipo + dados + struct.pack('>I', zlib.crc32(tipo + dados))
+
+
+def otimizar_png(dados):
+    """Recomprime os pixels com zlib no nível máximo, sem perda; devolve o menor."""
+    if not dados.startswith(ASSINATURA_PNG):
+        return dados
+    chunks, pixels, i = [], [], len(ASSINATURA_PNG)
+    while i + 8 <= len(dados):
+        tamanho, tipo = struct.unpack('>I4s', dados[i:i + 8])
+        conteudo = dados[i + 8:i + 8 + tamanho]
+        i += 12 + tamanho
+        if tipo == b'IDAT':
+            if not pixels:
+                chunks.append(None)  # posição do IDAT único
+            pixels.append(conteudo)
+        elif tipo in CHUNKS_PNG_MANTIDOS:
+            chunks.append(_chunk_png(tipo, conteudo))
+    try:
+        idat = zlib.compress(zlib.decompress(b''.join(pixels)), 9)
+    except zlib.error:
+        return dados
+    otimizado = ASSINATURA_PNG + b''.join(
+        _chunk_png(b'IDAT', idat) if chunk is None else chunk for chunk in chunks
+    )
+    return otimizado if len(otimizado) < len(dados) else dados
+
+
+# ===============================================================
+# STORAGE
+# ===============================================================
+def otimizar(nome, dados):
+    """Conteúdo otimizado do arquivo `nome`, ou os mesmos bytes."""
+    extensao = os.path.splitext(nome)[1].lower()
+    if extensao == '.png':
+        return otimizar_png(dados)
+    minificado = '.min.' in nome or not nome.startswith(PASTAS_MINIFICADAS)
+    if extensao in ('.css', '.js') and not minificado:
+        minificar = minificar_css if extensao == '.css' else minificar_js
+        return minificar(dados.decode('utf-8')).encode('utf-8')
+    return dados
+
+
+def comprimir(caminho):
+    """Grava caminho.gz (e caminho.br) quando a compressão compensa."""
+    with open(caminho, 'rb') as arquivo:
+        dados = arquivo.read()
+    versoes = {'.gz': gzip.compress(dados, 9, mtime=0)}
+    if brotli is not None:
+        versoes['.br'] = brotli.compress(dados)
+    for sufixo, comprimido in versoes.items():
+        if len(comprimido) < len(dados) * ECONOMIA_MINIMA:
+            with open(caminho + sufixo, 'wb') as arquivo:
+                arquivo.write(comprimido)
+
+
+class ArmazenamentoEstatico(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage + minificação, PNG otimizado e versões .gz/.br."""
+
+    def stored_name(self, name):
+        if not self.hashed_files:
+            # Sem manifesto (collectstatic ainda não rodou: testes, ambiente
+            # local sem DEBUG): não há nomes com hash para usar
+            return name
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            if self.clean_name(name) not in AUSENTES_CONHECIDOS:
+                raise
+            logger.warning('Arquivo estático ausente: %s', name)
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            yield from super().post_process(paths, dry_run, **options)
+            return
+
+        for nome in paths:
+            caminho = self.path(nome)
+            with open(caminho, 'rb') as arquivo:
+                dados = arquivo.read()
+            otimizado = otimizar(nome, dados)
+            if otimizado != dados:
+                with open(caminho, 'wb') as arquivo:
+                    arquivo.write(otimizado)
+
+        # O hash (e a cópia com hash) sai da cópia otimizada em STATIC_ROOT, não do original
+        yield from super().post_process({nome: (self, nome) for nome in paths}, dry_run, **options)
+
+        for nome in paths:
+            versoes = {nome, self.hashed_files.get(self.hash_key(self.clean_name(nome)), nome)}
+            for versao in versoes:
+                if os.path.splitext(versao)[1].lower() in COMPRIMIVEIS:
+                    comprimir(self.path(versao))
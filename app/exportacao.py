@@ -0,0 +1,96 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import Avaliacao, PerguntaUsuario, Usuario
+
+# ===============================================================
+# EXPORTAÇÃO EM CSV / JSONL
+# ===============================================================
+# As linhas saem de um cursor no servidor (iterator) com values_list: nenhum
+# objeto de modelo é montado e a memória não cresce com a tabela. A resposta
+# é um StreamingHttpResponse que manda as linhas em pedaços de
+# LINHAS_POR_PEDACO à medida que são lidas.
+LOTE_EXPORTACAO = 2000
+LINHAS_POR_PEDACO = 500
+
+# Colunas exportadas por modelo; campos sensíveis (senha) ficam de fora
+COLUNAS_EXPORTACAO = {
+    PerguntaUsuario: [
+        'id', 'jogo_id', 'jogo__titulo', 'usuario_id', 'email', 'pergunta', 'status',
+        'resposta_admin', 'data_envio', 'data_resposta', 'admin_respondeu_id', 'publicado_como_faq_id',
+    ],
+    Avaliacao: ['id', 'jogo_id', 'jogo__titulo', 'usuario_id', 'nota', 'texto', 'horario'],
+    Usuario: ['id', 'nome', 'email', 'tipo', 'data'],
+}
+
+# Textos começando assim viram fórmula ao abrir o CSV numa planilha
+INICIO_FORMULA = ('=', '+', '-', '@', '\t', '\r')
+
+
+def linhas(queryset, lote=LOTE_EXPORTACAO):
+    colunas = COLUNAS_EXPORTACAO[queryset.model]
+    # Ordem pela chave primária: usa o índice e não ordena a tabela inteira
+    return colunas, queryset.order_by('pk').values_list(*colunas).iterator(chunk_size=lote)
+
+
+def valor_csv(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    if isinstance(valor, str) and valor.startswith(INICIO_FORMULA):
+        return "'" + valor
+    return valor
+
+
+def gerar_csv(queryset, lote=LOTE_EXPORTACAO):
+    colunas, dados = linhas(queryset, lote)
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    # O cabeçalho sai sozinho, antes de a consulta começar a ler o banco
+    escritor.writerow(colunas)
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    for numero, linha in enumerate(dados, 1):
+        escritor.writerow([valor_csv(valor) for valor in linha])
+        if numero % LINHAS_POR_PEDACO == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def gerar_jsonl(queryset, lote=LOTE_EXPORTACAO):
+    colunas, dados = linhas(queryset, lote)
+    pedaco = []
+    for linha in dados:
+        pedaco.append(json.dumps(dict(zip(colunas, linha)), cls=DjangoJSONEncoder, ensure_ascii=False))
+        if len(pedaco) == LINHAS_POR_PEDACO:
+            yield '\n'.join(pedaco) + '\n'
+            pedaco = []
+    if pedaco:
+        yield '\n'.join(pedaco) + '\n'
+
+
+# formato -> (gerador, content type)
+FORMATOS = {
+    'csv': (gerar_csv, 'text/csv; charset=utf-8'),
+    'jsonl': (gerar_jsonl, 'application/x-ndjson; charset=utf-8'),
+}
+
+
+def resposta_exportacao(queryset, formato):
+    gerador, content_type = FORMATOS[formato]
+    nome = f'{queryset.model._meta.model_name}-{timezone.localdate():%Y%m%d}.{formato}'
+    return StreamingHttpResponse(
+        gerador(queryset),
+        content_type=content_type,
+        headers={'Content-Disposition': f'attachment; filename="{nome}"'},
+    )
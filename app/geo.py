@@ -0,0 +1,158 @@
+import math
+from dataclasses import dataclass
+
+from django.db.models import Q
+
+# ===============================================================
+# ÍNDICE ESPACIAL (QUADTREE EM INTEIRO)
+# ===============================================================
+# Cada ponto recebe o quadkey do tile Web Mercator de zoom ZOOM_INDICE que
+# o contém, com os bits de x e y intercalados (ordem Z). Assim qualquer
+# tile de zoom menor corresponde a uma faixa contínua de quadkeys e uma
+# caixa do mapa vira poucas consultas de intervalo num índice B-tree
+# comum, tanto no PostgreSQL quanto no SQLite.
+ZOOM_INDICE = 16
+LATITUDE_MAXIMA = 85.05112878  # limite da projeção Web Mercator
+
+# Limite de tiles usados para cobrir uma caixa; caixas maiores são
+# cobertas com tiles de zoom menor (menos faixas, um pouco mais largas)
+MAXIMO_TILES_COBERTURA = 32
+
+
+@dataclass(frozen=True)
+class Caixa:
+    sul: float
+    oeste: float
+    norte: float
+    leste: float
+
+    @classmethod
+    def dos_parametros(cls, dados):
+        """Lê sul/oeste/norte/leste de um QueryDict; ValueError se inválidos."""
+        try:
+            sul, oeste, norte, leste = (float(dados[chave]) for chave in ('sul', 'oeste', 'norte', 'leste'))
+        except (KeyError, TypeError):
+            raise ValueError('Informe sul, oeste, norte e leste.')
+        if not all(math.isfinite(valor) for valor in (sul, oeste, norte, leste)):
+            raise ValueError('Coordenadas inválidas.')
+        if sul > norte:
+            raise ValueError('sul deve ser menor que norte.')
+        return cls(sul=max(sul, -90.0), oeste=oeste, norte=min(norte, 90.0), leste=leste)
+
+    def partes(self):
+        """Divide a caixa na linha de data (180°); longitudes voltam para [-180, 180]."""
+        if self.leste - self.oeste >= 360:
+            return [Caixa(self.sul, -180.0, self.norte, 180.0)]
+        oeste = (self.oeste + 180) % 360 - 180
+        leste = (self.leste + 180) % 360 - 180
+        if leste == -180 and self.leste > self.oeste:
+            leste = 180.0
+        if oeste <= leste:
+            return [Caixa(self.sul, oeste, self.norte, leste)]
+        return [Caixa(self.sul, oeste, self.norte, 180.0), Caixa(self.sul, -180.0, self.norte, leste)]
+
+
+def tile_do_ponto(latitude, longitude, zoom):
+    """(x, y) do tile Web Mercator de `zoom` que contém o ponto."""
+    n = 1 << zoom
+    latitude = max(-LATITUDE_MAXIMA, min(LATITUDE_MAXIMA, latitude))
+    radianos = math.radians(latitude)
+    x = int((longitude + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(radianos)) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def limites_do_tile(zoom, x, y):
+    """Caixa (sul, oeste, norte, leste) coberta pelo tile."""
+    n = 1 << zoom
+
+    def latitude(linha):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * linha / n))))
+
+    return Caixa(sul=latitude(y + 1), oeste=x / n * 360.0 - 180.0, norte=latitude(y), leste=(x + 1) / n * 360.0 - 180.0)
+
+
+def intercalar(x, y):
+    """Código de Morton: bits de y nas posições ímpares e de x nas pares."""
+    codigo = 0
+    for bit in range(ZOOM_INDICE):
+        codigo |= ((x >> bit) & 1) << (2 * bit)
+        codigo |= ((y >> bit) & 1) << (2 * bit + 1)
+    return codigo
+
+
+def separar(codigo):
+    """Inverso de intercalar(): (x, y) a partir do código de Morton."""
+    x = y = 0
+    for bit in range(ZOOM_INDICE):
+        x |= ((codigo >> (2 * bit)) & 1) << bit
+        y |= ((codigo >> (2 * bit + 1)) & 1) << bit
+    return x, y
+
+
+def quadkey_do_ponto(latitude, longitude):
+    if latitude is None or longitude is None:
+        return None
+    return intercalar(*tile_do_ponto(latitude, longitude, ZOOM_INDICE))
+
+
+def faixa_do_tile(zoom, x, y):
+    """Intervalo [inicio, fim) de quadkeys dos pontos dentro do tile."""
+    deslocamento = 2 * (ZOOM_INDICE - zoom)
+    inicio = intercalar(x, y) << deslocamento
+    return inicio, inicio + (1 << deslocamento)
+
+
+def intervalo_de_tiles(caixa, zoom):
+    """((x0, x1), (y0, y1)) inclusivos dos tiles de `zoom` que cobrem a caixa."""
+    x0, y0 = tile_do_ponto(caixa.norte, caixa.oeste, zoom)
+    x1, y1 = tile_do_ponto(caixa.sul, caixa.leste, zoom)
+    return (x0, x1), (y0, y1)
+
+
+def zoom_de_cobertura(caixa, maximo=MAXIMO_TILES_COBERTURA):
+    """Maior zoom em que a caixa é coberta por no máximo `maximo` tiles."""
+    zoom = ZOOM_INDICE
+    while zoom > 0:
+        (x0, x1), (y0, y1) = intervalo_de_tiles(caixa, zoom)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) <= maximo:
+            break
+        zoom -= 1
+    return zoom
+
+
+def tiles_da_caixa(caixa, zoom):
+    (x0, x1), (y0, y1) = intervalo_de_tiles(caixa, zoom)
+    return [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+
+def faixas_da_caixa(caixa):
+    """Faixas de quadkey (já unidas quando contíguas) que cobrem a caixa."""
+    faixas = []
+    for parte in caixa.partes():
+        zoom = zoom_de_cobertura(parte)
+        faixas.extend(faixa_do_tile(zoom, x, y) for x, y in tiles_da_caixa(parte, zoom))
+
+    unidas = []
+    for inicio, fim in sorted(faixas):
+        if unidas and inicio <= unidas[-1][1]:
+            unidas[-1] = (unidas[-1][0], max(unidas[-1][1], fim))
+        else:
+            unidas.append((inicio, fim))
+    return unidas
+
+
+def filtro_faixas(faixas, campo='quadkey'):
+    filtro = Q()
+    for inicio, fim in faixas:
+        filtro |= Q(**{f'{campo}__gte': inicio, f'{campo}__lt': fim})
+    return filtro
+
+
+def filtro_caixa(caixa, campo='quadkey'):
+    """Q que usa o índice de quadkey e depois corta exatamente nas bordas da caixa."""
+    filtro = filtro_faixas(faixas_da_caixa(caixa), campo)
+    bordas = Q()
+    for parte in caixa.partes():
+        bordas |= Q(latitude__range=(parte.sul, parte.norte), longitude__range=(parte.oeste, parte.leste))
+    return filtro & bordas
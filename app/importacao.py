@@ -0,0 +1,216 @@
+import csv
+import json
+import math
+import time
+from datetime import date, datetime
+
+from django.core.cache import cache
+from django.db import models, transaction
+
+from .autocompletar import descartar_autocompletar
+from .busca import reindexar_modelo
+from .mapa import invalidar_agrupamentos
+from .models import Acontecimento, Desastre, PontoGeografico, Risco, TopicoDesastre
+from .paginas import CHAVE_ESTATISTICAS_DESASTRES
+
+# ===============================================================
+# IMPORTAÇÃO EM MASSA (DESASTRES, RISCOS, ACONTECIMENTOS, TÓPICOS)
+# ===============================================================
+# O arquivo é lido registro a registro (CSV ou JSON Lines) e gravado em
+# lotes: cada lote é validado, tem o desastre resolvido por dicionários em
+# memória (sem uma consulta por linha) e vira um INSERT ... ON CONFLICT
+# (codigo_externo) DO UPDATE. Reimportar o mesmo arquivo atualiza as linhas
+# em vez de duplicá-las; só as colunas presentes no arquivo são regravadas.
+LOTE_IMPORTACAO = 5000
+MAXIMO_ERROS_GUARDADOS = 50
+FORMATOS_DATA = ('%d/%m/%Y',)  # além de ISO (AAAA-MM-DD)
+
+# modelo -> {coluna do arquivo: campo do modelo}; toda linha tem também `codigo`
+COLUNAS_IMPORTACAO = {
+    Desastre: {'titulo': 'titulo', 'descricao': 'descricao', 'icone': 'icone'},
+    Risco: {
+        'nome': 'nome', 'desastre': 'desastre', 'nivel': 'nivel', 'descricao': 'descricao',
+        'localizacao': 'localizacao', 'latitude': 'latitude', 'longitude': 'longitude',
+    },
+    Acontecimento: {
+        'titulo': 'titulo', 'descricao': 'descricao', 'data': 'dataAcontecimento', 'risco': 'risco',
+        'latitude': 'latitude', 'longitude': 'longitude',
+    },
+    TopicoDesastre: {'titulo': 'titulo', 'texto': 'texto', 'desastre': 'desastre'},
+}
+LIMITES_COORDENADA = {'latitude': 90.0, 'longitude': 180.0}
+
+
+class LinhaInvalida(ValueError):
+    pass
+
+
+def ler_registros(arquivo, formato):
+    """(número da linha, dict) de um CSV com cabeçalho ou de JSON Lines."""
+    if formato == 'csv':
+        leitor = csv.DictReader(arquivo)
+        for registro in leitor:
+            yield leitor.line_num, registro
+        return
+    for numero, linha in enumerate(arquivo, 1):
+        if not linha.strip():
+            continue
+        try:
+            registro = json.loads(linha)
+        except json.JSONDecodeError as erro:
+            yield numero, LinhaInvalida(f'JSON inválido: {erro.msg}')
+            continue
+        yield numero, registro if isinstance(registro, dict) else LinhaInvalida('a linha não é um objeto JSON')
+
+
+def converter(campo, valor):
+    """Valor do arquivo -> valor do campo; LinhaInvalida se não servir."""
+    if isinstance(valor, str):
+        valor = valor.strip()
+    if valor is None or valor == '':
+        if not campo.blank:
+            raise LinhaInvalida(f'{campo.name}: obrigatório')
+        return None if campo.null else ''
+
+    if isinstance(campo, models.FloatField):
+        try:
+            numero = float(valor)
+        except (TypeError, ValueError):
+            raise LinhaInvalida(f'{campo.name}: número inválido ({valor!r})')
+        limite = LIMITES_COORDENADA.get(campo.name, math.inf)
+        if not math.isfinite(numero) or abs(numero) > limite:
+            raise LinhaInvalida(f'{campo.name}: fora do intervalo ({valor!r})')
+        return numero
+    if isinstance(campo, models.DateField):
+        return converter_data(campo, str(valor))
+
+    texto = str(valor)
+    if campo.max_length is not None and len(texto) > campo.max_length:
+        raise LinhaInvalida(f'{campo.name}: mais de {campo.max_length} caracteres')
+    return texto
+
+
+def converter_data(campo, texto):
+    try:
+        return date.fromisoformat(texto)
+    except ValueError:
+        pass
+    for formato in FORMATOS_DATA:
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            pass
+    raise LinhaInvalida(f'{campo.name}: data inválida ({texto!r})')
+
+
+class Importador:
+    """Valida e grava em lotes os registros de um modelo de COLUNAS_IMPORTACAO."""
+
+    def __init__(self, modelo, lote=LOTE_IMPORTACAO):
+        self.modelo = modelo
+        self.lote = lote
+        self.campos = {
+            coluna: modelo._meta.get_field(nome) for coluna, nome in COLUNAS_IMPORTACAO[modelo].items()
+        }
+        self.desastres = self.mapa_desastres() if 'desastre' in self.campos else None
+        self.campos_atualizados = None
+        self.gravados = self.invalidos = 0
+        self.erros = []
+        self.segundos_gravando = 0.0
+
+    @staticmethod
+    def mapa_desastres():
+        """Desastres por codigo_externo e por título; o código tem precedência."""
+        por_codigo, por_titulo = {}, {}
+        for pk, codigo, titulo in Desastre.objects.values_list('pk', 'codigo_externo', 'titulo').iterator(
+            chunk_size=LOTE_IMPORTACAO
+        ):
+            if codigo:
+                por_codigo[codigo] = pk
+            por_titulo.setdefault(titulo, pk)
+        return por_codigo, por_titulo
+
+    def desastre_id(self, referencia):
+        por_codigo, por_titulo = self.desastres
+        pk = por_codigo.get(referencia, por_titulo.get(referencia))
+        if pk is None:
+            raise LinhaInvalida(f'desastre: {referencia!r} não encontrado')
+        return pk
+
+    def objeto(self, registro):
+        codigo = converter(self.modelo._meta.get_field('codigo_externo'), registro.get('codigo'))
+        if codigo is None:
+            raise LinhaInvalida('codigo: obrigatório')
+        valores = {'codigo_externo': codigo}
+        for coluna, campo in self.campos.items():
+            valor = registro.get(coluna)
+            if isinstance(campo, models.ForeignKey):
+                if valor is None or str(valor).strip() == '':
+                    raise LinhaInvalida(f'{coluna}: obrigatório')
+                valores[campo.attname] = self.desastre_id(str(valor).strip())
+            else:
+                valores[campo.name] = converter(campo, valor)
+        objeto = self.modelo(**valores)
+        if isinstance(objeto, PontoGeografico):
+            # bulk_create não passa por save()
+            objeto.atualizar_quadkey()
+        return objeto
+
+    def importar(self, registros, ao_gravar=None):
+        """Consome (número, registro) e grava em lotes; `ao_gravar(importador)` a cada lote."""
+        lote = {}
+        for numero, registro in registros:
+            if self.campos_atualizados is None and isinstance(registro, dict):
+                self.definir_campos_atualizados(registro)
+            try:
+                if isinstance(registro, LinhaInvalida):
+                    raise registro
+                objeto = self.objeto(registro)
+            except LinhaInvalida as erro:
+                self.invalidos += 1
+                if len(self.erros) < MAXIMO_ERROS_GUARDADOS:
+                    self.erros.append((numero, str(erro)))
+                continue
+            # Código repetido no mesmo lote: vale a última linha (o ON CONFLICT não
+            # aceita atualizar a mesma linha duas vezes num comando)
+            lote[objeto.codigo_externo] = objeto
+            if len(lote) >= self.lote:
+                self.gravar(list(lote.values()))
+                lote = {}
+                if ao_gravar is not None:
+                    ao_gravar(self)
+        if lote:
+            self.gravar(list(lote.values()))
+            if ao_gravar is not None:
+                ao_gravar(self)
+        self.finalizar()
+
+    def definir_campos_atualizados(self, registro):
+        """Só as colunas que vieram no arquivo são regravadas nos registros existentes."""
+        self.campos_atualizados = [
+            campo.name for coluna, campo in self.campos.items() if coluna in registro
+        ]
+        if issubclass(self.modelo, PontoGeografico) and {'latitude', 'longitude'} & set(registro):
+            self.campos_atualizados.append('quadkey')
+
+    def gravar(self, objetos):
+        inicio = time.perf_counter()
+        with transaction.atomic():
+            self.modelo.objects.bulk_create(
+                objetos, batch_size=self.lote, update_conflicts=True,
+                unique_fields=['codigo_externo'], update_fields=self.campos_atualizados or ['codigo_externo'],
+            )
+            if self.modelo is TopicoDesastre:
+                reindexar_modelo(TopicoDesastre, TopicoDesastre.objects.filter(
+                    codigo_externo__in=[objeto.codigo_externo for objeto in objetos]
+                ))
+        self.segundos_gravando += time.perf_counter() - inicio
+        self.gravados += len(objetos)
+
+    def finalizar(self):
+        # bulk_create não dispara sinais: mapa, autocompletar e estatísticas
+        if issubclass(self.modelo, PontoGeografico):
+            invalidar_agrupamentos()
+        if self.modelo in (Desastre, Risco):
+            descartar_autocompletar()
+        cache.delete(CHAVE_ESTATISTICAS_DESASTRES)
@@ -0,0 +1,65 @@
+# app/management/commands/aquecer_tiles.py
+import os
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import F
+from app.geo import separar
+from app.mapa import CAMPO_NIVEL, ZOOM_MAXIMO_AGRUPAMENTO, celulas_dos_tiles, deslocamento
+from app.tiles import gerar_tile, tiles_em_disco
+
+LOTE_TILES = 500
+
+
+class Command(BaseCommand):
+    help = 'Gera em disco os tiles JSON do mapa nos zooms mais acessados (só tiles com pontos)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--zoom-minimo', type=int, default=0)
+        parser.add_argument('--zoom-maximo', type=int, default=8,
+                            help='Último zoom gerado (cada zoom tem até 4x mais tiles que o anterior)')
+        parser.add_argument('--regerar', action='store_true',
+                            help='Regrava também os tiles que já estão em disco')
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        gerados = existentes = bytes_gravados = 0
+
+        for zoom in range(options['zoom_minimo'], options['zoom_maximo'] + 1):
+            codigos = sorted(self.tiles_ocupados(zoom))
+            gerados_no_zoom = 0
+            for i in range(0, len(codigos), LOTE_TILES):
+                lote = codigos[i:i + LOTE_TILES]
+                # Agrupamentos do lote inteiro em uma consulta por modelo;
+                # gerar_tile() encontra tudo no cache em seguida
+                if zoom <= ZOOM_MAXIMO_AGRUPAMENTO:
+                    celulas_dos_tiles(zoom, lote)
+                for codigo in lote:
+                    x, y = separar(codigo)
+                    caminho = tiles_em_disco.caminho(zoom, x, y)
+                    if not options['regerar'] and os.path.exists(caminho):
+                        existentes += 1
+                        continue
+                    conteudo = gerar_tile(zoom, x, y)
+                    tiles_em_disco.gravar(caminho, conteudo)
+                    bytes_gravados += len(conteudo)
+                    gerados_no_zoom += 1
+            gerados += gerados_no_zoom
+            self.stdout.write(f'zoom {zoom:>2}: {len(codigos)} tile(s) com pontos, {gerados_no_zoom} gerado(s)')
+
+        liberados = tiles_em_disco.despejar()
+        self.stdout.write(self.style.SUCCESS(
+            f'{gerados} tile(s) gerado(s) ({bytes_gravados / 1024:.0f} KiB), {existentes} já em disco, '
+            f'{liberados / 1024:.0f} KiB liberados pelo despejo, em {time.perf_counter() - inicio:.1f}s.'
+        ))
+
+    def tiles_ocupados(self, zoom):
+        """Códigos dos tiles do zoom que têm ao menos um ponto, direto do índice de quadkey."""
+        codigos = set()
+        for modelo in CAMPO_NIVEL:
+            codigos.update(
+                modelo.objects.filter(quadkey__isnull=False).annotate(
+                    tile=F('quadkey').bitrightshift(deslocamento(zoom))
+                ).values_list('tile', flat=True).order_by().distinct()
+            )
+        return codigos
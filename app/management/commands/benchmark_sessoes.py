@@ -0,0 +1,64 @@
+# app/management/commands/benchmark_sessoes.py
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from app.models import Usuario
+
+MIDDLEWARE_RENOVACAO = 'app.middleware.RenovacaoSessaoMiddleware'
+
+CENARIOS = {
+    'antes (db + SESSION_SAVE_EVERY_REQUEST)': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+        'SESSION_SAVE_EVERY_REQUEST': True,
+        'MIDDLEWARE': [m for m in settings.MIDDLEWARE if m != MIDDLEWARE_RENOVACAO],
+    },
+    'depois (cached_db + janela de renovação)': {},
+}
+
+
+class Command(BaseCommand):
+    help = 'Compara as escritas em django_session por N requisições antes e depois da janela de renovação'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requisicoes', type=int, default=1000)
+        parser.add_argument('--url', default='/')
+
+    def handle(self, *args, **options):
+        requisicoes = options['requisicoes']
+        self.stdout.write(f'{requisicoes} requisições em {options["url"]}')
+
+        for nome, configuracao in CENARIOS.items():
+            with override_settings(ALLOWED_HOSTS=['*'], **configuracao):
+                for perfil in ('anônimo', 'logado'):
+                    escritas, duracao = self.medir(perfil, requisicoes, options['url'])
+                    self.stdout.write(
+                        f'{nome:<45} {perfil:<8} {escritas:>6} escrita(s)  {duracao * 1000 / requisicoes:.2f}ms/req'
+                    )
+
+    def medir(self, perfil, requisicoes, url):
+        # Tudo roda numa transação desfeita no final: nada fica no banco
+        with transaction.atomic():
+            cliente = Client()
+            if perfil == 'logado':
+                usuario = Usuario.objects.create(
+                    nome='Benchmark', email='benchmark-sessoes@acriseg.com', senha='benchmark123'
+                )
+                cliente.post('/login/', {'email': usuario.email, 'senha': 'benchmark123'})
+
+            inicio = time.perf_counter()
+            with CaptureQueriesContext(connection) as consultas:
+                for _ in range(requisicoes):
+                    cliente.get(url)
+            duracao = time.perf_counter() - inicio
+
+            transaction.set_rollback(True)
+
+        escritas = sum(
+            1 for consulta in consultas.captured_queries
+            if 'django_session' in consulta['sql'] and consulta['sql'].lstrip().startswith(('UPDATE', 'INSERT'))
+        )
+        return escritas, duracao
@@ -0,0 +1,85 @@
+# app/management/commands/benchmark_templates.py
+import copy
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.template import engines
+from django.test import Client
+from django.test.utils import override_settings
+from app.paginas import aquecer_templates, templates_das_paginas
+
+# Páginas renderizadas com os dados do banco: url -> template
+PAGINAS = {
+    '/': 'index.html',
+    '/artigos/': 'artigos.html',
+    '/desastres/': 'desastres.html',
+    '/jogo/': 'jogo.html',
+    '/login/': 'login.html',
+    '/usuario/': 'usuario.html',
+}
+
+
+def templates_sem_cache():
+    """TEMPLATES como antes: uma pasta inexistente em DIRS e nenhum cache."""
+    configuracao = copy.deepcopy(settings.TEMPLATES)
+    configuracao[0]['DIRS'] = [settings.BASE_DIR / 'templates']
+    configuracao[0]['OPTIONS']['loaders'] = [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]
+    return configuracao
+
+
+class Command(BaseCommand):
+    help = 'Compara o custo de cada template e de cada página sem e com o loader em cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticoes', type=int, default=100)
+
+    def handle(self, *args, **options):
+        repeticoes = options['repeticoes']
+        self.stdout.write(f'{repeticoes} repetições; tempos em ms')
+
+        # Carregar o template: é o que o cache tira de cada requisição
+        self.stdout.write(f'\n{"template":<20} {"sem cache":>10} {"com cache":>10}')
+        with override_settings(TEMPLATES=templates_sem_cache()):
+            sem_cache = self.medir_templates(repeticoes)
+        aquecer_templates()
+        com_cache = self.medir_templates(repeticoes)
+        for nome, antes in sem_cache.items():
+            self.stdout.write(f'{nome:<20} {antes:>10.3f} {com_cache[nome]:>10.3f}  ({antes / com_cache[nome]:.0f}x)')
+
+        # Requisição inteira, com a renderização de verdade (base.html + página)
+        self.stdout.write(f'\n{"página":<28} {"sem cache":>10} {"com cache":>10}')
+        with override_settings(TEMPLATES=templates_sem_cache()):
+            sem_cache = self.medir_paginas(repeticoes)
+        com_cache = self.medir_paginas(repeticoes)
+        for url, antes in sem_cache.items():
+            nome = f'{url} ({PAGINAS[url]})'
+            self.stdout.write(f'{nome:<28} {antes:>10.3f} {com_cache[url]:>10.3f}  ({antes / com_cache[url]:.1f}x)')
+
+    def medir_templates(self, repeticoes):
+        engine = engines['django']
+        tempos = {}
+        for nome in templates_das_paginas():
+            inicio = time.perf_counter()
+            for _ in range(repeticoes):
+                engine.get_template(nome)
+            tempos[nome] = (time.perf_counter() - inicio) * 1000 / repeticoes
+        return tempos
+
+    def medir_paginas(self, repeticoes):
+        tempos = {}
+        # Numa transação desfeita no final, como em benchmark_sessoes
+        with override_settings(ALLOWED_HOSTS=['*']), transaction.atomic():
+            cliente = Client()
+            for url in PAGINAS:
+                cliente.get(url)  # sessão e caches de dados prontos antes de medir
+                inicio = time.perf_counter()
+                for _ in range(repeticoes):
+                    cliente.get(url)
+                tempos[url] = (time.perf_counter() - inicio) * 1000 / repeticoes
+            transaction.set_rollback(True)
+        return tempos
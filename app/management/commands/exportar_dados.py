@@ -0,0 +1,34 @@
+# app/management/commands/exportar_dados.py
+import time
+
+from django.core.management.base import BaseCommand
+from app.exportacao import COLUNAS_EXPORTACAO, FORMATOS, LOTE_EXPORTACAO
+
+MODELOS = {modelo._meta.model_name: modelo for modelo in COLUNAS_EXPORTACAO}
+
+
+class Command(BaseCommand):
+    help = 'Exporta perguntas dos usuários, avaliações ou usuários em CSV ou JSONL, sem carregar a tabela na memória'
+
+    def add_arguments(self, parser):
+        parser.add_argument('modelo', choices=sorted(MODELOS))
+        parser.add_argument('--formato', choices=sorted(FORMATOS), default='csv')
+        parser.add_argument('--saida', help='Arquivo de destino (padrão: saída padrão)')
+        parser.add_argument('--lote', type=int, default=LOTE_EXPORTACAO,
+                            help='Linhas lidas do cursor do banco por vez')
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        gerador, _ = FORMATOS[options['formato']]
+        pedacos = gerador(MODELOS[options['modelo']].objects.all(), lote=options['lote'])
+
+        if options['saida']:
+            with open(options['saida'], 'w', encoding='utf-8', newline='') as arquivo:
+                arquivo.writelines(pedacos)
+            self.stdout.write(self.style.SUCCESS(
+                f'{options["modelo"]} exportado em {options["saida"]} em {time.perf_counter() - inicio:.1f}s.'
+            ))
+        else:
+            for pedaco in pedacos:
+                self.stdout.write(pedaco, ending='')
+            self.stderr.write(f'{options["modelo"]} exportado em {time.perf_counter() - inicio:.1f}s.')
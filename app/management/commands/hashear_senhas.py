@@ -0,0 +1,52 @@
+# app/management/commands/hashear_senhas.py
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import get_hashers, make_password, UNUSABLE_PASSWORD_PREFIX
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from app.models import Usuario
+
+
+def filtro_senhas_em_texto_claro():
+    """Linhas cuja senha não começa com o prefixo de nenhum hasher configurado."""
+    filtro = Q(senha='') | Q(senha__startswith=UNUSABLE_PASSWORD_PREFIX)
+    for hasher in get_hashers():
+        filtro |= Q(senha__startswith=f'{hasher.algorithm}$')
+    return ~filtro
+
+
+class Command(BaseCommand):
+    help = 'Converte em lote (offline) as senhas ainda em texto claro para hash'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=500,
+                            help='Quantidade de usuários por UPDATE em lote')
+        parser.add_argument('--threads', type=int, default=4,
+                            help='Threads de hashing (scrypt/PBKDF2 liberam o GIL)')
+
+    def handle(self, *args, **options):
+        lote = options['lote']
+        inicio = time.monotonic()
+        total = 0
+
+        pendentes = Usuario.objects.filter(filtro_senhas_em_texto_claro()).only('id', 'senha').order_by('id')
+        with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+            # Paginação por id: cada lote gravado sai do filtro, então não
+            # depende de um cursor aberto durante as escritas
+            ultimo_id = 0
+            while True:
+                usuarios = list(pendentes.filter(id__gt=ultimo_id)[:lote])
+                if not usuarios:
+                    break
+                hashes = executor.map(make_password, [u.senha for u in usuarios])
+                for usuario, senha in zip(usuarios, hashes):
+                    usuario.senha = senha
+                Usuario.objects.bulk_update(usuarios, ['senha'])
+                ultimo_id = usuarios[-1].id
+                total += len(usuarios)
+
+        duracao = time.monotonic() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} senha(s) convertida(s) em {duracao:.1f}s.'
+        ))
@@ -0,0 +1,59 @@
+# app/management/commands/import_eventos.py
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from app.importacao import COLUNAS_IMPORTACAO, LOTE_IMPORTACAO, Importador, ler_registros
+
+MODELOS = {modelo._meta.model_name: modelo for modelo in COLUNAS_IMPORTACAO}
+
+
+class Command(BaseCommand):
+    help = ('Importa (ou atualiza pelo campo codigo) desastres, riscos, acontecimentos ou tópicos de '
+            'desastre a partir de CSV ou JSON Lines, em lotes')
+
+    def add_arguments(self, parser):
+        parser.add_argument('modelo', choices=sorted(MODELOS))
+        parser.add_argument('arquivo', help="Caminho do arquivo, ou '-' para a entrada padrão")
+        parser.add_argument('--formato', choices=['csv', 'jsonl'],
+                            help='Padrão: pela extensão do arquivo (.csv, .jsonl/.json)')
+        parser.add_argument('--lote', type=int, default=LOTE_IMPORTACAO,
+                            help='Registros validados e gravados por vez')
+
+    def handle(self, *args, **options):
+        formato = options['formato'] or self.formato_pela_extensao(options['arquivo'])
+        importador = Importador(MODELOS[options['modelo']], lote=max(1, options['lote']))
+        self.verbosity = options['verbosity']
+        self.inicio = time.perf_counter()
+
+        if options['arquivo'] == '-':
+            importador.importar(ler_registros(sys.stdin, formato), self.informar_lote)
+        else:
+            with open(options['arquivo'], encoding='utf-8-sig', newline='') as arquivo:
+                importador.importar(ler_registros(arquivo, formato), self.informar_lote)
+
+        for numero, erro in importador.erros:
+            self.stderr.write(f'linha {numero}: {erro}')
+        if importador.invalidos > len(importador.erros):
+            self.stderr.write(f'... e mais {importador.invalidos - len(importador.erros)} linha(s) inválida(s)')
+
+        segundos = time.perf_counter() - self.inicio
+        self.stdout.write(self.style.SUCCESS(
+            f'{importador.gravados} {options["modelo"]}(s) gravado(s), {importador.invalidos} inválido(s) '
+            f'em {segundos:.1f}s ({importador.gravados / max(segundos, 1e-6):.0f} registros/s; '
+            f'{importador.segundos_gravando:.1f}s no banco).'
+        ))
+
+    def formato_pela_extensao(self, caminho):
+        extensao = os.path.splitext(caminho)[1].lower()
+        if extensao == '.csv':
+            return 'csv'
+        if extensao in ('.jsonl', '.json', '.ndjson'):
+            return 'jsonl'
+        raise CommandError('Informe --formato (csv ou jsonl).')
+
+    def informar_lote(self, importador):
+        if self.verbosity > 1:
+            segundos = time.perf_counter() - self.inicio
+            self.stdout.write(f'{importador.gravados} gravado(s), {importador.gravados / max(segundos, 1e-6):.0f}/s')
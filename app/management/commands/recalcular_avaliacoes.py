@@ -0,0 +1,43 @@
+# app/management/commands/recalcular_avaliacoes.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from app.models import Jogo, Avaliacao
+
+NOTAS = range(1, 6)
+
+
+class Command(BaseCommand):
+    help = 'Recalcula em lote as estatísticas de avaliação (total, soma e histograma) de cada jogo'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=1000,
+                            help='Quantidade de jogos por UPDATE em lote')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            # Trava os jogos antes de agregar: avaliações novas esperam o fim do
+            # recálculo e então incrementam os contadores já corrigidos
+            jogos = list(Jogo.objects.select_for_update().only('id', *Jogo.CAMPOS_ESTATISTICA_AVALIACOES))
+
+            # Uma única agregação agrupada por jogo
+            agregado = {
+                linha['jogo']: linha
+                for linha in Avaliacao.objects.values('jogo').order_by().annotate(
+                    total=Count('id'),
+                    soma=Sum('nota'),
+                    **{f'nota_{nota}': Count('id', filter=Q(nota=nota)) for nota in NOTAS}
+                )
+            }
+
+            for jogo in jogos:
+                linha = agregado.get(jogo.id, {})
+                jogo.avaliacoes_total = linha.get('total', 0)
+                jogo.avaliacoes_soma = linha.get('soma') or 0
+                for nota in NOTAS:
+                    setattr(jogo, f'avaliacoes_nota_{nota}', linha.get(f'nota_{nota}', 0))
+            Jogo.objects.bulk_update(jogos, Jogo.CAMPOS_ESTATISTICA_AVALIACOES, batch_size=options['lote'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Estatísticas recalculadas para {len(jogos)} jogo(s) a partir de {sum(l["total"] for l in agregado.values())} avaliação(ões).'
+        ))
@@ -0,0 +1,28 @@
+# app/management/commands/reindexar_busca.py
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from app.busca import MODELOS_BUSCA, descartar_indice_memoria, reindexar_modelo
+from app.models import DocumentoBusca
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói os documentos da busca do site (artigos, tópicos e FAQs visíveis)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=2000,
+                            help='Quantidade de documentos por INSERT em lote')
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        with transaction.atomic():
+            # Começa do zero: some também o que foi apagado sem passar por sinais
+            DocumentoBusca.objects.all().delete()
+            for modelo in MODELOS_BUSCA:
+                reindexar_modelo(modelo, lote=options['lote'])
+        descartar_indice_memoria()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{DocumentoBusca.objects.count()} documento(s) indexado(s) em {time.perf_counter() - inicio:.1f}s.'
+        ))
@@ -0,0 +1,91 @@
+# app/management/commands/run_workers.py
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+
+from django.core.management.base import BaseCommand
+
+
+def processo_trabalhador(threads, intervalo, ate_esvaziar):
+    """Ponto de entrada dos processos extras (contexto spawn: o Django é configurado de novo)."""
+    import django
+    django.setup()
+    Command().iniciar_threads(threads, intervalo, ate_esvaziar)
+
+
+class Command(BaseCommand):
+    help = 'Executa as tarefas da fila no banco (app/tarefas.py) com um pool de threads e processos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4,
+                            help='Trabalhadores (threads) por processo')
+        parser.add_argument('--processos', type=int, default=1,
+                            help='Processos; cada um abre suas próprias conexões com o banco')
+        parser.add_argument('--intervalo', type=float, default=1.0,
+                            help='Segundos de espera quando a fila está vazia')
+        parser.add_argument('--ate-esvaziar', action='store_true',
+                            help='Sai quando não houver mais tarefas disponíveis (útil em cron e testes)')
+
+    def handle(self, *args, **options):
+        threads = max(1, options['threads'])
+        intervalo = options['intervalo']
+        ate_esvaziar = options['ate_esvaziar']
+
+        contexto = multiprocessing.get_context('spawn')
+        extras = [
+            contexto.Process(target=processo_trabalhador, args=(threads, intervalo, ate_esvaziar))
+            for _ in range(1, max(1, options['processos']))
+        ]
+        for processo in extras:
+            processo.start()
+        try:
+            executadas = self.iniciar_threads(threads, intervalo, ate_esvaziar)
+        finally:
+            for processo in extras:
+                processo.join()
+        self.stdout.write(self.style.SUCCESS(f'{executadas} tarefa(s) executada(s) neste processo.'))
+
+    def iniciar_threads(self, threads, intervalo, ate_esvaziar):
+        parar = threading.Event()
+        anteriores = {}
+        if threading.current_thread() is threading.main_thread():
+            # Ctrl+C/SIGTERM: termina a tarefa em andamento e sai
+            for sinal in (signal.SIGINT, signal.SIGTERM):
+                anteriores[sinal] = signal.signal(sinal, lambda *_: parar.set())
+        try:
+            return self.rodar_pool(parar, threads, intervalo, ate_esvaziar)
+        finally:
+            for sinal, tratador in anteriores.items():
+                signal.signal(sinal, tratador)
+
+    def rodar_pool(self, parar, threads, intervalo, ate_esvaziar):
+        # Importado aqui: os processos extras carregam este módulo antes do django.setup()
+        from app.tarefas import trabalhar
+
+        prefixo = f'{socket.gethostname()}:{os.getpid()}'
+        executadas = [0] * threads
+        trava_saida = threading.Lock()
+
+        def ao_terminar(tarefa, concluiu):
+            with trava_saida:
+                estado = 'concluída' if concluiu else 'falhou'
+                self.stdout.write(f'[{prefixo}] {tarefa.tipo} #{tarefa.pk}: {estado}')
+
+        def rodar(numero):
+            executadas[numero] = trabalhar(
+                f'{prefixo}:{numero}', parar, intervalo, ate_esvaziar, ao_terminar
+            )
+
+        if threads == 1:
+            rodar(0)
+        else:
+            pool = [threading.Thread(target=rodar, args=(numero,), daemon=True) for numero in range(threads)]
+            for thread in pool:
+                thread.start()
+            # join com timeout para o sinal ser atendido na thread principal
+            while any(thread.is_alive() for thread in pool):
+                for thread in pool:
+                    thread.join(0.5)
+        return sum(executadas)
@@ -1,35 +1,341 @@
 # app/management/commands/seed_data.py
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
-from app.models import Usuario, Desastre, Artigo, Jogo
+from django.db import transaction
+from app.models import (
+    Usuario, Desastre, Acontecimento, Risco, Artigo, Jogo, CaracteristicaJogo,
+    RequisitoJogo, AtualizacaoJogo, FAQJogo, ImagemJogo, Pagina, Avaliacao,
+    TopicoArtigo, TopicoDesastre, Pergunta, PerguntaUsuario
+)
+from app.mapa import invalidar_agrupamentos
+from app.paginas import invalidar_pagina_jogo
 from django.contrib.auth.hashers import make_password
 
+# Registros gerados pelo --scale usam este prefixo; é por ele que uma nova
+# execução descobre o que já existe e continua de onde parou.
+PREFIXO = '[seed]'
+DOMINIO_EMAIL = 'seed.acriseg.com'
+
+# Quantidades por unidade de --scale
+VOLUMES = {
+    'usuarios': 200,
+    'desastres': 10,
+    'acontecimentos': 200,
+    'artigos': 20,
+    'jogos': 1,
+    'paginas': 10,
+}
+# Quantidades por registro pai
+POR_DESASTRE = {'riscos': 5, 'topicos': 3}
+POR_ARTIGO = {'topicos': 5}
+POR_JOGO = {
+    'caracteristicas': 10,
+    'requisitos': 8,
+    'atualizacoes': 20,
+    'faqs': 60,
+    'imagens': 12,
+    'avaliacoes': 5000,
+    'perguntas_usuario': 500,
+    'perguntas': 100,
+}
+
+PALAVRAS = (
+    'alerta chuva enchente evacuação abrigo risco encosta rio barragem seca incêndio '
+    'vento tremor defesa civil rota mapa kit água comunidade escola prevenção simulado '
+    'família vizinho resgate sirene nível cheia deslizamento temporal granizo onda calor'
+).split()
+ICONES = ['🌊', '🔥', '🌍', '🌪️', '☀️']
+NIVEIS = ['baixo', 'moderado', 'alto', 'muito alto']
+TIPOS_USUARIO = ['usuario'] * 90 + ['especialista'] * 6 + ['editor'] * 3 + ['admin']
+STATUS_PERGUNTA = ['pendente'] * 5 + ['respondida'] * 3 + ['arquivada']
+CATEGORIAS_FAQ = ['geral', 'tecnico', 'jogabilidade', 'pedagogico', 'outros']
+DATA_BASE = date(2015, 1, 1)
+
+
+def frase(rng, minimo=4, maximo=12):
+    return ' '.join(rng.choice(PALAVRAS) for _ in range(rng.randint(minimo, maximo))).capitalize()
+
+
+def data_aleatoria(rng, dias=3650):
+    return DATA_BASE + timedelta(days=rng.randrange(dias))
+
+
+def com_coordenadas(ponto, rng):
+    # bulk_create não chama save(): o quadkey do índice espacial é calculado aqui
+    ponto.latitude = round(rng.uniform(-60, 70), 6)
+    ponto.longitude = round(rng.uniform(-180, 180), 6)
+    ponto.atualizar_quadkey()
+    return ponto
+
+
+class Carga:
+    """Acumula objetos por modelo e grava com bulk_create em lotes."""
+
+    def __init__(self, lote):
+        self.lote = lote
+        self.pendentes = {}
+        self.gravados = {}
+        self.segundos = {}
+
+    def adicionar(self, obj):
+        modelo = type(obj)
+        fila = self.pendentes.setdefault(modelo, [])
+        fila.append(obj)
+        if len(fila) >= self.lote:
+            self.gravar(modelo)
+
+    def gravar(self, modelo=None):
+        modelos = [modelo] if modelo else list(self.pendentes)
+        for modelo in modelos:
+            fila = self.pendentes.pop(modelo, [])
+            if not fila:
+                continue
+            inicio = time.perf_counter()
+            modelo.objects.bulk_create(fila, batch_size=self.lote, ignore_conflicts=True)
+            self.segundos[modelo] = self.segundos.get(modelo, 0) + time.perf_counter() - inicio
+            self.gravados[modelo] = self.gravados.get(modelo, 0) + len(fila)
+
+
 class Command(BaseCommand):
-    help = 'Popula o banco de dados com dados de exemplo'
-    
-    def handle(self, *args, **kwargs):
-        # Criar usuários de exemplo
+    help = 'Popula o banco de dados com dados de exemplo (use --scale N para volumes de teste de carga)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, default=0,
+                            help='Fator de escala; 0 cria apenas os dados de exemplo')
+        parser.add_argument('--seed', type=int, default=42,
+                            help='Semente para gerar sempre os mesmos dados')
+        parser.add_argument('--lote', type=int, default=5000,
+                            help='Tamanho dos lotes de bulk_create')
+
+    def handle(self, *args, **options):
+        self.lote = options['lote']
+        self.criar_exemplos()
+
+        if options['scale'] > 0:
+            self.seed = options['seed']
+            self.carga = Carga(self.lote)
+            inicio = time.perf_counter()
+            self.gerar(options['scale'])
+            self.relatorio(time.perf_counter() - inicio)
+
+    # ===============================================================
+    # DADOS DE EXEMPLO
+    # ===============================================================
+    def criar_exemplos(self):
+        # Criar usuários de exemplo (o email é único: reexecutar não duplica)
         usuarios = [
-            Usuario(nome="Admin Master", email="admin@acriseg.com", 
+            Usuario(nome="Admin Master", email="admin@acriseg.com",
                    senha=make_password("admin123"), tipo="admin"),
-            Usuario(nome="João Editor", email="editor@acriseg.com", 
+            Usuario(nome="João Editor", email="editor@acriseg.com",
                    senha=make_password("editor123"), tipo="editor"),
-            Usuario(nome="Maria Usuária", email="maria@exemplo.com", 
+            Usuario(nome="Maria Usuária", email="maria@exemplo.com",
                    senha=make_password("maria123"), tipo="usuario"),
         ]
-        
-        for usuario in usuarios:
-            usuario.save()
-        
-        self.stdout.write(self.style.SUCCESS(f'{len(usuarios)} usuários criados!'))
-        
-        # Criar desastres de exemplo
+
+        criados = Usuario.objects.bulk_create(usuarios, ignore_conflicts=True)
+
+        self.stdout.write(self.style.SUCCESS(f'{len(criados)} usuários de exemplo verificados!'))
+
+        # Criar desastres de exemplo (apenas os que ainda não existem)
         desastres = [
             Desastre(titulo="Enchentes", descricao="Desastres relacionados a inundações", icone="🌊"),
             Desastre(titulo="Queimadas", descricao="Incêndios florestais", icone="🔥"),
             Desastre(titulo="Terremotos", descricao="Tremores de terra", icone="🌍"),
         ]
-        
-        for desastre in desastres:
-            desastre.save()
-        
-        self.stdout.write(self.style.SUCCESS(f'{len(desastres)} desastres criados!'))
\ No newline at end of file
+        existentes = set(self.ids_por_titulo(Desastre, [d.titulo for d in desastres]))
+        novos = [d for d in desastres if d.titulo not in existentes]
+        Desastre.objects.bulk_create(novos)
+
+        self.stdout.write(self.style.SUCCESS(f'{len(novos)} desastres criados!'))
+
+    # ===============================================================
+    # GERAÇÃO EM ESCALA
+    # ===============================================================
+    def rng(self, *chave):
+        # Um gerador por registro: o conteúdo de cada linha não depende de
+        # quantas outras já existiam no banco
+        return random.Random(f'{self.seed}:' + ':'.join(map(str, chave)))
+
+    def faixa_nova(self, modelo, alvo):
+        """Índices ainda não gerados (as linhas do seed são numeradas em ordem)."""
+        existentes = modelo.objects.filter(titulo__startswith=PREFIXO).count()
+        return range(existentes, alvo)
+
+    def ids_por_titulo(self, modelo, titulos):
+        # IN em lotes de --lote: uma lista com todos os títulos passaria do
+        # limite de parâmetros do banco (e o planejador sofre com ela)
+        ids = {}
+        for inicio in range(0, len(titulos), self.lote):
+            ids.update(modelo.objects.filter(
+                titulo__in=titulos[inicio:inicio + self.lote]
+            ).values_list('titulo', 'id'))
+        return ids
+
+    def gerar(self, escala):
+        with transaction.atomic():
+            usuario_ids = self.gerar_usuarios(VOLUMES['usuarios'] * escala)
+            desastre_ids = self.gerar_desastres(VOLUMES['desastres'] * escala)
+            acontecimento_ids = self.gerar_acontecimentos(VOLUMES['acontecimentos'] * escala)
+            artigo_ids = self.gerar_artigos(VOLUMES['artigos'] * escala, usuario_ids)
+            jogo_ids = self.gerar_jogos(VOLUMES['jogos'] * escala, usuario_ids)
+            self.gerar_paginas(VOLUMES['paginas'] * escala, artigo_ids, desastre_ids, jogo_ids, acontecimento_ids)
+            self.carga.gravar()
+
+        # bulk_create não dispara sinais: estatísticas, busca, cache da página e do mapa
+        call_command('recalcular_avaliacoes', stdout=self.stdout)
+        call_command('reindexar_busca', stdout=self.stdout)
+        invalidar_pagina_jogo(*jogo_ids)
+        invalidar_agrupamentos()
+
+    def gerar_usuarios(self, alvo):
+        # Hash calculado uma vez: milhares de hashes scrypt levariam horas
+        senha = make_password('seed123')
+        existentes = Usuario.objects.filter(email__endswith=f'@{DOMINIO_EMAIL}').count()
+        for i in range(existentes, alvo):
+            rng = self.rng('usuario', i)
+            self.carga.adicionar(Usuario(
+                nome=f'{rng.choice(PALAVRAS).title()} {i}',
+                email=f'usuario{i}@{DOMINIO_EMAIL}',
+                senha=senha,
+                tipo=rng.choice(TIPOS_USUARIO),
+                data=data_aleatoria(rng),
+            ))
+        self.carga.gravar(Usuario)
+        return list(Usuario.objects.filter(
+            email__endswith=f'@{DOMINIO_EMAIL}'
+        ).order_by('id').values_list('id', flat=True))
+
+    def gerar_desastres(self, alvo):
+        novos = self.faixa_nova(Desastre, alvo)
+        titulos = [f'{PREFIXO} Desastre {i:06d}' for i in novos]
+        for i, titulo in zip(novos, titulos):
+            rng = self.rng('desastre', i)
+            self.carga.adicionar(Desastre(titulo=titulo, descricao=frase(rng), icone=rng.choice(ICONES)))
+        self.carga.gravar(Desastre)
+
+        ids = self.ids_por_titulo(Desastre, titulos)
+        for i, titulo in zip(novos, titulos):
+            rng = self.rng('desastre-filhos', i)
+            for j in range(POR_DESASTRE['riscos']):
+                self.carga.adicionar(com_coordenadas(Risco(
+                    nome=frase(rng, 2, 4), nivel=rng.choice(NIVEIS), descricao=frase(rng, 10, 30),
+                    localizacao=frase(rng, 1, 3), desastre_id=ids[titulo],
+                ), rng))
+            for j in range(POR_DESASTRE['topicos']):
+                self.carga.adicionar(TopicoDesastre(
+                    titulo=frase(rng, 2, 5), texto=frase(rng, 40, 120), desastre_id=ids[titulo],
+                ))
+        return list(Desastre.objects.order_by('id').values_list('id', flat=True))
+
+    def gerar_acontecimentos(self, alvo):
+        for i in self.faixa_nova(Acontecimento, alvo):
+            rng = self.rng('acontecimento', i)
+            self.carga.adicionar(com_coordenadas(Acontecimento(
+                titulo=f'{PREFIXO} Acontecimento {i:07d}', descricao=frase(rng, 10, 40),
+                dataAcontecimento=data_aleatoria(rng), risco=rng.choice(NIVEIS),
+            ), rng))
+        self.carga.gravar(Acontecimento)
+        return list(Acontecimento.objects.order_by('id').values_list('id', flat=True))
+
+    def gerar_artigos(self, alvo, usuario_ids):
+        novos = self.faixa_nova(Artigo, alvo)
+        titulos = [f'{PREFIXO} Artigo {i:06d}' for i in novos]
+        for i, titulo in zip(novos, titulos):
+            rng = self.rng('artigo', i)
+            self.carga.adicionar(Artigo(
+                titulo=titulo, resumo=frase(rng, 20, 60), dataPublicacao=data_aleatoria(rng),
+                usuario_id=rng.choice(usuario_ids),
+            ))
+        self.carga.gravar(Artigo)
+
+        ids = self.ids_por_titulo(Artigo, titulos)
+        for i, titulo in zip(novos, titulos):
+            rng = self.rng('artigo-filhos', i)
+            for j in range(POR_ARTIGO['topicos']):
+                self.carga.adicionar(TopicoArtigo(
+                    titulo=frase(rng, 2, 5), texto=frase(rng, 60, 200), artigo_id=ids[titulo],
+                ))
+        return list(Artigo.objects.order_by('id').values_list('id', flat=True))
+
+    def gerar_jogos(self, alvo, usuario_ids):
+        novos = self.faixa_nova(Jogo, alvo)
+        titulos = [f'{PREFIXO} Jogo {i:04d}' for i in novos]
+        for i, titulo in zip(novos, titulos):
+            rng = self.rng('jogo', i)
+            self.carga.adicionar(Jogo(
+                titulo=titulo, subtitulo=frase(rng, 3, 6), descricao=frase(rng, 20, 40),
+                descricao_detalhada=frase(rng, 60, 150), data_lancamento=data_aleatoria(rng),
+            ))
+        self.carga.gravar(Jogo)
+
+        ids = self.ids_por_titulo(Jogo, titulos)
+        for i, titulo in zip(novos, titulos):
+            self.gerar_grafo_do_jogo(i, ids[titulo], usuario_ids)
+        return list(Jogo.objects.order_by('id').values_list('id', flat=True))
+
+    def gerar_grafo_do_jogo(self, indice, jogo_id, usuario_ids):
+        rng = self.rng('jogo-filhos', indice)
+        adicionar = self.carga.adicionar
+
+        for j in range(POR_JOGO['caracteristicas']):
+            adicionar(CaracteristicaJogo(jogo_id=jogo_id, descricao=frase(rng), ordem=j))
+        for j in range(POR_JOGO['requisitos']):
+            adicionar(RequisitoJogo(jogo_id=jogo_id, tipo=('minimo', 'recomendado')[j % 2], descricao=frase(rng, 2, 5)))
+        for j in range(POR_JOGO['atualizacoes']):
+            adicionar(AtualizacaoJogo(
+                jogo_id=jogo_id, versao=f'1.{j}.0', data=data_aleatoria(rng), descricao=frase(rng, 8, 20),
+                detalhes=frase(rng, 10, 30), ordem=j,
+            ))
+        for j in range(POR_JOGO['faqs']):
+            adicionar(FAQJogo(
+                jogo_id=jogo_id, pergunta=frase(rng) + '?', resposta=frase(rng, 15, 50), ordem=j,
+                categoria=rng.choice(CATEGORIAS_FAQ), visivel=rng.random() > 0.1, ativo=rng.random() > 0.05,
+            ))
+        for j in range(POR_JOGO['imagens']):
+            adicionar(ImagemJogo(
+                jogo_id=jogo_id, url=f'https://picsum.photos/seed/acriseg-{indice}-{j}/1000/600',
+                legenda=frase(rng, 3, 8), ordem=j,
+            ))
+        for j in range(POR_JOGO['avaliacoes']):
+            adicionar(Avaliacao(
+                jogo_id=jogo_id, usuario_id=rng.choice(usuario_ids),
+                nota=rng.choices(range(1, 6), weights=(3, 4, 10, 33, 50))[0], texto=frase(rng, 5, 30),
+            ))
+        for j in range(POR_JOGO['perguntas_usuario']):
+            status = rng.choice(STATUS_PERGUNTA)
+            adicionar(PerguntaUsuario(
+                jogo_id=jogo_id, usuario_id=rng.choice(usuario_ids) if rng.random() > 0.3 else None,
+                pergunta=frase(rng, 6, 25) + '?', email=f'contato{j}@{DOMINIO_EMAIL}', status=status,
+                resposta_admin=frase(rng, 10, 40) if status != 'pendente' else None,
+            ))
+        for j in range(POR_JOGO['perguntas']):
+            adicionar(Pergunta(
+                jogo_id=jogo_id, usuario_id=rng.choice(usuario_ids),
+                pergunta=frase(rng, 6, 25) + '?', resposta=frase(rng, 10, 40),
+            ))
+
+    def gerar_paginas(self, alvo, artigo_ids, desastre_ids, jogo_ids, acontecimento_ids):
+        for i in self.faixa_nova(Pagina, alvo):
+            rng = self.rng('pagina', i)
+            self.carga.adicionar(Pagina(
+                titulo=f'{PREFIXO} Página {i:06d}', descricao=frase(rng, 10, 30),
+                artigo_id=rng.choice(artigo_ids) if artigo_ids else None,
+                desastre_id=rng.choice(desastre_ids) if desastre_ids else None,
+                jogo_id=rng.choice(jogo_ids) if jogo_ids else None,
+                acontecimento_id=rng.choice(acontecimento_ids) if acontecimento_ids else None,
+            ))
+
+    def relatorio(self, duracao):
+        total = sum(self.carga.gravados.values())
+        for modelo, linhas in sorted(self.carga.gravados.items(), key=lambda item: -item[1]):
+            segundos = self.carga.segundos[modelo]
+            self.stdout.write(
+                f'  {modelo.__name__:<20} {linhas:>10} linhas  {linhas / segundos if segundos else 0:>10.0f} linhas/s'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} linhas em {duracao:.1f}s ({total / duracao if duracao else 0:.0f} linhas/s)'
+        ))
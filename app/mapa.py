@@ -0,0 +1,202 @@
+from django.core.cache import cache
+from django.db.models import Count, F, Sum
+from django.utils.text import slugify
+
+from .geo import ZOOM_INDICE, filtro_caixa, filtro_faixas, intercalar, tiles_da_caixa, zoom_de_cobertura
+from .models import Acontecimento, Risco
+
+# ===============================================================
+# DADOS DO MAPA DE DESASTRES
+# ===============================================================
+MAXIMO_PONTOS_MAPA = 500
+
+# Risco.nivel e Acontecimento.risco são texto livre; a gravidade (0 a 4)
+# é o que o mapa usa para cor e tamanho dos marcadores
+GRAVIDADE = {
+    'baixo': 1, 'baixa': 1,
+    'medio': 2, 'media': 2, 'moderado': 2, 'moderada': 2,
+    'alto': 3, 'alta': 3,
+    'muito-alto': 4, 'muito-alta': 4, 'extremo': 4, 'extrema': 4,
+}
+
+
+def nivel_gravidade(texto):
+    return GRAVIDADE.get(slugify(texto or ''), 0)
+
+
+def pontos_do_filtro(filtro, limite=MAXIMO_PONTOS_MAPA):
+    """Riscos e acontecimentos que passam no filtro, no formato do JSON do mapa.
+
+    Retorna (pontos, truncado); acontecimentos do mais recente ao mais antigo.
+    """
+    acontecimentos = list(
+        Acontecimento.objects.filter(filtro).order_by('-dataAcontecimento', '-id').values(
+            'id', 'titulo', 'latitude', 'longitude', 'risco', 'dataAcontecimento'
+        )[:limite + 1]
+    )
+    riscos = list(
+        Risco.objects.filter(filtro).order_by('id').values(
+            'id', 'nome', 'latitude', 'longitude', 'nivel', 'desastre__titulo'
+        )[:limite + 1]
+    )
+
+    # Riscos (poucos e fixos) vêm antes, para não serem cortados pelo histórico
+    pontos = [
+        {
+            'tipo': 'risco', 'id': r['id'], 'titulo': r['nome'],
+            'lat': r['latitude'], 'lon': r['longitude'],
+            'nivel': r['nivel'], 'gravidade': nivel_gravidade(r['nivel']),
+            'desastre': r['desastre__titulo'],
+        }
+        for r in riscos
+    ] + [
+        {
+            'tipo': 'acontecimento', 'id': a['id'], 'titulo': a['titulo'],
+            'lat': a['latitude'], 'lon': a['longitude'],
+            'nivel': a['risco'], 'gravidade': nivel_gravidade(a['risco']),
+            'data': a['dataAcontecimento'].isoformat() if a['dataAcontecimento'] else None,
+        }
+        for a in acontecimentos
+    ]
+    return pontos[:limite], len(pontos) > limite
+
+
+def pontos_na_caixa(caixa, limite=MAXIMO_PONTOS_MAPA):
+    return pontos_do_filtro(filtro_caixa(caixa), limite)
+
+
+# ===============================================================
+# AGRUPAMENTOS (CLUSTERS) POR TILE
+# ===============================================================
+# Até ZOOM_MAXIMO_AGRUPAMENTO o mapa recebe células em vez de pontos: cada
+# tile do zoom atual é dividido em 4 x 4 células (zoom + NIVEIS_CELULA) com
+# total, centro médio e maior gravidade. As células de cada tile ficam em
+# cache; pontos novos são somados ao tile já em cache e alterações/remoções
+# descartam só os tiles afetados (ver app/signals.py).
+ZOOM_MAXIMO_AGRUPAMENTO = 12
+NIVEIS_CELULA = 2
+MAXIMO_TILES_AGRUPAMENTO = 48
+TEMPO_CACHE_AGRUPAMENTO = 60 * 60
+
+# Campo de nível de risco (texto livre) de cada modelo exibido no mapa
+CAMPO_NIVEL = {Acontecimento: 'risco', Risco: 'nivel'}
+
+CHAVE_GERACAO_AGRUPAMENTOS = 'mapa:agrupamentos:geracao'
+
+
+def geracao_agrupamentos():
+    cache.add(CHAVE_GERACAO_AGRUPAMENTOS, 1, None)
+    return cache.get(CHAVE_GERACAO_AGRUPAMENTOS, 1)
+
+
+def chave_agrupamentos(zoom, codigo, geracao):
+    return f'mapa:agrupamentos:{geracao}:{zoom}:{codigo}'
+
+
+def invalidar_agrupamentos():
+    """Descarta todos os tiles (ex.: depois de bulk_create/update em massa)."""
+    try:
+        cache.incr(CHAVE_GERACAO_AGRUPAMENTOS)
+    except ValueError:
+        cache.set(CHAVE_GERACAO_AGRUPAMENTOS, 2, None)
+
+
+def deslocamento(zoom):
+    return 2 * (ZOOM_INDICE - zoom)
+
+
+def somar_na_celula(celulas, celula, total, soma_lat, soma_lon, gravidade):
+    atual = celulas.get(celula)
+    if atual is None:
+        celulas[celula] = [total, soma_lat, soma_lon, gravidade]
+    else:
+        atual[0] += total
+        atual[1] += soma_lat
+        atual[2] += soma_lon
+        atual[3] = max(atual[3], gravidade)
+
+
+def calcular_tiles(zoom, codigos):
+    """{código do tile: {célula: [total, soma_lat, soma_lon, gravidade]}} direto do banco."""
+    tiles = {codigo: {} for codigo in codigos}
+    faixas = [
+        (codigo << deslocamento(zoom), (codigo + 1) << deslocamento(zoom))
+        for codigo in sorted(codigos)
+    ]
+    deslocamento_celula = deslocamento(zoom + NIVEIS_CELULA)
+    for modelo, campo_nivel in CAMPO_NIVEL.items():
+        linhas = modelo.objects.filter(filtro_faixas(faixas)).annotate(
+            celula=F('quadkey').bitrightshift(deslocamento_celula)
+        ).values('celula', campo_nivel).order_by().annotate(
+            total=Count('id'), soma_lat=Sum('latitude'), soma_lon=Sum('longitude')
+        )
+        for linha in linhas:
+            celula = linha['celula']
+            somar_na_celula(
+                tiles[celula >> (2 * NIVEIS_CELULA)], celula,
+                linha['total'], linha['soma_lat'], linha['soma_lon'], nivel_gravidade(linha[campo_nivel])
+            )
+    return tiles
+
+
+def celulas_dos_tiles(zoom, codigos):
+    """Células de cada tile, do cache ou calculadas (e guardadas) de uma vez só."""
+    geracao = geracao_agrupamentos()
+    chaves = {codigo: chave_agrupamentos(zoom, codigo, geracao) for codigo in codigos}
+    em_cache = cache.get_many(chaves.values())
+    tiles = {codigo: em_cache[chave] for codigo, chave in chaves.items() if chave in em_cache}
+
+    faltando = set(codigos) - tiles.keys()
+    if faltando:
+        calculados = calcular_tiles(zoom, faltando)
+        cache.set_many({chaves[codigo]: celulas for codigo, celulas in calculados.items()}, TEMPO_CACHE_AGRUPAMENTO)
+        tiles.update(calculados)
+    return tiles
+
+
+def resumir_celulas(celulas):
+    return [
+        {
+            'lat': soma_lat / total, 'lon': soma_lon / total,
+            'total': total, 'gravidade': gravidade,
+        }
+        for total, soma_lat, soma_lon, gravidade in celulas.values()
+    ]
+
+
+def agrupamentos_na_caixa(caixa, zoom):
+    """Células agrupadas da área visível; no máximo 16 por tile do zoom usado."""
+    zoom = max(0, min([zoom, ZOOM_MAXIMO_AGRUPAMENTO] + [
+        zoom_de_cobertura(parte, MAXIMO_TILES_AGRUPAMENTO) for parte in caixa.partes()
+    ]))
+    codigos = {intercalar(x, y) for parte in caixa.partes() for x, y in tiles_da_caixa(parte, zoom)}
+    tiles = celulas_dos_tiles(zoom, codigos)
+    return [grupo for celulas in tiles.values() for grupo in resumir_celulas(celulas)], zoom
+
+
+def ponto_adicionado(quadkey, latitude, longitude, nivel):
+    """Soma um ponto novo aos tiles que já estão em cache, em todos os zooms."""
+    if quadkey is None:
+        return
+    geracao = geracao_agrupamentos()
+    gravidade = nivel_gravidade(nivel)
+    chaves = {
+        chave_agrupamentos(zoom, quadkey >> deslocamento(zoom), geracao): quadkey >> deslocamento(zoom + NIVEIS_CELULA)
+        for zoom in range(ZOOM_MAXIMO_AGRUPAMENTO + 1)
+    }
+    # Leitura e escrita não são atômicas entre processos: uma soma perdida
+    # numa corrida se corrige quando o tile expira (TEMPO_CACHE_AGRUPAMENTO)
+    atualizados = cache.get_many(chaves)
+    for chave, celulas in atualizados.items():
+        somar_na_celula(celulas, chaves[chave], 1, latitude, longitude, gravidade)
+    cache.set_many(atualizados, TEMPO_CACHE_AGRUPAMENTO)
+
+
+def pontos_alterados(*quadkeys):
+    """Descarta, em todos os zooms, os tiles que contêm as posições informadas."""
+    geracao = geracao_agrupamentos()
+    cache.delete_many({
+        chave_agrupamentos(zoom, quadkey >> deslocamento(zoom), geracao)
+        for quadkey in quadkeys if quadkey is not None
+        for zoom in range(ZOOM_MAXIMO_AGRUPAMENTO + 1)
+    })
@@ -0,0 +1,231 @@
+import mimetypes
+import os
+import time
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.http import FileResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import http_date
+
+from .estaticos import etag_do_arquivo
+from .models import Usuario
+
+# ===============================================================
+# RENOVAÇÃO DA SESSÃO
+# ===============================================================
+# Substitui SESSION_SAVE_EVERY_REQUEST: a sessão continua com expiração
+# deslizante de SESSION_COOKIE_AGE, mas só é regravada quando a última
+# renovação tem mais de SESSAO_JANELA_RENOVACAO segundos.
+CHAVE_RENOVACAO = '_renovada_em'
+
+
+class RenovacaoSessaoMiddleware:
+    """Deve vir logo depois de SessionMiddleware em settings.MIDDLEWARE."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.janela = getattr(settings, 'SESSAO_JANELA_RENOVACAO', 60 * 60 * 24)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        sessao = getattr(request, 'session', None)
+        if sessao is None:
+            return response
+
+        agora = int(time.time())
+        if sessao.modified:
+            # Já vai ser gravada (ex.: login): aproveita para registrar a
+            # renovação, sem ressuscitar uma sessão que ficou vazia (logout)
+            if any(chave != CHAVE_RENOVACAO for chave in sessao.keys()):
+                sessao[CHAVE_RENOVACAO] = agora
+            else:
+                sessao.pop(CHAVE_RENOVACAO, None)
+            return response
+
+        # Sem cookie de sessão (visitante anônimo) não há nada para renovar
+        if not sessao.session_key:
+            return response
+
+        renovada_em = sessao.get(CHAVE_RENOVACAO, 0)
+        # O cookie pode apontar para uma sessão que já expirou
+        if not sessao.session_key:
+            return response
+
+        if agora - renovada_em >= self.janela:
+            # Marcar como modificada faz o SessionMiddleware gravar e
+            # reenviar o cookie com a expiração renovada
+            sessao[CHAVE_RENOVACAO] = agora
+        return response
+
+
+# ===============================================================
+# USUÁRIO DA REQUISIÇÃO
+# ===============================================================
+# request.usuario é resolvido uma única vez por requisição, só quando
+# alguém o usa, a partir da chave 'usuario_id' da sessão. Os dados do
+# usuário ficam em cache por id; app/signals.py descarta a entrada quando
+# o Usuario muda. Suba VERSAO_CACHE_PRINCIPAL ao mudar os campos abaixo.
+VERSAO_CACHE_PRINCIPAL = 1
+TEMPO_CACHE_PRINCIPAL = 60 * 15
+
+
+class Principal:
+    """Dados do usuário logado usados por templates (user_info) e views."""
+    __slots__ = ('id', 'nome', 'email', 'tipo', 'imagem')
+
+    def __init__(self, id=None, nome=None, email=None, tipo=None, imagem=None):
+        self.id = id
+        self.nome = nome
+        self.email = email
+        self.tipo = tipo
+        self.imagem = imagem
+
+    def __repr__(self):
+        return f'<Principal {self.id} {self.email}>'
+
+    @property
+    def is_authenticated(self):
+        return self.id is not None
+
+    @property
+    def is_admin(self):
+        return self.tipo == 'admin'
+
+    @property
+    def is_editor(self):
+        return self.tipo == 'editor'
+
+
+ANONIMO = Principal()
+
+
+def chave_principal(usuario_id):
+    return f'principal:{usuario_id}'
+
+
+def carregar_principal(usuario_id):
+    principal = cache.get(chave_principal(usuario_id), version=VERSAO_CACHE_PRINCIPAL)
+    if principal is None:
+        dados = Usuario.objects.filter(pk=usuario_id).values(*Principal.__slots__).first()
+        if dados is None:
+            # Usuário removido com a sessão ainda aberta
+            return ANONIMO
+        principal = Principal(**dados)
+        cache.set(chave_principal(usuario_id), principal, TEMPO_CACHE_PRINCIPAL, version=VERSAO_CACHE_PRINCIPAL)
+    return principal
+
+
+def invalidar_principal(*usuario_ids):
+    cache.delete_many([chave_principal(usuario_id) for usuario_id in usuario_ids], version=VERSAO_CACHE_PRINCIPAL)
+
+
+def principal_da_requisicao(request):
+    usuario_id = request.session.get('usuario_id')
+    if usuario_id is None:
+        return ANONIMO
+    return carregar_principal(usuario_id)
+
+
+class UsuarioSessaoMiddleware:
+    """Deve vir depois de SessionMiddleware em settings.MIDDLEWARE."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.usuario = SimpleLazyObject(lambda: principal_da_requisicao(request))
+        return self.get_response(request)
+
+
+# ===============================================================
+# ARQUIVOS ESTÁTICOS
+# ===============================================================
+# Serve o STATIC_ROOT gerado pelo collectstatic (app/estaticos.py) antes do
+# resto da pilha: escolhe a versão .br/.gz pelo Accept-Encoding e marca como
+# imutáveis os nomes com hash, que mudam junto com o conteúdo. Os demais são
+# revalidados (ETag) depois de ESTATICOS_MAX_AGE segundos. Em DEBUG o
+# runserver serve os estáticos antes de a requisição chegar aqui.
+CACHE_IMUTAVEL = 60 * 60 * 24 * 365
+CODIFICACOES = (('br', '.br'), ('gzip', '.gz'))  # ordem de preferência
+
+
+def codificacoes_aceitas(cabecalho):
+    aceitas = set()
+    for item in cabecalho.split(','):
+        nome, _, parametro = item.partition(';')
+        chave, _, valor = parametro.strip().partition('=')
+        try:
+            if chave.strip() == 'q' and float(valor) == 0:
+                continue
+        except ValueError:
+            continue
+        aceitas.add(nome.strip().lower())
+    return aceitas
+
+
+class ArquivosEstaticosMiddleware:
+    """Deve ser o primeiro de settings.MIDDLEWARE."""
+
+    def __init__(self, get_response):
+        if not settings.STATIC_ROOT or '://' in settings.STATIC_URL:
+            raise MiddlewareNotUsed  # sem collectstatic local ou servidos por CDN
+        self.get_response = get_response
+        self.prefixo = '/' + settings.STATIC_URL.lstrip('/')
+        self.raiz = settings.STATIC_ROOT
+        self.max_age = getattr(settings, 'ESTATICOS_MAX_AGE', 60 * 60)
+        self._imutaveis = None
+
+    @property
+    def imutaveis(self):
+        """Nomes com hash do manifesto (lido na primeira requisição)."""
+        if self._imutaveis is None:
+            self._imutaveis = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+        return self._imutaveis
+
+    def __call__(self, request):
+        if request.method not in ('GET', 'HEAD') or not request.path_info.startswith(self.prefixo):
+            return self.get_response(request)
+        nome = request.path_info[len(self.prefixo):]
+        try:
+            caminho = safe_join(self.raiz, nome)
+        except SuspiciousFileOperation:
+            return self.get_response(request)
+        if not nome or not os.path.isfile(caminho):
+            return self.get_response(request)
+        return self.servir(request, nome, caminho)
+
+    def servir(self, request, nome, caminho):
+        aceitas = codificacoes_aceitas(request.headers.get('Accept-Encoding', ''))
+        codificacao, arquivo, variantes = None, caminho, False
+        for candidata, sufixo in CODIFICACOES:
+            if os.path.isfile(caminho + sufixo):
+                variantes = True
+                if codificacao is None and candidata in aceitas:
+                    codificacao, arquivo = candidata, caminho + sufixo
+
+        info = os.stat(arquivo)
+        etag = etag_do_arquivo(info)
+        resposta = get_conditional_response(request, etag=etag, last_modified=int(info.st_mtime))
+        if resposta is None:
+            content_type = mimetypes.guess_type(nome)[0] or 'application/octet-stream'
+            if content_type.startswith('text/') or content_type in ('application/json', 'image/svg+xml'):
+                content_type += '; charset=utf-8'
+            resposta = FileResponse(open(arquivo, 'rb'), content_type=content_type)
+            del resposta['Content-Disposition']
+            if codificacao:
+                resposta['Content-Encoding'] = codificacao
+        resposta['ETag'] = etag
+        resposta['Last-Modified'] = http_date(info.st_mtime)
+        if variantes:
+            patch_vary_headers(resposta, ['Accept-Encoding'])
+        if nome in self.imutaveis:
+            resposta['Cache-Control'] = f'public, max-age={CACHE_IMUTAVEL}, immutable'
+        else:
+            patch_cache_control(resposta, public=True, max_age=self.max_age)
+        return resposta
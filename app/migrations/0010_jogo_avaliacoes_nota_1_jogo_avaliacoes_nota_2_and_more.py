@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:33
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def preencher_estatisticas(apps, schema_editor):
+    Jogo = apps.get_model('app', 'Jogo')
+    Avaliacao = apps.get_model('app', 'Avaliacao')
+    linhas = Avaliacao.objects.values('jogo').order_by().annotate(
+        total=Count('id'),
+        soma=Sum('nota'),
+        **{f'nota_{nota}': Count('id', filter=Q(nota=nota)) for nota in range(1, 6)}
+    )
+    for linha in linhas:
+        Jogo.objects.filter(pk=linha['jogo']).update(
+            avaliacoes_total=linha['total'],
+            avaliacoes_soma=linha['soma'] or 0,
+            **{f'avaliacoes_nota_{nota}': linha[f'nota_{nota}'] for nota in range(1, 6)}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0009_alter_faqjogo_options_faqjogo_categoria_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jogo',
+            name='avaliacoes_nota_1',
+            field=models.IntegerField(default=0, verbose_name='Avaliações Nota 1'),
+        ),
+        migrations.AddField(
+            model_name='jogo',
+            name='avaliacoes_nota_2',
+            field=models.IntegerField(default=0, verbose_name='Avaliações Nota 2'),
+        ),
+        migrations.AddField(
+            model_name='jogo',
+            name='avaliacoes_nota_3',
+            field=models.IntegerField(default=0, verbose_name='Avaliações Nota 3'),
+        ),
+        migrations.AddField(
+            model_name='jogo',
+            name='avaliacoes_nota_4',
+            field=models.IntegerField(default=0, verbose_name='Avaliações Nota 4'),
+        ),
+        migrations.AddField(
+            model_name='jogo',
+            name='avaliacoes_nota_5',
+            field=models.IntegerField(default=0, verbose_name='Avaliações Nota 5'),
+        ),
+        migrations.AddField(
+            model_name='jogo',
+            name='avaliacoes_soma',
+            field=models.BigIntegerField(default=0, verbose_name='Soma das Notas'),
+        ),
+        migrations.AddField(
+            model_name='jogo',
+            name='avaliacoes_total',
+            field=models.IntegerField(default=0, verbose_name='Total de Avaliações'),
+        ),
+        migrations.RunPython(preencher_estatisticas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0010_jogo_avaliacoes_nota_1_jogo_avaliacoes_nota_2_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='atualizacaojogo',
+            index=models.Index(fields=['jogo', '-data'], name='atualizacao_jogo_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='avaliacao',
+            index=models.Index(fields=['jogo', '-nota'], name='avaliacao_jogo_nota_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='caracteristicajogo',
+            index=models.Index(fields=['jogo', 'ordem'], name='caracteristica_jogo_ordem_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='faqjogo',
+            index=models.Index(condition=models.Q(('ativo', True), ('visivel', True)), fields=['jogo', 'ordem', 'categoria'], name='faqjogo_visiveis_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='imagemjogo',
+            index=models.Index(fields=['jogo', 'ordem'], name='imagem_jogo_ordem_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jogo',
+            index=models.Index(condition=models.Q(('ativo', True)), fields=['id'], name='jogo_ativo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='perguntausuario',
+            index=models.Index(fields=['status', '-data_envio'], name='pergunta_status_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['tipo'], name='usuario_tipo_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0011_indices_consultas_frequentes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='acontecimento',
+            index=models.Index(fields=['-dataAcontecimento', '-id'], name='acontecimento_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='desastre',
+            index=models.Index(fields=['titulo', 'id'], name='desastre_titulo_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0012_indices_paginacao_listagens'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='acontecimento',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True, verbose_name='Latitude'),
+        ),
+        migrations.AddField(
+            model_name='acontecimento',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True, verbose_name='Longitude'),
+        ),
+        migrations.AddField(
+            model_name='acontecimento',
+            name='quadkey',
+            field=models.BigIntegerField(blank=True, editable=False, null=True, verbose_name='Célula Geográfica'),
+        ),
+        migrations.AddField(
+            model_name='risco',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True, verbose_name='Latitude'),
+        ),
+        migrations.AddField(
+            model_name='risco',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True, verbose_name='Longitude'),
+        ),
+        migrations.AddField(
+            model_name='risco',
+            name='quadkey',
+            field=models.BigIntegerField(blank=True, editable=False, null=True, verbose_name='Célula Geográfica'),
+        ),
+        migrations.AddIndex(
+            model_name='acontecimento',
+            index=models.Index(condition=models.Q(('quadkey__isnull', False)), fields=['quadkey'], name='acontecimento_quadkey_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='risco',
+            index=models.Index(condition=models.Q(('quadkey__isnull', False)), fields=['quadkey'], name='risco_quadkey_idx'),
+        ),
+    ]
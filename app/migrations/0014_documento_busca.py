@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:01
+
+from django.db import migrations, models
+
+
+# Só no PostgreSQL: coluna tsvector gerada (mantida pelo próprio banco a cada
+# INSERT/UPDATE) com índice GIN. Nos outros bancos a busca usa o índice em
+# memória de app/busca.py.
+SQL_VETOR = [
+    """
+    ALTER TABLE app_documentobusca ADD COLUMN vetor tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('portuguese', coalesce(titulo, '')), 'A') ||
+        setweight(to_tsvector('portuguese', coalesce(texto, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX documento_busca_vetor_idx ON app_documentobusca USING gin (vetor)",
+]
+SQL_REMOVER_VETOR = [
+    "DROP INDEX IF EXISTS documento_busca_vetor_idx",
+    "ALTER TABLE app_documentobusca DROP COLUMN IF EXISTS vetor",
+]
+
+
+def criar_vetor(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for sql in SQL_VETOR:
+            schema_editor.execute(sql)
+
+
+def remover_vetor(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for sql in SQL_REMOVER_VETOR:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0013_coordenadas_e_indice_espacial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentoBusca',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('artigo', 'Artigo'), ('topico_artigo', 'Tópico de Artigo'), ('topico_desastre', 'Tópico de Desastre'), ('faq', 'FAQ')], max_length=20, verbose_name='Tipo')),
+                ('objeto_id', models.BigIntegerField(verbose_name='ID do Objeto')),
+                ('titulo', models.CharField(max_length=255, verbose_name='Título')),
+                ('texto', models.TextField(blank=True, default='', verbose_name='Texto')),
+                ('url', models.CharField(max_length=200, verbose_name='URL')),
+                ('atualizado_em', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': 'Documento de Busca',
+                'verbose_name_plural': 'Documentos de Busca',
+                'indexes': [models.Index(fields=['atualizado_em'], name='documento_busca_atualizado_idx')],
+                'constraints': [models.UniqueConstraint(fields=('tipo', 'objeto_id'), name='documento_busca_objeto_unico')],
+            },
+        ),
+        migrations.RunPython(criar_vetor, remover_vetor),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:11
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0014_documento_busca'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tarefa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(max_length=50, verbose_name='Tipo')),
+                ('parametros', models.JSONField(blank=True, default=dict, verbose_name='Parâmetros')),
+                ('chave', models.CharField(blank=True, max_length=100, null=True, verbose_name='Chave de Idempotência')),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('executando', 'Executando'), ('concluida', 'Concluída'), ('falhou', 'Falhou')], default='pendente', max_length=20, verbose_name='Status')),
+                ('tentativas', models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas')),
+                ('maximo_tentativas', models.PositiveSmallIntegerField(default=3, verbose_name='Máximo de Tentativas')),
+                ('erro', models.TextField(blank=True, default='', verbose_name='Último Erro')),
+                ('progresso', models.PositiveIntegerField(default=0, verbose_name='Progresso')),
+                ('total', models.PositiveIntegerField(blank=True, null=True, verbose_name='Total')),
+                ('resultado', models.CharField(blank=True, default='', max_length=255, verbose_name='Resultado')),
+                ('disponivel_em', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Disponível em')),
+                ('prazo', models.DateTimeField(blank=True, null=True, verbose_name='Prazo da Execução')),
+                ('trabalhador', models.CharField(blank=True, default='', max_length=100, verbose_name='Trabalhador')),
+                ('criada_em', models.DateTimeField(auto_now_add=True, verbose_name='Criada em')),
+                ('iniciada_em', models.DateTimeField(blank=True, null=True, verbose_name='Iniciada em')),
+                ('concluida_em', models.DateTimeField(blank=True, null=True, verbose_name='Concluída em')),
+            ],
+            options={
+                'verbose_name': 'Tarefa',
+                'verbose_name_plural': 'Tarefas',
+                'ordering': ['-criada_em'],
+                'indexes': [models.Index(fields=['status', 'disponivel_em'], name='tarefa_fila_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status__in', ['pendente', 'executando'])), fields=('chave',), name='tarefa_chave_ativa_unica')],
+            },
+        ),
+    ]
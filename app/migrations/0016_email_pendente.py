@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:15
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0015_tarefa'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailPendente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('destinatario', models.EmailField(max_length=254, verbose_name='Destinatário')),
+                ('assunto', models.CharField(max_length=255, verbose_name='Assunto')),
+                ('corpo', models.TextField(verbose_name='Corpo')),
+                ('chave', models.CharField(max_length=100, unique=True, verbose_name='Chave de Idempotência')),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('enviando', 'Enviando'), ('enviado', 'Enviado'), ('falhou', 'Falhou')], default='pendente', max_length=20, verbose_name='Status')),
+                ('tentativas', models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas')),
+                ('erro', models.TextField(blank=True, default='', verbose_name='Último Erro')),
+                ('disponivel_em', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Disponível em')),
+                ('reservado_ate', models.DateTimeField(blank=True, null=True, verbose_name='Reservado até')),
+                ('lote', models.CharField(blank=True, default='', max_length=32, verbose_name='Lote de Envio')),
+                ('criado_em', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('enviado_em', models.DateTimeField(blank=True, null=True, verbose_name='Enviado em')),
+                ('pergunta', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='emails', to='app.perguntausuario', verbose_name='Pergunta')),
+            ],
+            options={
+                'verbose_name': 'Email Pendente',
+                'verbose_name_plural': 'Emails Pendentes',
+                'ordering': ['-criado_em'],
+                'indexes': [models.Index(fields=['status', 'disponivel_em'], name='email_fila_idx')],
+            },
+        ),
+    ]
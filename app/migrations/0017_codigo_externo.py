@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0016_email_pendente'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='acontecimento',
+            name='codigo_externo',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True, verbose_name='Código Externo'),
+        ),
+        migrations.AddField(
+            model_name='desastre',
+            name='codigo_externo',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True, verbose_name='Código Externo'),
+        ),
+        migrations.AddField(
+            model_name='risco',
+            name='codigo_externo',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True, verbose_name='Código Externo'),
+        ),
+        migrations.AddField(
+            model_name='topicodesastre',
+            name='codigo_externo',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True, verbose_name='Código Externo'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0017_codigo_externo'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='perguntausuario',
+            index=models.Index(fields=['usuario', '-data_envio', '-id'], name='pergunta_usuario_data_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0018_pergunta_usuario_data_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='usuario',
+            name='senha',
+            field=models.CharField(max_length=255, verbose_name='Senha'),
+        ),
+    ]
@@ -1,8 +1,21 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
-from django.contrib.auth.hashers import make_password, check_password
+from django.contrib.auth.hashers import make_password, check_password, identify_hasher
 from datetime import date
 from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+
+from .geo import quadkey_do_ponto
+
+
+def senha_hasheada(valor):
+    """True se o valor já é um hash reconhecido por algum PASSWORD_HASHERS."""
+    try:
+        identify_hasher(valor)
+    except ValueError:
+        return False
+    return True
+
 
 # ===============================================================
 # USUARIO
@@ -11,7 +24,7 @@ class Usuario(models.Model):
     # Mantendo os campos originais
     nome = models.CharField(max_length=45, verbose_name="Nome")
     email = models.EmailField(max_length=90, unique=True, verbose_name="Email")
-    senha = models.CharField(max_length=128, verbose_name="Senha")  # Aumentado para 128 para hash
+    senha = models.CharField(max_length=255, verbose_name="Senha")  # Hash (scrypt já ocupa 128)
     imagem = models.CharField(max_length=100, null=True, blank=True, verbose_name="Imagem")
     tipo = models.CharField(max_length=45, null=True, blank=True, verbose_name="Tipo", default="usuario")
     data = models.DateField(default=date.today, verbose_name="Data de Cadastro")  # Auto now add
@@ -20,6 +33,10 @@ class Usuario(models.Model):
         verbose_name = "Usuário"
         verbose_name_plural = "Usuários"
         ordering = ['-data', 'nome']
+        indexes = [
+            # Avaliações de especialistas: JOIN em usuario filtrando por tipo
+            models.Index(fields=['tipo'], name='usuario_tipo_idx'),
+        ]
 
     def __str__(self):
         return f"{self.nome} ({self.email})"
@@ -27,23 +44,26 @@ class Usuario(models.Model):
     # Sobrescrever o método save para hashear a senha
     def save(self, *args, **kwargs):
         # Se a senha foi alterada e não está hasheada, hash ela
-        if self.senha and not self.senha.startswith('pbkdf2_sha256$'):
+        # (o algoritmo vem de settings.PASSWORD_HASHERS)
+        if self.senha and not senha_hasheada(self.senha):
             self.senha = make_password(self.senha)
         super().save(*args, **kwargs)
 
     # Método para verificar senha (com hash)
     def verificar_senha(self, senha):
-        # Se a senha armazenada começar com 'pbkdf2_sha256$', então está hasheada
-        if self.senha.startswith('pbkdf2_sha256$'):
-            return check_password(senha, self.senha)
-        else:
-            # Senha em texto claro
-            if self.senha == senha:
-                # Atualiza para hash e salva
-                self.senha = make_password(senha)
-                self.save()
-                return True
-            return False
+        if senha_hasheada(self.senha):
+            # check_password chama o setter quando o hash usa um algoritmo ou
+            # custo diferente do preferido, regravando só a coluna senha
+            return check_password(senha, self.senha, setter=self._atualizar_hash)
+        # Senha legada em texto claro (ver `python manage.py hashear_senhas`)
+        if self.senha and constant_time_compare(self.senha, senha):
+            self._atualizar_hash(senha)
+            return True
+        return False
+
+    def _atualizar_hash(self, senha):
+        self.senha = make_password(senha)
+        self.save(update_fields=['senha'])
 
     # Propriedade para verificar se é admin
     @property
@@ -63,6 +83,38 @@ class Usuario(models.Model):
         return f"https://ui-avatars.com/api/?name={self.nome}&background=random&color=fff&size=100"
 
 
+# ===============================================================
+# PONTO GEOGRÁFICO
+# ===============================================================
+class PontoGeografico(models.Model):
+    """Coordenadas + quadkey, o índice espacial usado pelo mapa (ver app/geo.py)."""
+    latitude = models.FloatField(null=True, blank=True, verbose_name="Latitude")
+    longitude = models.FloatField(null=True, blank=True, verbose_name="Longitude")
+    quadkey = models.BigIntegerField(null=True, blank=True, editable=False, verbose_name="Célula Geográfica")
+
+    class Meta:
+        abstract = True
+
+    def atualizar_quadkey(self):
+        # bulk_create não passa por save(): quem cria em lote chama isto antes
+        self.quadkey = quadkey_do_ponto(self.latitude, self.longitude)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Posição gravada, para os agrupamentos do mapa saberem de onde o ponto saiu
+        instance._quadkey_salvo = instance.__dict__.get('quadkey')
+        return instance
+
+    def save(self, *args, **kwargs):
+        self.atualizar_quadkey()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'quadkey'}
+        super().save(*args, **kwargs)
+        self._quadkey_salvo = self.quadkey
+
+
 # ===============================================================
 # DESASTRE
 # ===============================================================
@@ -70,10 +122,17 @@ class Desastre(models.Model):
     titulo = models.CharField(max_length=100, verbose_name="Título")
     descricao = models.CharField(max_length=255, null=True, blank=True, verbose_name="Descrição")
     icone = models.CharField(max_length=100, null=True, blank=True, verbose_name="Ícone")
+    # Identificador na base de origem; chave do upsert do import_eventos
+    codigo_externo = models.CharField(max_length=64, null=True, blank=True, unique=True,
+                                      verbose_name="Código Externo")
 
     class Meta:
         verbose_name = "Desastre"
         verbose_name_plural = "Desastres"
+        indexes = [
+            # Paginação por chave da listagem (ordem titulo, id)
+            models.Index(fields=['titulo', 'id'], name='desastre_titulo_idx'),
+        ]
 
     def __str__(self):
         return self.titulo
@@ -82,15 +141,23 @@ class Desastre(models.Model):
 # ===============================================================
 # ACONTECIMENTO
 # ===============================================================
-class Acontecimento(models.Model):
+class Acontecimento(PontoGeografico):
     titulo = models.CharField(max_length=100, verbose_name="Título")
     descricao = models.TextField(null=True, blank=True, verbose_name="Descrição")
     dataAcontecimento = models.DateField(null=True, blank=True, verbose_name="Data do Acontecimento")
     risco = models.CharField(max_length=45, null=True, blank=True, verbose_name="Risco")
+    codigo_externo = models.CharField(max_length=64, null=True, blank=True, unique=True,
+                                      verbose_name="Código Externo")
 
     class Meta:
         verbose_name = "Acontecimento"
         verbose_name_plural = "Acontecimentos"
+        indexes = [
+            # Histórico mais recente primeiro, paginado por (data, id)
+            models.Index(fields=['-dataAcontecimento', '-id'], name='acontecimento_data_idx'),
+            models.Index(fields=['quadkey'], name='acontecimento_quadkey_idx',
+                         condition=models.Q(quadkey__isnull=False)),
+        ]
 
     def __str__(self):
         return self.titulo
@@ -99,7 +166,7 @@ class Acontecimento(models.Model):
 # ===============================================================
 # RISCO
 # ===============================================================
-class Risco(models.Model):
+class Risco(PontoGeografico):
     nome = models.CharField(max_length=100, verbose_name="Nome")
     nivel = models.CharField(max_length=45, null=True, blank=True, verbose_name="Nível")
     descricao = models.TextField(null=True, blank=True, verbose_name="Descrição")
@@ -109,10 +176,16 @@ class Risco(models.Model):
         on_delete=models.CASCADE,
         verbose_name="Desastre Relacionado"
     )
+    codigo_externo = models.CharField(max_length=64, null=True, blank=True, unique=True,
+                                      verbose_name="Código Externo")
 
     class Meta:
         verbose_name = "Risco"
         verbose_name_plural = "Riscos"
+        indexes = [
+            models.Index(fields=['quadkey'], name='risco_quadkey_idx',
+                         condition=models.Q(quadkey__isnull=False)),
+        ]
 
     def __str__(self):
         return self.nome
@@ -169,13 +242,42 @@ class Jogo(models.Model):
     tempo_jogo_medio = models.CharField(max_length=20, default="12h", verbose_name="Tempo de Jogo Médio")
     aprendizado_efetivo = models.CharField(max_length=20, default="95%", verbose_name="Aprendizado Efetivo")
     
+    # Estatísticas das avaliações (mantidas pelos sinais de Avaliacao;
+    # recalcule com `python manage.py recalcular_avaliacoes`)
+    avaliacoes_total = models.IntegerField(default=0, verbose_name="Total de Avaliações")
+    avaliacoes_soma = models.BigIntegerField(default=0, verbose_name="Soma das Notas")
+    avaliacoes_nota_1 = models.IntegerField(default=0, verbose_name="Avaliações Nota 1")
+    avaliacoes_nota_2 = models.IntegerField(default=0, verbose_name="Avaliações Nota 2")
+    avaliacoes_nota_3 = models.IntegerField(default=0, verbose_name="Avaliações Nota 3")
+    avaliacoes_nota_4 = models.IntegerField(default=0, verbose_name="Avaliações Nota 4")
+    avaliacoes_nota_5 = models.IntegerField(default=0, verbose_name="Avaliações Nota 5")
+    
+    CAMPOS_ESTATISTICA_AVALIACOES = (
+        'avaliacoes_total', 'avaliacoes_soma', 'avaliacoes_nota_1', 'avaliacoes_nota_2',
+        'avaliacoes_nota_3', 'avaliacoes_nota_4', 'avaliacoes_nota_5',
+    )
+    
     class Meta:
         verbose_name = "Jogo"
         verbose_name_plural = "Jogos"
+        indexes = [
+            # Jogo.objects.filter(ativo=True).order_by('pk').first()
+            models.Index(fields=['id'], condition=models.Q(ativo=True), name='jogo_ativo_idx'),
+        ]
 
     def __str__(self):
         return self.titulo
     
+    def save(self, *args, **kwargs):
+        # As estatísticas de avaliação só mudam por incremento (F) ou pelo
+        # comando de recálculo; um save comum (ex.: admin) não as sobrescreve.
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.CAMPOS_ESTATISTICA_AVALIACOES
+            ]
+        super().save(*args, **kwargs)
+    
     @property
     def plataformas_lista(self):
         return [p.strip() for p in self.plataformas.split(',')]
@@ -186,6 +288,28 @@ class Jogo(models.Model):
             return self.imagem_capa
         return "https://images.unsplash.com/photo-1593113630400-ea4288922497?q=80&w=1000"
     
+    @property
+    def media_notas(self):
+        if self.avaliacoes_total:
+            return self.avaliacoes_soma / self.avaliacoes_total
+        return None
+    
+    @property
+    def distribuicao_notas(self):
+        return {nota: getattr(self, f'avaliacoes_nota_{nota}') for nota in range(5, 0, -1)}
+    
+    @staticmethod
+    def campos_estatistica(nota, delta):
+        """Expressões F para somar (delta=1) ou remover (delta=-1) uma nota."""
+        campos = {
+            'avaliacoes_total': models.F('avaliacoes_total') + delta,
+            'avaliacoes_soma': models.F('avaliacoes_soma') + delta * nota,
+        }
+        if 1 <= nota <= 5:
+            campo = f'avaliacoes_nota_{nota}'
+            campos[campo] = models.F(campo) + delta
+        return campos
+    
     
 # Adicione ao arquivo models.py:
 
@@ -199,6 +323,12 @@ class CaracteristicaJogo(models.Model):
         verbose_name = "Característica do Jogo"
         verbose_name_plural = "Características do Jogo"
         ordering = ['ordem']
+        indexes = [
+            models.Index(fields=['jogo', 'ordem'], name='caracteristica_jogo_ordem_idx'),
+        ]
+
+    # Relações lidas pelo __str__ (select_related nas listagens/selects do admin)
+    RELACIONADOS_STR = ('jogo',)
 
     def __str__(self):
         return f"{self.jogo.titulo} - {self.descricao[:30]}..."
@@ -217,6 +347,8 @@ class RequisitoJogo(models.Model):
         verbose_name = "Requisito do Jogo"
         verbose_name_plural = "Requisitos do Jogo"
 
+    RELACIONADOS_STR = ('jogo',)
+
     def __str__(self):
         return f"{self.jogo.titulo} - {self.get_tipo_display()}"
 
@@ -232,6 +364,11 @@ class AtualizacaoJogo(models.Model):
         verbose_name = "Atualização do Jogo"
         verbose_name_plural = "Atualizações do Jogo"
         ordering = ['-data', '-ordem']
+        indexes = [
+            models.Index(fields=['jogo', '-data'], name='atualizacao_jogo_data_idx'),
+        ]
+
+    RELACIONADOS_STR = ('jogo',)
 
     def __str__(self):
         return f"{self.jogo.titulo} - v{self.versao}"
@@ -264,6 +401,16 @@ class FAQJogo(models.Model):
         verbose_name = "FAQ do Jogo"
         verbose_name_plural = "FAQs do Jogo"
         ordering = ['ordem', 'categoria', 'data_criacao']
+        indexes = [
+            # Só as FAQs exibidas no site entram no índice da página do jogo
+            models.Index(
+                fields=['jogo', 'ordem', 'categoria'],
+                condition=models.Q(ativo=True, visivel=True),
+                name='faqjogo_visiveis_idx'
+            ),
+        ]
+
+    RELACIONADOS_STR = ('jogo',)
 
     def __str__(self):
         return f"{self.jogo.titulo} - {self.pergunta[:50]}..."
@@ -278,6 +425,11 @@ class ImagemJogo(models.Model):
         verbose_name = "Imagem do Jogo"
         verbose_name_plural = "Imagens do Jogo"
         ordering = ['ordem']
+        indexes = [
+            models.Index(fields=['jogo', 'ordem'], name='imagem_jogo_ordem_idx'),
+        ]
+
+    RELACIONADOS_STR = ('jogo',)
 
     def __str__(self):
         return f"{self.jogo.titulo} - Imagem {self.id}"
@@ -349,10 +501,28 @@ class Avaliacao(models.Model):
     class Meta:
         verbose_name = "Avaliação"
         verbose_name_plural = "Avaliações"
+        indexes = [
+            models.Index(fields=['jogo', '-nota'], name='avaliacao_jogo_nota_idx'),
+        ]
+
+    RELACIONADOS_STR = ('jogo',)
 
     def __str__(self):
         return f"{self.jogo.titulo} - {self.nota}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._nota_salva = (instance.__dict__.get('jogo_id'), instance.__dict__.get('nota'))
+        return instance
+
+    # As estatísticas do jogo são atualizadas em post_save (app/signals.py),
+    # dentro desta mesma transação.
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+        self._nota_salva = (self.jogo_id, self.nota)
+
 
 # ===============================================================
 # TÓPICO ARTIGO
@@ -385,6 +555,8 @@ class TopicoDesastre(models.Model):
         on_delete=models.CASCADE,
         verbose_name="Desastre"
     )
+    codigo_externo = models.CharField(max_length=64, null=True, blank=True, unique=True,
+                                      verbose_name="Código Externo")
 
     class Meta:
         verbose_name = "Tópico do Desastre"
@@ -475,6 +647,12 @@ class PerguntaUsuario(models.Model):
         verbose_name = "Pergunta do Usuário"
         verbose_name_plural = "Perguntas dos Usuários"
         ordering = ['-data_envio', 'status']
+        indexes = [
+            # Changelist do admin filtrada por status (ex.: pendentes mais recentes)
+            models.Index(fields=['status', '-data_envio'], name='pergunta_status_data_idx'),
+            # "Minhas perguntas" na página do jogo, paginadas por chave (app/paginas.py)
+            models.Index(fields=['usuario', '-data_envio', '-id'], name='pergunta_usuario_data_idx'),
+        ]
     
     def __str__(self):
         return f"{self.pergunta[:50]}... - {self.get_status_display()}"
@@ -484,4 +662,153 @@ class PerguntaUsuario(models.Model):
         from django.utils import timezone
         from django.utils.timesince import timesince
         
-        return timesince(self.data_envio, timezone.now())
\ No newline at end of file
+        return timesince(self.data_envio, timezone.now())
+
+
+# ===============================================================
+# DOCUMENTO DE BUSCA
+# ===============================================================
+class DocumentoBusca(models.Model):
+    """Cópia desnormalizada do texto pesquisável de cada objeto (ver app/busca.py).
+
+    No PostgreSQL a tabela tem ainda a coluna gerada `vetor` (tsvector em
+    português) com índice GIN, criada na migração e invisível ao ORM.
+    """
+    TIPO_CHOICES = [
+        ('artigo', 'Artigo'),
+        ('topico_artigo', 'Tópico de Artigo'),
+        ('topico_desastre', 'Tópico de Desastre'),
+        ('faq', 'FAQ'),
+    ]
+
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES, verbose_name="Tipo")
+    objeto_id = models.BigIntegerField(verbose_name="ID do Objeto")
+    titulo = models.CharField(max_length=255, verbose_name="Título")
+    texto = models.TextField(blank=True, default="", verbose_name="Texto")
+    url = models.CharField(max_length=200, verbose_name="URL")
+    atualizado_em = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
+
+    class Meta:
+        verbose_name = "Documento de Busca"
+        verbose_name_plural = "Documentos de Busca"
+        constraints = [
+            models.UniqueConstraint(fields=['tipo', 'objeto_id'], name='documento_busca_objeto_unico'),
+        ]
+        indexes = [
+            # Índice em memória (SQLite) busca só o que mudou desde a última sincronização
+            models.Index(fields=['atualizado_em'], name='documento_busca_atualizado_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()}: {self.titulo}"
+
+
+# ===============================================================
+# TAREFA (FILA DE TRABALHOS EM SEGUNDO PLANO)
+# ===============================================================
+class Tarefa(models.Model):
+    """Trabalho enfileirado no banco e executado pelo comando run_workers (ver app/tarefas.py)."""
+    STATUS_CHOICES = [
+        ('pendente', 'Pendente'),
+        ('executando', 'Executando'),
+        ('concluida', 'Concluída'),
+        ('falhou', 'Falhou'),
+    ]
+    STATUS_ATIVOS = ('pendente', 'executando')
+
+    tipo = models.CharField(max_length=50, verbose_name="Tipo")
+    parametros = models.JSONField(default=dict, blank=True, verbose_name="Parâmetros")
+    chave = models.CharField(max_length=100, null=True, blank=True, verbose_name="Chave de Idempotência")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pendente', verbose_name="Status")
+
+    tentativas = models.PositiveSmallIntegerField(default=0, verbose_name="Tentativas")
+    maximo_tentativas = models.PositiveSmallIntegerField(default=3, verbose_name="Máximo de Tentativas")
+    erro = models.TextField(blank=True, default="", verbose_name="Último Erro")
+
+    progresso = models.PositiveIntegerField(default=0, verbose_name="Progresso")
+    total = models.PositiveIntegerField(null=True, blank=True, verbose_name="Total")
+    resultado = models.CharField(max_length=255, blank=True, default="", verbose_name="Resultado")
+
+    # Uma tarefa em execução cujo prazo passou (trabalhador morto) volta para a fila
+    disponivel_em = models.DateTimeField(default=timezone.now, verbose_name="Disponível em")
+    prazo = models.DateTimeField(null=True, blank=True, verbose_name="Prazo da Execução")
+    trabalhador = models.CharField(max_length=100, blank=True, default="", verbose_name="Trabalhador")
+
+    criada_em = models.DateTimeField(auto_now_add=True, verbose_name="Criada em")
+    iniciada_em = models.DateTimeField(null=True, blank=True, verbose_name="Iniciada em")
+    concluida_em = models.DateTimeField(null=True, blank=True, verbose_name="Concluída em")
+
+    class Meta:
+        verbose_name = "Tarefa"
+        verbose_name_plural = "Tarefas"
+        ordering = ['-criada_em']
+        constraints = [
+            # A mesma chave só pode estar na fila uma vez; depois de concluída, pode voltar
+            models.UniqueConstraint(
+                fields=['chave'], condition=models.Q(status__in=['pendente', 'executando']),
+                name='tarefa_chave_ativa_unica'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'disponivel_em'], name='tarefa_fila_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo} #{self.pk} ({self.get_status_display()})"
+
+    @property
+    def percentual(self):
+        if self.status == 'concluida':
+            return 100
+        if not self.total:
+            return 0
+        return min(100, self.progresso * 100 // self.total)
+
+
+# ===============================================================
+# EMAIL PENDENTE (CAIXA DE SAÍDA)
+# ===============================================================
+class EmailPendente(models.Model):
+    """Email na caixa de saída, enviado em lotes pela tarefa enviar_emails (ver app/emails.py)."""
+    STATUS_CHOICES = [
+        ('pendente', 'Pendente'),
+        ('enviando', 'Enviando'),
+        ('enviado', 'Enviado'),
+        ('falhou', 'Falhou'),
+    ]
+
+    pergunta = models.ForeignKey(
+        PerguntaUsuario,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='emails',
+        verbose_name="Pergunta"
+    )
+    destinatario = models.EmailField(verbose_name="Destinatário")
+    assunto = models.CharField(max_length=255, verbose_name="Assunto")
+    corpo = models.TextField(verbose_name="Corpo")
+    # Evita emails repetidos quando a tarefa que os gerou roda de novo
+    chave = models.CharField(max_length=100, unique=True, verbose_name="Chave de Idempotência")
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pendente', verbose_name="Status")
+    tentativas = models.PositiveSmallIntegerField(default=0, verbose_name="Tentativas")
+    erro = models.TextField(blank=True, default="", verbose_name="Último Erro")
+    disponivel_em = models.DateTimeField(default=timezone.now, verbose_name="Disponível em")
+    reservado_ate = models.DateTimeField(null=True, blank=True, verbose_name="Reservado até")
+    lote = models.CharField(max_length=32, blank=True, default="", verbose_name="Lote de Envio")
+
+    criado_em = models.DateTimeField(auto_now_add=True, verbose_name="Criado em")
+    enviado_em = models.DateTimeField(null=True, blank=True, verbose_name="Enviado em")
+
+    class Meta:
+        verbose_name = "Email Pendente"
+        verbose_name_plural = "Emails Pendentes"
+        ordering = ['-criado_em']
+        indexes = [
+            models.Index(fields=['status', 'disponivel_em'], name='email_fila_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.destinatario}: {self.assunto}"
+
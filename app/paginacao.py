@@ -0,0 +1,101 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+# ===============================================================
+# PAGINAÇÃO POR CHAVE (KEYSET / SEEK)
+# ===============================================================
+# Em vez de OFFSET, cada página continua a partir dos valores de ordenação
+# do último item da página anterior (o "cursor"). Com um índice nas mesmas
+# colunas, a página 1 e a página 10.000 custam o mesmo.
+TAMANHO_PAGINA = 12
+
+
+@dataclass(frozen=True)
+class ResultadoPaginado:
+    itens: tuple
+    proximo_cursor: str = None
+
+    @property
+    def tem_proxima(self):
+        return self.proximo_cursor is not None
+
+
+def codificar_cursor(valores):
+    valores = [v.isoformat() if hasattr(v, 'isoformat') else v for v in valores]
+    return base64.urlsafe_b64encode(json.dumps(valores).encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor, quantidade):
+    """Retorna a lista de valores ou None se o cursor for inválido."""
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        valores = json.loads(bruto)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        return None
+    if not isinstance(valores, list) or len(valores) != quantidade:
+        return None
+    return valores
+
+
+def converter_cursor(modelo, campos, valores):
+    """Valores do cursor no tipo de cada campo da ordenação; None se algum não servir."""
+    convertidos = []
+    for nome, valor in zip(campos, valores):
+        campo = modelo._meta.get_field(nome)
+        try:
+            valor = campo.to_python(valor)
+            campo.run_validators(valor)
+        except (ValidationError, ValueError, TypeError):
+            return None
+        if valor is None:
+            return None
+        convertidos.append(valor)
+    return convertidos
+
+
+def filtro_apos(campos, valores, descendente):
+    """(a, b) > (va, vb)  ==  a >= va E (a > va OU (a = va E b > vb)); < quando descendente.
+
+    O `a >= va` é redundante, mas sem ele o banco não enxerga no OU um
+    intervalo do índice e percorre o índice desde o início a cada página.
+    """
+    operador = 'lt' if descendente else 'gt'
+    filtro = Q()
+    for i, campo in enumerate(campos):
+        condicao = Q(**{f'{campo}__{operador}': valores[i]})
+        for anterior, valor in zip(campos[:i], valores[:i]):
+            condicao &= Q(**{anterior: valor})
+        filtro |= condicao
+    if len(campos) > 1:
+        filtro = Q(**{f'{campos[0]}__{operador}e': valores[0]}) & filtro
+    return filtro
+
+
+def paginar_keyset(queryset, ordem, cursor=None, tamanho=TAMANHO_PAGINA):
+    """Uma página de `queryset` ordenada por `ordem`.
+
+    `ordem` deve terminar numa coluna única (normalmente 'id'/'-id'), ter
+    todas as colunas na mesma direção e não conter valores nulos.
+    """
+    descendente = ordem[0].startswith('-')
+    campos = [campo.lstrip('-') for campo in ordem]
+
+    if cursor:
+        valores = decodificar_cursor(cursor, len(campos))
+        if valores is not None:
+            # O cursor vem do cliente: valor de tipo errado vale como cursor inválido
+            valores = converter_cursor(queryset.model, campos, valores)
+        if valores is not None:
+            queryset = queryset.filter(filtro_apos(campos, valores, descendente))
+
+    itens = list(queryset.order_by(*ordem)[:tamanho + 1])
+    proximo_cursor = None
+    if len(itens) > tamanho:
+        itens = itens[:tamanho]
+        proximo_cursor = codificar_cursor([getattr(itens[-1], campo) for campo in campos])
+    return ResultadoPaginado(itens=tuple(itens), proximo_cursor=proximo_cursor)
@@ -0,0 +1,413 @@
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from datetime import date
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Prefetch
+from django.template import TemplateSyntaxError
+from django.template.loader import get_template
+from django.urls import reverse
+from django.utils import dateformat, timezone
+
+from .models import (
+    Jogo, CaracteristicaJogo, RequisitoJogo, AtualizacaoJogo,
+    FAQJogo, ImagemJogo, Avaliacao, PerguntaUsuario,
+    Desastre, Risco, Acontecimento, Artigo, TopicoArtigo, TopicoDesastre
+)
+from .paginacao import paginar_keyset
+
+logger = logging.getLogger(__name__)
+
+# ===============================================================
+# MONTAGEM DA PÁGINA DO JOGO
+# ===============================================================
+TIPOS_ESPECIALISTA = ['especialista', 'admin', 'editor']
+LIMITE_ATUALIZACOES = 5
+LIMITE_IMAGENS = 4
+LIMITE_AVALIACOES_ESPECIALISTAS = 3
+
+# Valores exibidos enquanto o jogo ainda não tem avaliações
+MEDIA_PADRAO = 4.8
+TOTAL_PADRAO = 50
+
+
+@dataclass(frozen=True)
+class PaginaJogo:
+    """Dados já carregados para renderizar jogo.html (somente leitura)."""
+    jogo: Jogo
+    caracteristicas: tuple
+    requisitos_minimos: tuple
+    requisitos_recomendados: tuple
+    atualizacoes: tuple
+    imagens: tuple
+    avaliacoes_especialistas: tuple
+    media_avaliacoes: float
+    total_avaliacoes: int
+
+    def contexto(self):
+        contexto = {
+            'jogo': self.jogo,
+            'caracteristicas': self.caracteristicas,
+            'requisitos_minimos': self.requisitos_minimos,
+            'requisitos_recomendados': self.requisitos_recomendados,
+            'atualizacoes': self.atualizacoes,
+            'imagens': self.imagens,
+            'avaliacoes_especialistas': self.avaliacoes_especialistas,
+            'media_avaliacoes': self.media_avaliacoes,
+            'total_avaliacoes': self.total_avaliacoes,
+        }
+        # Lidas a cada requisição: a PaginaJogo em cache não envelhece com elas
+        contexto['secoes'] = secoes = versoes_secoes(self.jogo.pk)
+        contexto['tempo_cache_secoes'] = TEMPO_CACHE_PAGINA
+        contexto['faqs'] = arvore_faqs(self.jogo.pk, secoes['faqs'])
+        return contexto
+
+
+def jogo_queryset():
+    """Queryset do jogo com todas as coleções da página pré-carregadas."""
+    return Jogo.objects.filter(ativo=True).prefetch_related(
+        Prefetch(
+            'caracteristicas',
+            queryset=CaracteristicaJogo.objects.order_by('ordem'),
+            to_attr='caracteristicas_ordenadas'
+        ),
+        Prefetch(
+            'requisitos',
+            queryset=RequisitoJogo.objects.order_by('id'),
+            to_attr='requisitos_lista'
+        ),
+        Prefetch(
+            'atualizacoes',
+            queryset=AtualizacaoJogo.objects.order_by('-data')[:LIMITE_ATUALIZACOES],
+            to_attr='atualizacoes_recentes'
+        ),
+        Prefetch(
+            'imagens',
+            queryset=ImagemJogo.objects.order_by('ordem')[:LIMITE_IMAGENS],
+            to_attr='imagens_galeria'
+        ),
+        Prefetch(
+            'avaliacao_set',
+            queryset=Avaliacao.objects.filter(
+                usuario__tipo__in=TIPOS_ESPECIALISTA
+            ).select_related('usuario').order_by('-nota')[:LIMITE_AVALIACOES_ESPECIALISTAS],
+            to_attr='avaliacoes_especialistas'
+        ),
+    )
+
+
+def carregar_pagina_jogo():
+    """Monta a página do jogo ativo em uma consulta principal + prefetches.
+
+    Média e total de avaliações vêm das colunas desnormalizadas do Jogo; as
+    FAQs vêm da árvore em cache (arvore_faqs).
+
+    Retorna None quando não há jogo ativo.
+    """
+    jogo = jogo_queryset().order_by('pk').first()
+    if jogo is None:
+        return None
+
+    requisitos = jogo.requisitos_lista
+
+    return PaginaJogo(
+        jogo=jogo,
+        caracteristicas=tuple(jogo.caracteristicas_ordenadas),
+        requisitos_minimos=tuple(r for r in requisitos if r.tipo == 'minimo'),
+        requisitos_recomendados=tuple(r for r in requisitos if r.tipo == 'recomendado'),
+        atualizacoes=tuple(jogo.atualizacoes_recentes),
+        imagens=tuple(jogo.imagens_galeria),
+        avaliacoes_especialistas=tuple(jogo.avaliacoes_especialistas),
+        media_avaliacoes=jogo.media_notas or MEDIA_PADRAO,
+        total_avaliacoes=jogo.avaliacoes_total or TOTAL_PADRAO,
+    )
+
+
+# ===============================================================
+# CACHE VERSIONADO DA PÁGINA DO JOGO
+# ===============================================================
+# O contexto (PaginaJogo) é guardado por jogo + versão; as partes que
+# dependem do usuário (user_info, mensagens, csrf) continuam vindo dos
+# context processors na hora de renderizar. Ver app/signals.py.
+#
+# As seções pesadas de jogo.html ficam também em cache de fragmento
+# ({% cache %}), cada uma com a sua versão: editar uma FAQ regera só o HTML
+# das FAQs, e as avaliações, a linha do tempo e a galeria continuam em cache.
+CHAVE_JOGO_ATIVO = 'pagina_jogo:ativo'
+TEMPO_CACHE_PAGINA = 60 * 10
+SECOES_PAGINA = ('faqs', 'avaliacoes', 'atualizacoes', 'imagens')
+
+
+def chave_versao_jogo(jogo_id):
+    return f'pagina_jogo:{jogo_id}:versao'
+
+
+def chave_versao_secao(jogo_id, secao):
+    return f'pagina_jogo:{jogo_id}:{secao}:versao'
+
+
+def chave_pagina_jogo(jogo_id, versao):
+    return f'pagina_jogo:{jogo_id}:v{versao}'
+
+
+def versao_jogo(jogo_id):
+    return cache.get_or_set(chave_versao_jogo(jogo_id), 1, None)
+
+
+def versoes_secoes(jogo_id):
+    """Versão de cada seção em cache de fragmento, lidas numa só ida ao cache."""
+    chaves = {secao: chave_versao_secao(jogo_id, secao) for secao in SECOES_PAGINA}
+    versoes = cache.get_many(chaves.values())
+    for chave in chaves.values():
+        if chave not in versoes:
+            cache.add(chave, 1, None)
+    return {secao: versoes.get(chave, 1) for secao, chave in chaves.items()}
+
+
+def incrementar_versao(chave):
+    cache.add(chave, 1, None)
+    try:
+        cache.incr(chave)
+    except ValueError:
+        # A chave expirou entre o add e o incr
+        cache.set(chave, 2, None)
+
+
+def invalidar_pagina_jogo(*jogo_ids, secoes=SECOES_PAGINA):
+    """Incrementa a versão dos jogos informados, descartando o contexto em cache.
+
+    `secoes` diz quais fragmentos de jogo.html também mudaram; por padrão, todos.
+    A troca espera o commit da transação corrente (fora de uma, é imediata):
+    antes dele, uma requisição concorrente ainda lê as linhas antigas e as
+    guardaria no cache já com a versão nova.
+    """
+    jogo_ids = {jogo_id for jogo_id in jogo_ids if jogo_id is not None}
+    transaction.on_commit(lambda: trocar_versoes_jogo(jogo_ids, secoes))
+
+
+def trocar_versoes_jogo(jogo_ids, secoes):
+    for jogo_id in jogo_ids:
+        incrementar_versao(chave_versao_jogo(jogo_id))
+        for secao in secoes:
+            incrementar_versao(chave_versao_secao(jogo_id, secao))
+    # O jogo ativo pode ter mudado (ativo=False, exclusão, novo jogo)
+    cache.delete(CHAVE_JOGO_ATIVO)
+
+
+def invalidar_faqs(*jogo_ids):
+    """As FAQs ficam fora da PaginaJogo: basta trocar a versão da seção (no commit)."""
+    jogo_ids = {jogo_id for jogo_id in jogo_ids if jogo_id is not None}
+
+    def trocar_versoes():
+        for jogo_id in jogo_ids:
+            incrementar_versao(chave_versao_secao(jogo_id, 'faqs'))
+    transaction.on_commit(trocar_versoes)
+
+
+def obter_pagina_jogo():
+    """Versão em cache de carregar_pagina_jogo(); só consulta o banco em caso de miss."""
+    jogo_id = cache.get(CHAVE_JOGO_ATIVO)
+    versao = None
+    if jogo_id is not None:
+        versao = versao_jogo(jogo_id)
+        pagina = cache.get(chave_pagina_jogo(jogo_id, versao))
+        if pagina is not None:
+            return pagina
+
+    pagina = carregar_pagina_jogo()
+    if pagina is None:
+        return None
+
+    if pagina.jogo.pk != jogo_id:
+        jogo_id = pagina.jogo.pk
+        versao = versao_jogo(jogo_id)
+    cache.set(chave_pagina_jogo(jogo_id, versao), pagina, TEMPO_CACHE_PAGINA)
+    cache.set(CHAVE_JOGO_ATIVO, jogo_id, TEMPO_CACHE_PAGINA)
+    return pagina
+
+
+# ===============================================================
+# ÁRVORE DE FAQs
+# ===============================================================
+# As FAQs visíveis de cada jogo são agrupadas por categoria uma vez por
+# versão da seção 'faqs' e guardadas prontas no cache, inclusive o JSON:
+# a página lê a árvore numa ida ao cache e o endpoint (FAQsJogoView)
+# devolve os bytes sem serializar nada. Editar uma FAQ (ou o jogo) só troca
+# a versão. O ETag é o hash do JSON, calculado junto com ele: não depende do
+# contador de versão, que recomeça quando o cache é perdido.
+CATEGORIAS_FAQ = dict(FAQJogo._meta.get_field('categoria').flatchoices)
+
+
+@dataclass(frozen=True)
+class CategoriaFAQ:
+    categoria: str  # valor gravado ('tecnico')
+    nome: str       # rótulo exibido ('Técnico')
+    faqs: tuple     # ({'id', 'pergunta', 'resposta', 'atualizada_em'}, ...)
+    json: bytes     # {"categoria", "nome", "faqs"}
+    etag: str
+
+
+@dataclass(frozen=True)
+class ArvoreFAQ:
+    """FAQs visíveis de um jogo por categoria, na ordem de exibição."""
+    versao: int
+    jogo_ativo: bool  # jogo inexistente ou inativo: árvore vazia
+    categorias: dict  # categoria -> CategoriaFAQ
+    json: bytes       # índice: nome, total e url de cada categoria
+    etag: str
+
+
+def chave_arvore_faqs(jogo_id, versao):
+    return f'faqs:{jogo_id}:v{versao}'
+
+
+def serializar(dados):
+    return json.dumps(dados, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+def etag_do_json(conteudo):
+    return f'"{hashlib.sha1(conteudo).hexdigest()[:20]}"'
+
+
+def montar_arvore_faqs(jogo_id, versao):
+    grupos = {}
+    jogo_ativo = Jogo.objects.filter(pk=jogo_id, ativo=True).exists()
+    linhas = FAQJogo.objects.filter(jogo_id=jogo_id, ativo=True, visivel=True).order_by(
+        'ordem', 'categoria'
+    ).values_list('pk', 'categoria', 'pergunta', 'resposta', 'data_atualizacao') if jogo_ativo else ()
+    for pk, categoria, pergunta, resposta, atualizada in linhas:
+        grupos.setdefault(categoria, []).append({
+            'id': pk,
+            'pergunta': pergunta,
+            'resposta': resposta,
+            'atualizada_em': dateformat.format(timezone.localtime(atualizada), 'd/m/Y'),
+        })
+
+    categorias, indice = {}, []
+    for categoria, faqs in grupos.items():
+        nome = CATEGORIAS_FAQ.get(categoria, categoria)
+        conteudo = serializar({'categoria': categoria, 'nome': nome, 'faqs': faqs})
+        categorias[categoria] = CategoriaFAQ(categoria, nome, tuple(faqs), conteudo, etag_do_json(conteudo))
+        indice.append({
+            'categoria': categoria, 'nome': nome, 'total': len(faqs),
+            'url': reverse('jogo_faqs_categoria', args=[jogo_id, categoria]),
+        })
+    conteudo = serializar({'jogo': jogo_id, 'categorias': indice})
+    return ArvoreFAQ(versao, jogo_ativo, categorias, conteudo, etag_do_json(conteudo))
+
+
+def arvore_faqs(jogo_id, versao=None):
+    """Árvore de FAQs do jogo; só consulta o banco quando a versão muda."""
+    if versao is None:
+        versao = cache.get_or_set(chave_versao_secao(jogo_id, 'faqs'), 1, None)
+    return cache.get_or_set(
+        chave_arvore_faqs(jogo_id, versao), lambda: montar_arvore_faqs(jogo_id, versao), TEMPO_CACHE_PAGINA
+    )
+
+
+# ===============================================================
+# LISTAGENS DE DESASTRES, ACONTECIMENTOS, ARTIGOS E PERGUNTAS
+# ===============================================================
+# Todas paginadas por chave (app/paginacao.py). Cada ordenação tem um
+# índice correspondente em models.py, então a página N custa o mesmo que
+# a primeira.
+ORDEM_DESASTRES = ('titulo', 'id')
+ORDEM_ACONTECIMENTOS = ('-dataAcontecimento', '-id')
+ORDEM_ARTIGOS = ('-id',)
+ORDEM_PERGUNTAS_USUARIO = ('-data_envio', '-id')
+TAMANHO_PAGINA_PERGUNTAS = 10
+
+CHAVE_ESTATISTICAS_DESASTRES = 'desastres:estatisticas'
+TEMPO_CACHE_ESTATISTICAS = 60 * 10
+
+
+def desastres_queryset():
+    return Desastre.objects.prefetch_related(
+        Prefetch('risco_set', queryset=Risco.objects.order_by('nome'), to_attr='riscos'),
+        Prefetch('topicodesastre_set', queryset=TopicoDesastre.objects.order_by('id'), to_attr='topicos'),
+    )
+
+
+def artigos_queryset():
+    return Artigo.objects.select_related('usuario').prefetch_related(
+        Prefetch('topicoartigo_set', queryset=TopicoArtigo.objects.order_by('id'), to_attr='topicos'),
+    )
+
+
+def pagina_desastres(cursor=None):
+    return paginar_keyset(desastres_queryset(), ORDEM_DESASTRES, cursor)
+
+
+def pagina_acontecimentos(cursor=None):
+    # Acontecimentos sem data ficam de fora: a chave de ordenação não pode ser nula
+    queryset = Acontecimento.objects.filter(dataAcontecimento__isnull=False)
+    return paginar_keyset(queryset, ORDEM_ACONTECIMENTOS, cursor)
+
+
+def pagina_artigos(cursor=None):
+    return paginar_keyset(artigos_queryset(), ORDEM_ARTIGOS, cursor)
+
+
+def pagina_perguntas_do_usuario(usuario_id, cursor=None):
+    queryset = PerguntaUsuario.objects.filter(usuario_id=usuario_id).only('pergunta', 'status', 'data_envio')
+    return paginar_keyset(queryset, ORDEM_PERGUNTAS_USUARIO, cursor, TAMANHO_PAGINA_PERGUNTAS)
+
+
+def carregar_desastre(pk):
+    return desastres_queryset().filter(pk=pk).first()
+
+
+def carregar_artigo(pk):
+    return artigos_queryset().filter(pk=pk).first()
+
+
+def estatisticas_desastres():
+    """Contagens dos cards de estatísticas, recalculadas a cada TEMPO_CACHE_ESTATISTICAS."""
+    def calcular():
+        return {
+            'tipos': Desastre.objects.count(),
+            'ocorrencias_ano': Acontecimento.objects.filter(
+                dataAcontecimento__year=date.today().year
+            ).count(),
+            'riscos': Risco.objects.count(),
+            'localizacoes': Risco.objects.exclude(localizacao__isnull=True).exclude(
+                localizacao=''
+            ).values('localizacao').distinct().count(),
+        }
+    return cache.get_or_set(CHAVE_ESTATISTICAS_DESASTRES, calcular, TEMPO_CACHE_ESTATISTICAS)
+
+
+# ===============================================================
+# TEMPLATES DAS PÁGINAS
+# ===============================================================
+# Compilar um template (ler o arquivo, tokenizar, montar os nós) custa mais
+# que renderizá-lo. Com o loader em cache isso acontece uma vez por
+# processo; aquecer_templates faz essa vez na inicialização, e não na
+# primeira visita a cada página.
+PASTA_TEMPLATES = Path(__file__).resolve().parent / 'templates'
+
+
+def templates_das_paginas():
+    """base.html e os templates de página de app/templates."""
+    return sorted(caminho.name for caminho in PASTA_TEMPLATES.glob('*.html'))
+
+
+def aquecer_templates(nomes=None):
+    """Compila os templates no cache do loader; devolve {nome: segundos}."""
+    tempos = {}
+    for nome in nomes or templates_das_paginas():
+        inicio = time.perf_counter()
+        try:
+            get_template(nome)
+        except TemplateSyntaxError:
+            # A página com erro falha quando for aberta; as outras sobem normalmente
+            logger.exception('Template com erro de sintaxe: %s', nome)
+            continue
+        tempos[nome] = time.perf_counter() - inicio
+    return tempos
@@ -0,0 +1,169 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import (
+    Usuario, Jogo, CaracteristicaJogo, RequisitoJogo, AtualizacaoJogo,
+    FAQJogo, ImagemJogo, Avaliacao
+)
+from .autocompletar import MODELOS_AUTOCOMPLETAR, atualizar_autocompletar, remover_do_autocompletar
+from .busca import MODELOS_BUSCA, indexar, remover_do_indice
+from .mapa import CAMPO_NIVEL, ponto_adicionado, pontos_alterados
+from .middleware import invalidar_principal
+from .paginas import invalidar_faqs, invalidar_pagina_jogo
+from .tiles import tiles_em_disco
+
+# ===============================================================
+# INVALIDAÇÃO DA PÁGINA DO JOGO
+# ===============================================================
+# Avaliacao invalida a página junto com as estatísticas (mais abaixo)
+MODELOS_DA_PAGINA = [
+    CaracteristicaJogo, RequisitoJogo, AtualizacaoJogo,
+    ImagemJogo,
+]
+# Fragmento de jogo.html em cache que mostra cada modelo; os outros modelos
+# (e o próprio Jogo) aparecem fora dos fragmentos e só invalidam o contexto
+SECAO_DO_MODELO = {
+    AtualizacaoJogo: 'atualizacoes', ImagemJogo: 'imagens',
+}
+
+
+@receiver(post_save, sender=Jogo)
+@receiver(post_delete, sender=Jogo)
+def jogo_alterado(sender, instance, **kwargs):
+    invalidar_pagina_jogo(instance.pk, secoes=())
+    invalidar_faqs(instance.pk)  # a árvore de FAQs guarda se o jogo está ativo
+
+
+def item_do_jogo_alterado(sender, instance, **kwargs):
+    secao = SECAO_DO_MODELO.get(sender)
+    invalidar_pagina_jogo(instance.jogo_id, secoes=(secao,) if secao else ())
+
+
+for modelo in MODELOS_DA_PAGINA:
+    post_save.connect(item_do_jogo_alterado, sender=modelo, dispatch_uid=f'pagina_jogo_save_{modelo.__name__}')
+    post_delete.connect(item_do_jogo_alterado, sender=modelo, dispatch_uid=f'pagina_jogo_delete_{modelo.__name__}')
+
+
+@receiver(post_save, sender=FAQJogo)
+@receiver(post_delete, sender=FAQJogo)
+def faq_alterada(sender, instance, **kwargs):
+    invalidar_faqs(instance.jogo_id)
+
+
+def invalidar_jogos_do_usuario(*usuario_ids):
+    """Nome, imagem e tipo do usuário aparecem nas avaliações de especialistas."""
+    jogo_ids = Avaliacao.objects.filter(
+        usuario_id__in=usuario_ids
+    ).values_list('jogo_id', flat=True).distinct()
+    invalidar_pagina_jogo(*jogo_ids, secoes=('avaliacoes',))
+
+
+def invalidar_usuarios(*usuario_ids):
+    """Para alterações feitas com queryset.update(), que não disparam sinais."""
+    invalidar_principal(*usuario_ids)
+    invalidar_jogos_do_usuario(*usuario_ids)
+
+
+@receiver(post_save, sender=Usuario)
+def usuario_alterado(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        return
+    # Troca de senha não muda nada que apareça nas páginas
+    if update_fields is not None and set(update_fields) <= {'senha'}:
+        return
+    invalidar_usuarios(instance.pk)
+
+
+@receiver(post_delete, sender=Usuario)
+def usuario_removido(sender, instance, **kwargs):
+    invalidar_principal(instance.pk)
+
+
+# ===============================================================
+# ESTATÍSTICAS DE AVALIAÇÃO DO JOGO
+# ===============================================================
+# Rodam dentro da transação de Avaliacao.save() / do delete, então o
+# contador do jogo nunca diverge das linhas de Avaliacao. A página do jogo é
+# invalidada depois dos contadores (e a troca de versão só acontece no
+# commit): a PaginaJogo remontada já lê a média nova.
+def registrar_nota(jogo_id, nota, delta):
+    if jogo_id is None or nota is None:
+        return
+    Jogo.objects.filter(pk=jogo_id).update(**Jogo.campos_estatistica(nota, delta))
+
+
+@receiver(post_save, sender=Avaliacao)
+def avaliacao_salva(sender, instance, created, raw=False, **kwargs):
+    jogo_anterior, nota_anterior = (None, None) if created else getattr(instance, '_nota_salva', (None, None))
+    if not raw and (jogo_anterior, nota_anterior) != (instance.jogo_id, instance.nota):
+        registrar_nota(jogo_anterior, nota_anterior, -1)
+        registrar_nota(instance.jogo_id, instance.nota, 1)
+    invalidar_pagina_jogo(instance.jogo_id, jogo_anterior, secoes=('avaliacoes',))
+
+
+@receiver(post_delete, sender=Avaliacao)
+def avaliacao_removida(sender, instance, **kwargs):
+    jogo_id, nota = getattr(instance, '_nota_salva', (instance.jogo_id, instance.nota))
+    registrar_nota(jogo_id, nota, -1)
+    invalidar_pagina_jogo(instance.jogo_id, jogo_id, secoes=('avaliacoes',))
+
+
+# ===============================================================
+# AGRUPAMENTOS DO MAPA
+# ===============================================================
+def ponto_do_mapa_salvo(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        ponto_adicionado(instance.quadkey, instance.latitude, instance.longitude,
+                         getattr(instance, CAMPO_NIVEL[sender]))
+        tiles_em_disco.remover_do_ponto(instance.quadkey)
+    else:
+        quadkeys = (getattr(instance, '_quadkey_salvo', None), instance.quadkey)
+        pontos_alterados(*quadkeys)
+        tiles_em_disco.remover_do_ponto(*quadkeys)
+
+
+def ponto_do_mapa_removido(sender, instance, **kwargs):
+    quadkey = getattr(instance, '_quadkey_salvo', instance.quadkey)
+    pontos_alterados(quadkey)
+    tiles_em_disco.remover_do_ponto(quadkey)
+
+
+for modelo in CAMPO_NIVEL:
+    post_save.connect(ponto_do_mapa_salvo, sender=modelo, dispatch_uid=f'mapa_save_{modelo.__name__}')
+    post_delete.connect(ponto_do_mapa_removido, sender=modelo, dispatch_uid=f'mapa_delete_{modelo.__name__}')
+
+
+# ===============================================================
+# ÍNDICE DE BUSCA
+# ===============================================================
+def objeto_pesquisavel_salvo(sender, instance, raw=False, **kwargs):
+    if not raw:
+        indexar(instance)
+
+
+def objeto_pesquisavel_removido(sender, instance, **kwargs):
+    remover_do_indice(sender, instance.pk)
+
+
+for modelo in MODELOS_BUSCA:
+    post_save.connect(objeto_pesquisavel_salvo, sender=modelo, dispatch_uid=f'busca_save_{modelo.__name__}')
+    post_delete.connect(objeto_pesquisavel_removido, sender=modelo, dispatch_uid=f'busca_delete_{modelo.__name__}')
+
+
+# ===============================================================
+# AUTOCOMPLETAR
+# ===============================================================
+def titulo_salvo(sender, instance, raw=False, **kwargs):
+    if not raw:
+        atualizar_autocompletar(instance)
+
+
+def titulo_removido(sender, instance, **kwargs):
+    remover_do_autocompletar(sender, instance.pk)
+
+
+for modelo in MODELOS_AUTOCOMPLETAR:
+    post_save.connect(titulo_salvo, sender=modelo, dispatch_uid=f'autocompletar_save_{modelo.__name__}')
+    post_delete.connect(titulo_removido, sender=modelo, dispatch_uid=f'autocompletar_delete_{modelo.__name__}')
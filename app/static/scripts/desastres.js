@@ -20,72 +20,119 @@ function iniciarMapaDesastres() {
 }
 
 /**
- * ADICIONA OS MARCADORES DE DESASTRES
+ * CARREGA DO SERVIDOR OS TILES DA ÁREA VISÍVEL
+ * O mapa é dividido nos mesmos tiles z/x/y do OpenStreetMap; cada tile é
+ * um GeoJSON servido do cache em disco (/tiles/{z}/{x}/{y}.json), com
+ * agrupamentos quando o zoom é baixo e pontos quando é alto. O navegador
+ * reaproveita os tiles pelo cache HTTP/ETag.
  */
+const ZOOM_MAXIMO_TILES = 16;
+
 function adicionarMarcadoresDesastres(mapa) {
-    // Dados de exemplo - você pode modificar conforme necessário
-    const desastres = [
-        {
-            nome: 'Terremoto',
-            posicao: [-8.05, -34.9],
-            descricao: 'Terremoto de magnitude 7.2 na costa',
-            tipo: 'terremoto',
-            severidade: 'alta'
-        },
-        {
-            nome: 'Furacão',
-            posicao: [28.5, -80.5],
-            descricao: 'Furacão categoria 4 se aproximando',
-            tipo: 'furacao',
-            severidade: 'extrema'
-        },
-        {
-            nome: 'Erupção Vulcânica',
-            posicao: [-0.22, -78.51],
-            descricao: 'Erupção ativa no Anel de Fogo',
-            tipo: 'vulcao',
-            severidade: 'media'
-        },
-        {
-            nome: 'Inundação',
-            posicao: [13.75, 100.49],
-            descricao: 'Inundações no Sudeste Asiático',
-            tipo: 'inundacao',
-            severidade: 'alta'
-        },
-        {
-            nome: 'Deslizamento',
-            posicao: [-9.19, -75.02],
-            descricao: 'Deslizamentos nos Andes',
-            tipo: 'deslizamento',
-            severidade: 'media'
+    const modeloUrl = document.getElementById('mapa-risco').dataset.urlTile;
+    if (!modeloUrl) return;
+
+    const camadas = new Map();  // "z/x/y" -> L.layerGroup
+    let espera = null;
+
+    function carregar() {
+        const zoom = Math.min(Math.round(mapa.getZoom()), ZOOM_MAXIMO_TILES);
+        const caixa = mapa.getBounds();
+        const inicio = mapa.project(caixa.getNorthWest(), zoom).divideBy(256).floor();
+        const fim = mapa.project(caixa.getSouthEast(), zoom).divideBy(256).floor();
+        const n = 2 ** zoom;
+
+        const visiveis = new Set();
+        for (let x = inicio.x; x <= fim.x; x++) {
+            for (let y = Math.max(inicio.y, 0); y <= Math.min(fim.y, n - 1); y++) {
+                visiveis.add(`${zoom}/${((x % n) + n) % n}/${y}`);
+            }
         }
-    ];
-    
-    desastres.forEach(desastre => {
-        const icone = criarIconeDesastres(desastre.severidade);
-        const marcador = L.marker(desastre.posicao, { icon: icone }).addTo(mapa);
-        
-        marcador.bindPopup(`
-            <h3>${desastre.nome}</h3>
-            <p>${desastre.descricao}</p>
-            <p><strong>Tipo:</strong> ${desastre.tipo}</p>
-            <p><strong>Severidade:</strong> ${desastre.severidade}</p>
-        `);
+
+        // Descarta tiles que saíram da tela ou são de outro zoom
+        camadas.forEach((camada, chave) => {
+            if (!visiveis.has(chave)) {
+                mapa.removeLayer(camada);
+                camadas.delete(chave);
+            }
+        });
+
+        visiveis.forEach(chave => {
+            if (camadas.has(chave)) return;
+            const camada = L.layerGroup().addTo(mapa);
+            camadas.set(chave, camada);
+
+            fetch(modeloUrl.replace('/0/0/0.json', `/${chave}.json`))
+                .then(resposta => resposta.ok ? resposta.json() : { features: [] })
+                .then(dados => {
+                    if (camadas.get(chave) !== camada) return;
+                    dados.features.forEach(item => camada.addLayer(criarMarcador(item, mapa)));
+                })
+                .catch(erro => console.error('Erro ao carregar o mapa:', erro));
+        });
+    }
+
+    // Evita uma rodada de requisições por quadro enquanto o usuário arrasta o mapa
+    mapa.on('moveend', () => {
+        clearTimeout(espera);
+        espera = setTimeout(carregar, 150);
+    });
+    carregar();
+}
+
+function criarMarcador(item, mapa) {
+    const [lon, lat] = item.geometry.coordinates;
+    const dados = item.properties;
+
+    if (dados.agrupamento) {
+        const marcador = L.marker([lat, lon], { icon: criarIconeAgrupamento(dados) });
+        // Clicar aproxima o mapa até os pontos do grupo se separarem
+        marcador.on('click', () => mapa.setView([lat, lon], mapa.getZoom() + 2));
+        return marcador;
+    }
+
+    const marcador = L.marker([lat, lon], { icon: criarIconeDesastres(dados.gravidade) });
+    marcador.bindPopup(`
+        <h3>${escaparHtml(dados.titulo)}</h3>
+        ${dados.desastre ? `<p><strong>Desastre:</strong> ${escaparHtml(dados.desastre)}</p>` : ''}
+        ${dados.data ? `<p><strong>Data:</strong> ${new Date(dados.data + 'T00:00:00').toLocaleDateString('pt-BR')}</p>` : ''}
+        ${dados.nivel ? `<p><strong>Risco:</strong> ${escaparHtml(dados.nivel)}</p>` : ''}
+    `);
+    return marcador;
+}
+
+function escaparHtml(texto) {
+    const div = document.createElement('div');
+    div.textContent = texto;
+    return div.innerHTML;
+}
+
+/**
+ * ÍCONE DE UM AGRUPAMENTO: TAMANHO PELO TOTAL, COR PELA MAIOR GRAVIDADE
+ */
+function criarIconeAgrupamento(grupo) {
+    const cor = grupo.gravidade >= 4 ? '#e74c3c' : grupo.gravidade === 3 ? '#f39c12' : '#27ae60';
+    const tamanho = Math.min(60, 24 + Math.round(Math.log10(grupo.total) * 10));
+    const total = grupo.total >= 1000 ? `${Math.round(grupo.total / 1000)}k` : grupo.total;
+
+    return L.divIcon({
+        className: 'icone-agrupamento',
+        html: `<div style="background-color: ${cor}; width: ${tamanho}px; height: ${tamanho}px; line-height: ${tamanho}px; border-radius: 50%; border: 2px solid white; color: white; text-align: center; font-weight: bold; opacity: 0.9;">${total}</div>`,
+        iconSize: [tamanho, tamanho],
+        iconAnchor: [tamanho / 2, tamanho / 2]
     });
 }
 
 /**
  * CRIA ÍCONES PERSONALIZADOS CONFORME A SEVERIDADE
  */
-function criarIconeDesastres(severidade) {
+function criarIconeDesastres(gravidade) {
     let corIcone, tamanhoIcone;
     
-    switch(severidade) {
-        case 'extrema': corIcone = '#e74c3c'; tamanhoIcone = [30, 30]; break;
-        case 'alta': corIcone = '#f39c12'; tamanhoIcone = [25, 25]; break;
-        default: corIcone = '#27ae60'; tamanhoIcone = [20, 20];
-    }
+    // gravidade: 0 (sem nível) a 4 (extremo), calculada no servidor
+    if (gravidade >= 4) { corIcone = '#e74c3c'; tamanhoIcone = [30, 30]; }
+    else if (gravidade === 3) { corIcone = '#f39c12'; tamanhoIcone = [25, 25]; }
+    else { corIcone = '#27ae60'; tamanhoIcone = [20, 20]; }
     
     return L.divIcon({
         className: 'icone-personalizado',
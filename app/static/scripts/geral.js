@@ -13,6 +13,7 @@ document.addEventListener('DOMContentLoaded', function() {
     inicializarNotificacoes();
     inicializarDropdowns();
     inicializarContadores();
+    inicializarBuscaSite();
 });
 
 // Sistema de Tema Escuro/Claro
@@ -560,6 +561,65 @@ function inicializarDropdowns() {
     });
 }
 
+// Busca do Site (sugestões enquanto digita)
+function inicializarBuscaSite() {
+    const formulario = document.querySelector('.busca-site');
+    if (!formulario) return;
+
+    const campo = formulario.querySelector('input[name="q"]');
+    const lista = formulario.querySelector('.busca-sugestoes');
+    const url = formulario.dataset.urlSugestoes;
+    let ultimaConsulta = '';
+    let controlador = null;
+
+    function mostrar(sugestoes) {
+        lista.innerHTML = '';
+        sugestoes.forEach(sugestao => {
+            const item = document.createElement('li');
+            const link = document.createElement('a');
+            link.href = sugestao.url;
+            link.textContent = sugestao.titulo;
+            link.dataset.tipo = sugestao.tipo;
+            item.setAttribute('role', 'option');
+            item.appendChild(link);
+            lista.appendChild(item);
+        });
+        lista.hidden = sugestoes.length === 0;
+    }
+
+    const buscar = debounce(() => {
+        const consulta = campo.value.trim();
+        if (consulta === ultimaConsulta) return;
+        ultimaConsulta = consulta;
+        if (!consulta) {
+            mostrar([]);
+            return;
+        }
+        // Descarta a resposta da tecla anterior, se ainda não chegou
+        controlador?.abort();
+        controlador = new AbortController();
+        fetch(`${url}?q=${encodeURIComponent(consulta)}`, { signal: controlador.signal })
+            .then(resposta => resposta.json())
+            .then(dados => mostrar(dados.sugestoes))
+            .catch(erro => {
+                if (erro.name !== 'AbortError') console.error('Erro nas sugestões:', erro);
+            });
+    }, 120);
+
+    campo.addEventListener('input', buscar);
+    formulario.addEventListener('submit', (e) => {
+        e.preventDefault();
+        const primeira = lista.querySelector('a');
+        if (primeira) window.location.href = primeira.href;
+    });
+    document.addEventListener('click', (e) => {
+        if (!formulario.contains(e.target)) lista.hidden = true;
+    });
+    campo.addEventListener('focus', () => {
+        lista.hidden = lista.children.length === 0;
+    });
+}
+
 // Contadores Animados
 function inicializarContadores() {
     const contadores = document.querySelectorAll('.contador');
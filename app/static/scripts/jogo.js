@@ -276,10 +276,90 @@ function initFAQ() {
 
 // Adicione ao seu arquivo jogo.js ou crie um novo arquivo faq.js
 
+// FAQs sob demanda: a página traz só a primeira categoria; as outras vêm
+// do endpoint JSON (data-url-faqs) quando chegam perto da tela ou quando
+// o filtro delas é escolhido
+function escaparHTML(texto) {
+    const div = document.createElement('div');
+    div.textContent = texto;
+    return div.innerHTML;
+}
+
+function quebrasDeLinha(texto) {
+    // Como o filtro linebreaks do Django: parágrafos e <br>
+    return escaparHTML(texto.replace(/\r\n|\r/g, '\n'))
+        .split(/\n{2,}/)
+        .map(paragrafo => `<p>${paragrafo.replace(/\n/g, '<br>')}</p>`)
+        .join('\n');
+}
+
+function htmlFAQ(faq, categoria) {
+    const etiqueta = categoria.categoria !== 'geral'
+        ? `| <i class="fas fa-tag"></i> ${escaparHTML(categoria.nome)}`
+        : '';
+    return `
+        <div class="pergunta-item">
+            <button class="pergunta-titulo">
+                <span class="pergunta-texto">${escaparHTML(faq.pergunta)}</span>
+                <i class="fas fa-chevron-down"></i>
+            </button>
+            <div class="pergunta-resposta">
+                ${quebrasDeLinha(faq.resposta)}
+                <div class="faq-metadata">
+                    <small>
+                        <i class="fas fa-calendar-alt"></i>
+                        Atualizada em ${escaparHTML(faq.atualizada_em)}
+                        ${etiqueta}
+                    </small>
+                </div>
+            </div>
+        </div>`;
+}
+
+function carregarCategoriaFAQ(container) {
+    const url = container.dataset.urlFaqs;
+    if (!url) return;
+    delete container.dataset.urlFaqs;  // uma busca por categoria
+
+    fetch(url, { headers: { 'Accept': 'application/json' } })
+        .then(resposta => {
+            if (!resposta.ok) throw new Error(resposta.status);
+            return resposta.json();
+        })
+        .then(categoria => {
+            const aviso = container.querySelector('.faq-carregando');
+            if (aviso) aviso.remove();
+            container.insertAdjacentHTML('beforeend', categoria.faqs.map(faq => htmlFAQ(faq, categoria)).join(''));
+        })
+        .catch(() => {
+            container.dataset.urlFaqs = url;  // tenta de novo na próxima vez
+            const aviso = container.querySelector('.faq-carregando');
+            if (aviso) aviso.textContent = 'Não foi possível carregar as perguntas.';
+        });
+}
+
+function initFAQsSobDemanda() {
+    const pendentes = document.querySelectorAll('.faq-categoria[data-url-faqs]');
+    if (!('IntersectionObserver' in window)) {
+        pendentes.forEach(carregarCategoriaFAQ);
+        return;
+    }
+    const observador = new IntersectionObserver(entradas => {
+        entradas.forEach(entrada => {
+            if (entrada.isIntersecting) {
+                observador.unobserve(entrada.target);
+                carregarCategoriaFAQ(entrada.target);
+            }
+        });
+    }, { rootMargin: '200px' });
+    pendentes.forEach(container => observador.observe(container));
+}
+
 document.addEventListener('DOMContentLoaded', function() {
     // Filtros de FAQ
     const filtrosFAQ = document.querySelectorAll('.btn-filtro-faq');
     const categoriasFAQ = document.querySelectorAll('.faq-categoria');
+    initFAQsSobDemanda();
     
     filtrosFAQ.forEach(filtro => {
         filtro.addEventListener('click', function() {
@@ -300,6 +380,7 @@ document.addEventListener('DOMContentLoaded', function() {
             } else {
                 categoriasFAQ.forEach(cat => {
                     if (cat.id === `categoria-${categoria}`) {
+                        carregarCategoriaFAQ(cat);
                         cat.style.display = 'block';
                         setTimeout(() => {
                             cat.style.opacity = '1';
@@ -403,36 +484,68 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
-    // Função para carregar perguntas anteriores do usuário
-    function carregarMinhasPerguntas() {
-        const loadingDiv = document.querySelector('.perguntas-loading');
-        
-        // Simulação de chamada AJAX
-        setTimeout(() => {
-            loadingDiv.innerHTML = `
-                <div class="pergunta-item-minha">
-                    <div class="pergunta-texto-minha">Como posso resetar meu progresso?</div>
-                    <div class="status-pergunta">
-                        <span class="status-badge status-respondida">Respondida</span>
-                    </div>
-                    <div class="data-pergunta">15/11/2024</div>
-                </div>
-                <div class="pergunta-item-minha">
-                    <div class="pergunta-texto-minha">O jogo tem suporte a controle?</div>
-                    <div class="status-pergunta">
-                        <span class="status-badge status-publicada">Publicada como FAQ</span>
-                    </div>
-                    <div class="data-pergunta">10/11/2024</div>
-                </div>
-                <div class="pergunta-item-minha">
-                    <div class="pergunta-texto-minha">Posso jogar em múltiplos dispositivos?</div>
-                    <div class="status-pergunta">
-                        <span class="status-badge status-pendente">Pendente</span>
-                    </div>
-                    <div class="data-pergunta">05/11/2024</div>
+    // Perguntas anteriores do usuário (MinhasPerguntasView): a API manda só
+    // códigos de status e datas ISO; rótulos e HTML são montados aqui
+    const ROTULOS_STATUS = {
+        pendente: 'Pendente',
+        respondida: 'Respondida',
+        arquivada: 'Arquivada',
+        publicada: 'Publicada como FAQ'
+    };
+
+    function htmlMinhaPergunta(pergunta) {
+        const [ano, mes, dia] = pergunta.data.split('-');
+        const status = ROTULOS_STATUS[pergunta.status] ? pergunta.status : 'pendente';
+        return `
+            <div class="pergunta-item-minha">
+                <div class="pergunta-texto-minha">${escaparHTML(pergunta.pergunta)}</div>
+                <div class="status-pergunta">
+                    <span class="status-badge status-${status}">${ROTULOS_STATUS[status]}</span>
                 </div>
-            `;
-        }, 1000);
+                <div class="data-pergunta">${dia}/${mes}/${ano}</div>
+            </div>`;
+    }
+
+    function carregarMinhasPerguntas(cursor) {
+        const lista = document.querySelector('.perguntas-lista');
+        const loadingDiv = lista.querySelector('.perguntas-loading');
+        const url = new URL(lista.dataset.url, window.location.origin);
+        if (cursor) url.searchParams.set('cursor', cursor);
+
+        // Com a ETag da última resposta, o navegador revalida e recebe 304 se nada mudou
+        fetch(url, { headers: { 'Accept': 'application/json' }, credentials: 'same-origin' })
+            .then(resposta => {
+                if (!resposta.ok) throw new Error(resposta.status);
+                return resposta.json();
+            })
+            .then(dados => {
+                lista.querySelector('.perguntas-mais')?.remove();
+                if (!cursor && !dados.perguntas.length) {
+                    loadingDiv.innerHTML = 'Você ainda não enviou perguntas.';
+                    return;
+                }
+                if (loadingDiv) loadingDiv.remove();
+                lista.insertAdjacentHTML('beforeend', dados.perguntas.map(htmlMinhaPergunta).join(''));
+                if (dados.proximo) {
+                    const mais = document.createElement('button');
+                    mais.type = 'button';
+                    mais.className = 'btn btn-outline perguntas-mais';
+                    mais.textContent = 'Carregar mais';
+                    mais.addEventListener('click', () => {
+                        mais.disabled = true;
+                        carregarMinhasPerguntas(dados.proximo);
+                    });
+                    lista.appendChild(mais);
+                }
+            })
+            .catch(() => {
+                if (loadingDiv) {
+                    loadingDiv.innerHTML = 'Não foi possível carregar suas perguntas.';
+                } else {
+                    const mais = lista.querySelector('.perguntas-mais');
+                    if (mais) mais.disabled = false;
+                }
+            });
     }
     
     // Funções auxiliares
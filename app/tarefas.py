@@ -0,0 +1,249 @@
+import hashlib
+import traceback
+from datetime import timedelta
+
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F, Max, Q
+from django.utils import timezone
+
+from .autocompletar import atualizar_autocompletar
+from .busca import reindexar_modelo
+from .models import FAQJogo, Jogo, PerguntaUsuario, Tarefa
+from .paginas import invalidar_faqs
+
+# ===============================================================
+# FILA DE TAREFAS NO BANCO
+# ===============================================================
+# Ações pesadas do admin viram linhas de Tarefa e são executadas pelo
+# comando run_workers, sem broker externo. Um trabalhador reserva a tarefa
+# com um UPDATE condicional (só um consegue trocar o status), renova o prazo
+# a cada progresso informado e, se morrer, a tarefa volta para a fila quando
+# o prazo vence. Falhas são repetidas com espera crescente até
+# Tarefa.maximo_tentativas; por isso cada tarefa deve poder rodar de novo
+# sem duplicar efeitos.
+PRAZO_EXECUCAO = timedelta(minutes=5)
+ESPERA_NOVA_TENTATIVA = timedelta(seconds=30)  # dobra a cada tentativa
+CANDIDATAS_POR_RESERVA = 10
+LOTE_TAREFA = 500
+
+TAREFAS = {}
+
+
+class Reagendar(Exception):
+    """Lançada por uma tarefa para rodar de novo em `quando`, sem contar como falha."""
+
+    def __init__(self, quando, resultado=''):
+        super().__init__(quando)
+        self.quando = quando
+        self.resultado = resultado
+
+
+def tarefa(nome):
+    """Registra a função que executa as tarefas do tipo `nome`."""
+    def registrar(funcao):
+        TAREFAS[nome] = funcao
+        return funcao
+    return registrar
+
+
+def chave_da_selecao(acao, ids):
+    """Chave de idempotência de uma ação do admin sobre um conjunto de objetos."""
+    resumo = hashlib.sha1(','.join(str(pk) for pk in sorted(ids)).encode()).hexdigest()[:20]
+    return f'{acao}:{resumo}'
+
+
+def enfileirar(tipo, chave=None, **parametros):
+    """Cria a tarefa; com `chave`, devolve a que já estiver na fila com a mesma chave.
+
+    Como a chave é única só entre tarefas ativas, N chaves fixas para um mesmo
+    tipo limitam a N as execuções simultâneas dele.
+    """
+    if tipo not in TAREFAS:
+        raise ValueError(f'Tipo de tarefa desconhecido: {tipo}')
+    if chave is not None:
+        existente = Tarefa.objects.filter(chave=chave, status__in=Tarefa.STATUS_ATIVOS).first()
+        if existente is not None:
+            return existente
+    try:
+        with transaction.atomic():
+            return Tarefa.objects.create(tipo=tipo, chave=chave, parametros=parametros)
+    except IntegrityError:
+        # Outra requisição enfileirou a mesma chave entre a consulta e o INSERT
+        return Tarefa.objects.get(chave=chave, status__in=Tarefa.STATUS_ATIVOS)
+
+
+def disponiveis(agora):
+    return Q(status='pendente', disponivel_em__lte=agora) | Q(status='executando', prazo__lt=agora)
+
+
+def reservar(trabalhador):
+    """Tira a próxima tarefa da fila para `trabalhador`, ou None se não houver."""
+    agora = timezone.now()
+    candidatas = list(
+        Tarefa.objects.filter(disponiveis(agora)).order_by('disponivel_em', 'pk')
+        .values_list('pk', flat=True)[:CANDIDATAS_POR_RESERVA]
+    )
+    for pk in candidatas:
+        reservada = Tarefa.objects.filter(disponiveis(agora), pk=pk).update(
+            status='executando', trabalhador=trabalhador, iniciada_em=agora,
+            prazo=agora + PRAZO_EXECUCAO, tentativas=F('tentativas') + 1,
+        )
+        if reservada:
+            return Tarefa.objects.get(pk=pk)
+    return None
+
+
+def informar_progresso(tarefa, progresso, total=None):
+    """Grava o progresso para o admin e renova o prazo da execução."""
+    campos = {'progresso': progresso, 'prazo': timezone.now() + PRAZO_EXECUCAO}
+    if total is not None:
+        campos['total'] = total
+    Tarefa.objects.filter(pk=tarefa.pk, trabalhador=tarefa.trabalhador).update(**campos)
+
+
+def executar(tarefa):
+    """Roda a tarefa reservada; retorna True se concluiu."""
+    # Filtrar pelo trabalhador: se o prazo venceu e outro a reservou, o resultado é dele
+    minha = Tarefa.objects.filter(pk=tarefa.pk, trabalhador=tarefa.trabalhador)
+    try:
+        resultado = TAREFAS[tarefa.tipo](tarefa, **tarefa.parametros)
+    except Reagendar as reagendar:
+        minha.update(
+            status='pendente', disponivel_em=reagendar.quando, prazo=None, erro='',
+            tentativas=F('tentativas') - 1, resultado=str(reagendar.resultado)[:255],
+        )
+        return True
+    except Exception:
+        agora = timezone.now()
+        if tarefa.tentativas < tarefa.maximo_tentativas:
+            espera = ESPERA_NOVA_TENTATIVA * 2 ** (tarefa.tentativas - 1)
+            minha.update(status='pendente', disponivel_em=agora + espera, prazo=None, erro=traceback.format_exc())
+        else:
+            minha.update(status='falhou', concluida_em=agora, prazo=None, erro=traceback.format_exc())
+        return False
+    minha.update(
+        status='concluida', concluida_em=timezone.now(), prazo=None, erro='',
+        resultado=str(resultado or '')[:255],
+    )
+    return True
+
+
+def trabalhar(trabalhador, parar, intervalo=1.0, ate_esvaziar=False, ao_terminar=None):
+    """Laço de um trabalhador: reserva e executa até `parar` (threading.Event) ser acionado.
+
+    Com `ate_esvaziar`, sai assim que não houver tarefa disponível.
+    `ao_terminar(tarefa, concluiu)` é chamado depois de cada execução.
+    """
+    executadas = 0
+    try:
+        while not parar.is_set():
+            close_old_connections()
+            tarefa = reservar(trabalhador)
+            if tarefa is None:
+                if ate_esvaziar:
+                    break
+                parar.wait(intervalo)
+                continue
+            concluiu = executar(tarefa)
+            executadas += 1
+            if ao_terminar is not None:
+                ao_terminar(tarefa, concluiu)
+    finally:
+        close_old_connections()
+    return executadas
+
+
+# ===============================================================
+# FAQ
+# ===============================================================
+TEMPLATES_FAQ = [
+    {
+        'pergunta': 'O jogo é gratuito?',
+        'resposta': 'Sim, a versão básica é gratuita. Temos uma versão premium com recursos adicionais.',
+        'categoria': 'geral'
+    },
+    {
+        'pergunta': 'Posso jogar offline?',
+        'resposta': 'Sim, após o download o jogo funciona totalmente offline.',
+        'categoria': 'tecnico'
+    },
+    {
+        'pergunta': 'Quantos níveis tem o jogo?',
+        'resposta': 'O jogo possui 50 níveis principais e 20 desafios especiais.',
+        'categoria': 'jogabilidade'
+    },
+]
+
+
+def gravar_faqs_no_fim(faqs):
+    """Insere as FAQs em lote, numeradas depois da última FAQ de cada jogo.
+
+    Deve rodar dentro de transaction.atomic(): os jogos ficam travados até o
+    commit, então gravações simultâneas não repetem a mesma ordem.
+    """
+    jogo_ids = {faq.jogo_id for faq in faqs}
+    if not jogo_ids:
+        return []
+    list(Jogo.objects.select_for_update().filter(pk__in=jogo_ids).order_by('pk').values_list('pk'))
+    ultimas = dict(
+        FAQJogo.objects.filter(jogo_id__in=jogo_ids).order_by().values_list('jogo_id').annotate(Max('ordem'))
+    )
+    for faq in faqs:
+        faq.ordem = ultimas[faq.jogo_id] = (ultimas.get(faq.jogo_id) or 0) + 1
+    criadas = FAQJogo.objects.bulk_create(faqs, batch_size=1000)
+
+    # bulk_create não dispara os sinais de post_save
+    invalidar_faqs(*jogo_ids)
+    reindexar_modelo(FAQJogo, FAQJogo.objects.filter(pk__in=[faq.pk for faq in criadas]))
+    atualizar_autocompletar(*criadas)
+    return criadas
+
+
+def publicar_perguntas(pergunta_ids):
+    """Publica como FAQ as perguntas respondidas e ainda não publicadas; retorna quantas."""
+    with transaction.atomic():
+        # Travadas por pk: duas publicações simultâneas não geram FAQs repetidas
+        perguntas = list(
+            PerguntaUsuario.objects.select_for_update()
+            .filter(pk__in=pergunta_ids)
+            .exclude(status='publicada')
+            .exclude(resposta_admin__isnull=True).exclude(resposta_admin='')
+            .order_by('pk')
+        )
+        faqs = gravar_faqs_no_fim([
+            FAQJogo(jogo_id=pergunta.jogo_id, pergunta=pergunta.pergunta, resposta=pergunta.resposta_admin,
+                    categoria='geral', visivel=True, ativo=True)
+            for pergunta in perguntas
+        ])
+        for pergunta, faq in zip(perguntas, faqs):
+            pergunta.status = 'publicada'
+            pergunta.publicado_como_faq = faq
+        PerguntaUsuario.objects.bulk_update(perguntas, ['status', 'publicado_como_faq'], batch_size=1000)
+    return len(perguntas)
+
+
+@tarefa('publicar_como_faq')
+def tarefa_publicar_como_faq(tarefa, pergunta_ids):
+    publicadas = 0
+    for inicio in range(0, len(pergunta_ids), LOTE_TAREFA):
+        # Um lote por transação: numa nova tentativa, o que já foi publicado é ignorado
+        publicadas += publicar_perguntas(pergunta_ids[inicio:inicio + LOTE_TAREFA])
+        informar_progresso(tarefa, min(inicio + LOTE_TAREFA, len(pergunta_ids)), len(pergunta_ids))
+    return f'{publicadas} pergunta(s) publicada(s) como FAQ.'
+
+
+@tarefa('criar_faqs_de_template')
+def tarefa_criar_faqs_de_template(tarefa, jogo_ids):
+    with transaction.atomic():
+        # Templates que o jogo já tem ficam de fora; repetir a tarefa não duplica FAQs
+        existentes = set(FAQJogo.objects.filter(
+            jogo_id__in=jogo_ids, pergunta__in=[template['pergunta'] for template in TEMPLATES_FAQ]
+        ).values_list('jogo_id', 'pergunta'))
+        criadas = gravar_faqs_no_fim([
+            FAQJogo(jogo_id=jogo_id, **template)
+            for jogo_id in jogo_ids for template in TEMPLATES_FAQ
+            if (jogo_id, template['pergunta']) not in existentes
+        ])
+    informar_progresso(tarefa, len(jogo_ids), len(jogo_ids))
+    return f'{len(criadas)} FAQ(s) criada(s) a partir de templates.'
+
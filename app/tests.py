@@ -1,3 +1,1588 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import os
+import smtplib
+import tempfile
+import time
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.template import engines
+from django.test.utils import CaptureQueriesContext
+from django.templatetags.static import static
+from django.utils import timezone
+
+from .models import (
+    Usuario, Jogo, CaracteristicaJogo, RequisitoJogo, AtualizacaoJogo,
+    FAQJogo, ImagemJogo, Avaliacao, PerguntaUsuario, Pergunta, Pagina, Tarefa, EmailPendente,
+    Desastre, Risco, Acontecimento, Artigo, TopicoArtigo, TopicoDesastre, DocumentoBusca
+)
+from . import autocompletar, busca, emails, estaticos, exportacao, tarefas
+from .geo import Caixa, filtro_caixa, tile_do_ponto
+from .mapa import agrupamentos_na_caixa
+from .tiles import CacheTilesDisco, espaco_em_disco
+from .middleware import Principal
+from .paginacao import codificar_cursor, paginar_keyset
+from .paginas import (
+    aquecer_templates, arvore_faqs, carregar_pagina_jogo, obter_pagina_jogo, pagina_desastres, pagina_acontecimentos,
+    pagina_artigos, pagina_perguntas_do_usuario, templates_das_paginas, versoes_secoes
+)
+
+
+def criar_jogo_completo(quantidade=3):
+    jogo = Jogo.objects.create(titulo="A Crise G")
+    especialista, _ = Usuario.objects.get_or_create(
+        email="especialista@acriseg.com",
+        defaults={'nome': "Especialista", 'senha': "segredo123", 'tipo': "especialista"}
+    )
+    for i in range(quantidade):
+        CaracteristicaJogo.objects.create(jogo=jogo, descricao=f"Característica {i}", ordem=i)
+        RequisitoJogo.objects.create(jogo=jogo, tipo='minimo', descricao=f"Mínimo {i}")
+        RequisitoJogo.objects.create(jogo=jogo, tipo='recomendado', descricao=f"Recomendado {i}")
+        AtualizacaoJogo.objects.create(jogo=jogo, versao=f"1.{i}", data=f"2025-01-{i + 1:02d}", descricao="...")
+        FAQJogo.objects.create(jogo=jogo, pergunta=f"Pergunta {i}?", resposta="Sim.", ordem=i)
+        ImagemJogo.objects.create(jogo=jogo, url=f"https://exemplo.com/{i}.png", ordem=i)
+        Avaliacao.objects.create(jogo=jogo, usuario=especialista, nota=(i % 5) + 1, texto="Ótimo")
+    return jogo
+
+
+def criar_ponto(ponto, i):
+    """Espalha pontos de forma determinística pelo globo (sem passar por save())."""
+    ponto.latitude = (i * 37.3) % 170 - 85
+    ponto.longitude = (i * 73.7) % 360 - 180
+    ponto.atualizar_quadkey()
+    return ponto
+
+
+# ===============================================================
+# PÁGINA DO JOGO
+# ===============================================================
+class CarregarPaginaJogoTests(TestCase):
+    # 1 consulta do jogo + 5 prefetches (as FAQs vêm de arvore_faqs)
+    CONSULTAS_ESPERADAS = 6
+
+    def setUp(self):
+        cache.clear()
+
+    def test_numero_de_consultas_constante(self):
+        criar_jogo_completo(quantidade=2)
+        with self.assertNumQueries(self.CONSULTAS_ESPERADAS):
+            carregar_pagina_jogo()
+
+        Jogo.objects.all().delete()
+        criar_jogo_completo(quantidade=12)
+        with self.assertNumQueries(self.CONSULTAS_ESPERADAS):
+            pagina = carregar_pagina_jogo()
+
+        self.assertEqual(len(pagina.imagens), 4)
+        self.assertEqual(len(pagina.atualizacoes), 5)
+        self.assertEqual(len(pagina.avaliacoes_especialistas), 3)
+        self.assertEqual(len(pagina.requisitos_minimos), 12)
+        self.assertEqual(pagina.total_avaliacoes, 12)
+
+    def test_pagina_imutavel(self):
+        criar_jogo_completo()
+        pagina = carregar_pagina_jogo()
+        with self.assertRaises(AttributeError):
+            pagina.jogo = None
+
+    def test_sem_jogo_ativo(self):
+        self.assertIsNone(carregar_pagina_jogo())
+
+    def test_view_renderiza_pagina(self):
+        criar_jogo_completo()
+        resposta = self.client.get('/jogo/')
+        self.assertEqual(resposta.status_code, 200)
+        self.assertContains(resposta, 'Pergunta 0?')
+
+
+class FAQsJogoTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.jogo = criar_jogo_completo()
+        FAQJogo.objects.create(jogo=self.jogo, pergunta="Roda em Linux?", resposta="Sim.\n\nVia Wine.",
+                               categoria='tecnico', ordem=10)
+
+    def test_arvore_agrupada_uma_vez_por_versao(self):
+        with self.assertNumQueries(2):
+            arvore = arvore_faqs(self.jogo.pk)
+        with self.assertNumQueries(0):
+            arvore_faqs(self.jogo.pk)
+        self.assertEqual(list(arvore.categorias), ['geral', 'tecnico'])
+        self.assertEqual(arvore.categorias['tecnico'].nome, 'Técnico')
+        self.assertEqual([faq['pergunta'] for faq in arvore.categorias['geral'].faqs],
+                         ['Pergunta 0?', 'Pergunta 1?', 'Pergunta 2?'])
+
+    def test_pagina_traz_so_a_primeira_categoria(self):
+        resposta = self.client.get('/jogo/')
+        self.assertContains(resposta, 'Pergunta 0?')
+        self.assertNotContains(resposta, 'Roda em Linux?')
+        self.assertContains(resposta, f'data-url-faqs="/jogo/{self.jogo.pk}/faqs/tecnico/"')
+
+    def test_endpoint_json(self):
+        indice = self.client.get(f'/jogo/{self.jogo.pk}/faqs/')
+        self.assertEqual(indice.json()['categorias'][1], {
+            'categoria': 'tecnico', 'nome': 'Técnico', 'total': 1, 'url': f'/jogo/{self.jogo.pk}/faqs/tecnico/',
+        })
+
+        resposta = self.client.get(f'/jogo/{self.jogo.pk}/faqs/tecnico/')
+        self.assertEqual(resposta['Content-Type'], 'application/json')
+        [faq] = resposta.json()['faqs']
+        self.assertEqual(faq['resposta'], "Sim.\n\nVia Wine.")
+        self.assertEqual(self.client.get(
+            f'/jogo/{self.jogo.pk}/faqs/tecnico/', HTTP_IF_NONE_MATCH=resposta['ETag']
+        ).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            FAQJogo.objects.filter(categoria='tecnico').first().delete()
+        self.assertEqual(self.client.get(f'/jogo/{self.jogo.pk}/faqs/tecnico/').status_code, 404)
+        self.assertEqual(self.client.get(f'/jogo/{self.jogo.pk + 1}/faqs/').status_code, 404)
+
+    def test_etag_vem_do_conteudo(self):
+        etag = self.client.get(f'/jogo/{self.jogo.pk}/faqs/')['ETag']
+        cache.clear()  # o contador de versão recomeça; o ETag continua valendo
+        self.assertEqual(self.client.get(f'/jogo/{self.jogo.pk}/faqs/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            FAQJogo.objects.create(jogo=self.jogo, pergunta="Tem multiplayer?", resposta="Não.", categoria='jogabilidade')
+        self.assertNotEqual(self.client.get(f'/jogo/{self.jogo.pk}/faqs/')['ETag'], etag)
+
+    def test_jogo_inativo_nao_serve_faqs(self):
+        self.client.get(f'/jogo/{self.jogo.pk}/faqs/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.jogo.ativo = False
+            self.jogo.save()
+        self.assertEqual(self.client.get(f'/jogo/{self.jogo.pk}/faqs/').status_code, 404)
+        self.assertEqual(self.client.get(f'/jogo/{self.jogo.pk}/faqs/tecnico/').status_code, 404)
+
+
+class MinhasPerguntasTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.jogo = Jogo.objects.create(titulo="A Crise G")
+        self.usuario = Usuario.objects.create(nome="Maria", email="maria@exemplo.com", senha="maria123")
+        outro = Usuario.objects.create(nome="Outro", email="outro@exemplo.com", senha="outro123")
+        for i in range(12):
+            PerguntaUsuario.objects.create(jogo=self.jogo, usuario=self.usuario, email=self.usuario.email,
+                                           pergunta=f"Pergunta <{i}>", status='respondida' if i % 2 else 'pendente')
+        PerguntaUsuario.objects.create(jogo=self.jogo, usuario=outro, email=outro.email, pergunta="De outro")
+
+    def test_exige_login(self):
+        self.assertEqual(self.client.get('/jogo/minhas-perguntas/').status_code, 403)
+
+    def test_paginas_e_etag(self):
+        self.client.post('/login/', {'email': 'maria@exemplo.com', 'senha': 'maria123'})
+        resposta = self.client.get('/jogo/minhas-perguntas/')
+        dados = resposta.json()
+        self.assertEqual(len(dados['perguntas']), 10)
+        self.assertEqual(dados['perguntas'][0]['pergunta'], "Pergunta <11>")
+        self.assertEqual(set(dados['perguntas'][0]), {'id', 'pergunta', 'status', 'data'})
+        self.assertEqual(dados['perguntas'][0]['status'], 'respondida')
+        self.assertIn('no-cache', resposta['Cache-Control'])
+        self.assertIn('private', resposta['Cache-Control'])
+
+        seguinte = self.client.get('/jogo/minhas-perguntas/', {'cursor': dados['proximo']}).json()
+        self.assertEqual([p['pergunta'] for p in seguinte['perguntas']], ["Pergunta <1>", "Pergunta <0>"])
+        self.assertIsNone(seguinte['proximo'])
+
+        repetida = self.client.get('/jogo/minhas-perguntas/', HTTP_IF_NONE_MATCH=resposta['ETag'])
+        self.assertEqual(repetida.status_code, 304)
+        self.assertEqual(repetida.content, b'')
+
+        PerguntaUsuario.objects.filter(usuario=self.usuario).update(status='publicada')
+        alterada = self.client.get('/jogo/minhas-perguntas/', HTTP_IF_NONE_MATCH=resposta['ETag'])
+        self.assertEqual(alterada.status_code, 200)
+
+    def test_cursor_malformado_volta_para_a_primeira_pagina(self):
+        self.client.post('/login/', {'email': 'maria@exemplo.com', 'senha': 'maria123'})
+        primeira = self.client.get('/jogo/minhas-perguntas/').json()
+        for valores in (['abc', 1], ['2024-01-01T00:00:00', 'x'], [{'a': 1}, 1]):
+            with self.subTest(valores=valores):
+                resposta = self.client.get('/jogo/minhas-perguntas/', {'cursor': codificar_cursor(valores)})
+                self.assertEqual(resposta.status_code, 200)
+                self.assertEqual(resposta.json(), primeira)
+
+
+class CachePaginaJogoTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.jogo = criar_jogo_completo()
+
+    def test_segunda_leitura_nao_consulta_banco(self):
+        obter_pagina_jogo()
+        with self.assertNumQueries(0):
+            pagina = obter_pagina_jogo()
+        self.assertEqual(pagina.jogo.pk, self.jogo.pk)
+
+    def test_visitante_anonimo_servido_do_cache(self):
+        self.client.get('/jogo/')
+        with self.assertNumQueries(0):
+            resposta = self.client.get('/jogo/')
+        self.assertEqual(resposta.status_code, 200)
+
+    def test_alteracao_de_faq_invalida_so_as_faqs(self):
+        obter_pagina_jogo()
+        arvore_faqs(self.jogo.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            FAQJogo.objects.create(jogo=self.jogo, pergunta="Nova pergunta?", resposta="Sim.", ordem=99)
+        with self.assertNumQueries(0):
+            obter_pagina_jogo()
+        faqs = arvore_faqs(self.jogo.pk).categorias['geral'].faqs
+        self.assertEqual(faqs[-1]['pergunta'], "Nova pergunta?")
+
+    def test_desativar_jogo_invalida(self):
+        obter_pagina_jogo()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.jogo.ativo = False
+            self.jogo.save()
+        self.assertIsNone(obter_pagina_jogo())
+
+    def test_versao_so_muda_no_commit(self):
+        obter_pagina_jogo()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.jogo.titulo = "Título novo"
+            self.jogo.save()
+            # Antes do commit a versão é a mesma: o que outra requisição gravar
+            # agora (ainda com as linhas antigas) é descartado no commit
+            with self.assertNumQueries(0):
+                self.assertEqual(obter_pagina_jogo().jogo.titulo, "A Crise G")
+        self.assertEqual(obter_pagina_jogo().jogo.titulo, "Título novo")
+
+    def test_avaliacao_removida_invalida(self):
+        obter_pagina_jogo()
+        with self.captureOnCommitCallbacks(execute=True):
+            Avaliacao.objects.filter(jogo=self.jogo).delete()
+        pagina = obter_pagina_jogo()
+        self.assertEqual(pagina.avaliacoes_especialistas, ())
+
+    def test_pagina_remontada_com_os_contadores_novos(self):
+        antes = obter_pagina_jogo().jogo
+        usuario = Usuario.objects.get(email="especialista@acriseg.com")
+        with self.captureOnCommitCallbacks(execute=True):
+            Avaliacao.objects.create(jogo=self.jogo, usuario=usuario, nota=5)
+        jogo = obter_pagina_jogo().jogo
+        self.assertEqual((jogo.avaliacoes_total, jogo.avaliacoes_soma),
+                         (antes.avaliacoes_total + 1, antes.avaliacoes_soma + 5))
+
+    def test_secoes_trocam_de_versao_no_commit(self):
+        versoes = versoes_secoes(self.jogo.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            FAQJogo.objects.create(jogo=self.jogo, pergunta="Nova pergunta?", resposta="Sim.", ordem=99)
+            Avaliacao.objects.filter(jogo=self.jogo).first().save()
+            # Fragmentos e árvore de FAQs gravados antes do commit ficam na versão antiga
+            self.assertEqual(versoes_secoes(self.jogo.pk), versoes)
+        self.assertEqual(versoes_secoes(self.jogo.pk), {
+            **versoes, 'faqs': versoes['faqs'] + 1, 'avaliacoes': versoes['avaliacoes'] + 1,
+        })
+
+    def test_fragmentos_invalidados_por_secao(self):
+        self.client.get('/jogo/')
+        versoes = versoes_secoes(self.jogo.pk)
+        # Sem sinal: as seções em cache continuam mostrando o texto antigo
+        Avaliacao.objects.filter(jogo=self.jogo).update(texto="Texto novo")
+        AtualizacaoJogo.objects.filter(jogo=self.jogo).update(descricao="Descrição nova")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            FAQJogo.objects.create(jogo=self.jogo, pergunta="Nova pergunta?", resposta="Sim.", ordem=99)
+        self.assertEqual(versoes_secoes(self.jogo.pk), {**versoes, 'faqs': versoes['faqs'] + 1})
+        resposta = self.client.get('/jogo/')
+        self.assertContains(resposta, "Nova pergunta?")
+        self.assertNotContains(resposta, "Texto novo")
+        self.assertNotContains(resposta, "Descrição nova")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Avaliacao.objects.filter(jogo=self.jogo).first().save()
+        resposta = self.client.get('/jogo/')
+        self.assertContains(resposta, "Texto novo")
+        self.assertNotContains(resposta, "Descrição nova")
+        # Notas 1, 2 e 3, mais o ícone da avaliação média
+        self.assertContains(resposta, '<i class="fas fa-star"></i>', count=1 + 2 + 3 + 1)
+
+
+# ===============================================================
+# ESTATÍSTICAS DE AVALIAÇÃO
+# ===============================================================
+class EstatisticasAvaliacaoTests(TestCase):
+    def setUp(self):
+        self.jogo = Jogo.objects.create(titulo="A Crise G")
+        self.usuario = Usuario.objects.create(nome="Maria", email="maria@exemplo.com", senha="maria123")
+
+    def estatisticas(self):
+        self.jogo.refresh_from_db()
+        return self.jogo.avaliacoes_total, self.jogo.avaliacoes_soma, self.jogo.distribuicao_notas
+
+    def test_criar_editar_e_remover(self):
+        avaliacao = Avaliacao.objects.create(jogo=self.jogo, usuario=self.usuario, nota=4)
+        Avaliacao.objects.create(jogo=self.jogo, usuario=self.usuario, nota=2)
+        total, soma, distribuicao = self.estatisticas()
+        self.assertEqual((total, soma), (2, 6))
+        self.assertEqual(distribuicao[4], 1)
+        self.assertEqual(self.jogo.media_notas, 3)
+
+        avaliacao = Avaliacao.objects.get(pk=avaliacao.pk)
+        avaliacao.nota = 5
+        avaliacao.save()
+        total, soma, distribuicao = self.estatisticas()
+        self.assertEqual((total, soma), (2, 7))
+        self.assertEqual((distribuicao[4], distribuicao[5]), (0, 1))
+
+        Avaliacao.objects.filter(pk=avaliacao.pk).delete()
+        total, soma, distribuicao = self.estatisticas()
+        self.assertEqual((total, soma), (1, 2))
+        self.assertEqual(distribuicao[5], 0)
+
+    def test_save_do_jogo_nao_sobrescreve_contadores(self):
+        jogo_desatualizado = Jogo.objects.get(pk=self.jogo.pk)
+        Avaliacao.objects.create(jogo=self.jogo, usuario=self.usuario, nota=5)
+        jogo_desatualizado.titulo = "Novo título"
+        jogo_desatualizado.save()
+        total, soma, _ = self.estatisticas()
+        self.assertEqual((total, soma), (1, 5))
+
+    def test_recalcular_avaliacoes(self):
+        Avaliacao.objects.create(jogo=self.jogo, usuario=self.usuario, nota=3)
+        Avaliacao.objects.create(jogo=self.jogo, usuario=self.usuario, nota=5)
+        Jogo.objects.filter(pk=self.jogo.pk).update(avaliacoes_total=0, avaliacoes_soma=0, avaliacoes_nota_3=0)
+        call_command('recalcular_avaliacoes', stdout=StringIO())
+        total, soma, distribuicao = self.estatisticas()
+        self.assertEqual((total, soma), (2, 8))
+        self.assertEqual((distribuicao[3], distribuicao[5]), (1, 1))
+
+
+# ===============================================================
+# ÍNDICES DAS CONSULTAS FREQUENTES
+# ===============================================================
+class PlanoDeConsultaTests(TestCase):
+    """Falha se alguma consulta quente da página do jogo/admin cair em varredura sequencial."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.jogo = criar_jogo_completo(quantidade=20)
+        cls.usuario = usuario = Usuario.objects.get(email="especialista@acriseg.com")
+        PerguntaUsuario.objects.bulk_create([
+            PerguntaUsuario(jogo=cls.jogo, usuario=usuario, pergunta=f"Pergunta {i}?",
+                            email="especialista@acriseg.com", status=['pendente', 'respondida'][i % 2])
+            for i in range(50)
+        ])
+        Acontecimento.objects.bulk_create([criar_ponto(Acontecimento(titulo="Evento"), i) for i in range(300)])
+
+    def consultas_quentes(self):
+        return {
+            'jogo ativo': (Jogo.objects.filter(ativo=True).order_by('pk')[:1], 'app_jogo'),
+            'faqs visíveis': (
+                FAQJogo.objects.filter(jogo=self.jogo, ativo=True, visivel=True).order_by('ordem', 'categoria'),
+                'app_faqjogo'
+            ),
+            'avaliações de especialistas': (
+                Avaliacao.objects.filter(
+                    jogo=self.jogo, usuario__tipo__in=['especialista', 'admin', 'editor']
+                ).order_by('-nota')[:3],
+                'app_avaliacao'
+            ),
+            'atualizações recentes': (
+                AtualizacaoJogo.objects.filter(jogo=self.jogo).order_by('-data')[:5],
+                'app_atualizacaojogo'
+            ),
+            'perguntas pendentes': (
+                PerguntaUsuario.objects.filter(status='pendente').order_by('-data_envio'),
+                'app_perguntausuario'
+            ),
+            'minhas perguntas': (
+                PerguntaUsuario.objects.filter(usuario=self.usuario).order_by('-data_envio', '-id')[:11],
+                'app_perguntausuario'
+            ),
+            'acontecimentos na caixa do mapa': (
+                Acontecimento.objects.filter(filtro_caixa(Caixa(-10, -40, 10, -20))),
+                'app_acontecimento'
+            ),
+        }
+
+    def varredura_sequencial(self, plano, tabela):
+        for linha in plano.splitlines():
+            if connection.vendor == 'postgresql':
+                if f'Seq Scan on {tabela}' in linha:
+                    return linha
+            elif f'SCAN {tabela}' in linha and 'INDEX' not in linha:
+                return linha
+        return None
+
+    def test_consultas_usam_indices(self):
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # Com tabelas pequenas o planner sempre prefere Seq Scan; aqui só
+                # interessa saber se existe um índice capaz de atender a consulta.
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            for nome, (queryset, tabela) in self.consultas_quentes().items():
+                with self.subTest(consulta=nome):
+                    plano = queryset.explain()
+                    self.assertIsNone(self.varredura_sequencial(plano, tabela), f'{nome}:\n{plano}')
+
+    def plano_da_primeira_consulta(self, funcao):
+        """EXPLAIN da primeira consulta de `funcao`, com os parâmetros ligados como na requisição."""
+        executadas = []
+
+        def registrar(execute, sql, params, many, context):
+            executadas.append((sql, params))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(registrar):
+            funcao()
+        sql, params = executadas[0]
+        with connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+            return '\n'.join(' '.join(map(str, linha)) for linha in cursor.fetchall())
+
+    def test_paginas_seguintes_buscam_no_indice(self):
+        """O cursor vira um intervalo do índice: a página N não percorre as N-1 anteriores."""
+        agora = timezone.now()
+        paginas = {
+            'desastres': (lambda: pagina_desastres(codificar_cursor(['M', 5])), 'app_desastre', 'titulo'),
+            'acontecimentos': (
+                lambda: pagina_acontecimentos(codificar_cursor([date(2024, 1, 1), 5])),
+                'app_acontecimento', 'dataAcontecimento'
+            ),
+            'minhas perguntas': (
+                lambda: pagina_perguntas_do_usuario(self.usuario.pk, codificar_cursor([agora, 5])),
+                'app_perguntausuario', 'data_envio'
+            ),
+        }
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            for nome, (pagina, tabela, coluna) in paginas.items():
+                with self.subTest(pagina=nome):
+                    plano = self.plano_da_primeira_consulta(pagina)
+                    # Busca pela primeira coluna da ordenação, sem varrer o índice nem juntar ORs
+                    buscas = [linha for linha in plano.splitlines()
+                              if f'SEARCH {tabela}' in linha or 'Index Cond' in linha]
+                    self.assertTrue(any(coluna in linha for linha in buscas), f'{nome}:\n{plano}')
+                    for sinal in (f'SCAN {tabela}', 'MULTI-INDEX OR', 'BitmapOr', 'Seq Scan'):
+                        self.assertNotIn(sinal, plano, f'{nome}:\n{plano}')
+
+
+# ===============================================================
+# SENHAS
+# ===============================================================
+class SenhaUsuarioTests(TestCase):
+    def criar_usuario_legado(self, email, senha):
+        # Grava sem passar por Usuario.save(), como os registros antigos
+        usuario = Usuario.objects.create(nome="Legado", email=email, senha="x")
+        Usuario.objects.filter(pk=usuario.pk).update(senha=senha)
+        return Usuario.objects.get(pk=usuario.pk)
+
+    def test_save_usa_hasher_preferido(self):
+        usuario = Usuario.objects.create(nome="Maria", email="maria@exemplo.com", senha="maria123")
+        self.assertTrue(usuario.senha.startswith('scrypt$'))
+        # O hash scrypt já tem 128 caracteres: a coluna precisa de folga (Postgres não trunca)
+        self.assertLess(len(usuario.senha), Usuario._meta.get_field('senha').max_length)
+        self.assertTrue(usuario.verificar_senha("maria123"))
+        self.assertFalse(usuario.verificar_senha("errada"))
+
+    def test_texto_claro_regravado_so_na_coluna_senha(self):
+        usuario = self.criar_usuario_legado("legado@exemplo.com", "legado123")
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertTrue(usuario.verificar_senha("legado123"))
+        updates = [c['sql'] for c in consultas.captured_queries if c['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('"nome"', updates[0])
+        self.assertTrue(Usuario.objects.get(pk=usuario.pk).senha.startswith('scrypt$'))
+
+    def test_hash_antigo_atualizado_no_login(self):
+        antigo = make_password("antiga123", hasher='pbkdf2_sha256')
+        usuario = self.criar_usuario_legado("pbkdf2@exemplo.com", antigo)
+        self.assertTrue(usuario.verificar_senha("antiga123"))
+        self.assertTrue(Usuario.objects.get(pk=usuario.pk).senha.startswith('scrypt$'))
+
+    def test_hashear_senhas(self):
+        for i in range(3):
+            self.criar_usuario_legado(f"u{i}@exemplo.com", f"senha{i}")
+        call_command('hashear_senhas', '--lote', '2', stdout=StringIO())
+        for i, usuario in enumerate(Usuario.objects.order_by('email')):
+            self.assertTrue(usuario.senha.startswith('scrypt$'))
+            self.assertTrue(usuario.verificar_senha(f"senha{i}"))
+
+
+# ===============================================================
+# SESSÃO
+# ===============================================================
+class RenovacaoSessaoTests(TestCase):
+    def setUp(self):
+        Usuario.objects.create(nome="Maria", email="maria@exemplo.com", senha="maria123")
+
+    def escritas_de_sessao(self, requisicoes=10):
+        with CaptureQueriesContext(connection) as consultas:
+            for _ in range(requisicoes):
+                self.client.get('/')
+        return sum(
+            1 for c in consultas.captured_queries
+            if 'django_session' in c['sql'] and c['sql'].startswith(('UPDATE', 'INSERT'))
+        )
+
+    def login(self):
+        self.client.post('/login/', {'email': 'maria@exemplo.com', 'senha': 'maria123'})
+
+    def test_dentro_da_janela_nao_grava(self):
+        self.login()
+        self.assertEqual(self.escritas_de_sessao(), 0)
+
+    def test_anonimo_nao_grava(self):
+        self.assertEqual(self.escritas_de_sessao(), 0)
+
+    @override_settings(SESSAO_JANELA_RENOVACAO=0)
+    def test_janela_vencida_renova_expiracao(self):
+        self.login()
+        self.assertEqual(self.escritas_de_sessao(requisicoes=3), 3)
+        self.assertIn('sessionid', self.client.get('/').cookies)
+
+    def test_logout_nao_mantem_sessao(self):
+        self.login()
+        self.client.get('/logout/')
+        self.assertEqual(dict(self.client.session), {})
+
+
+# ===============================================================
+# USUÁRIO DA REQUISIÇÃO
+# ===============================================================
+class PrincipalTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.usuario = Usuario.objects.create(nome="Maria", email="maria@exemplo.com", senha="maria123")
+        self.client.post('/login/', {'email': 'maria@exemplo.com', 'senha': 'maria123'})
+
+    def test_sessao_guarda_so_o_id(self):
+        self.assertEqual(set(self.client.session.keys()) - {'_renovada_em'}, {'usuario_id'})
+
+    def test_pagina_do_usuario_sem_consultas_com_cache_quente(self):
+        self.client.get('/usuario/')
+        with self.assertNumQueries(0):
+            resposta = self.client.get('/usuario/')
+        self.assertContains(resposta, 'maria@exemplo.com')
+        self.assertIsInstance(resposta.context['user_info']._wrapped, Principal)
+        self.assertIs(resposta.context['user_info']._wrapped, resposta.context['usuario']._wrapped)
+
+    def test_edicao_do_perfil_invalida_cache(self):
+        self.client.get('/usuario/')
+        self.client.post('/usuario/', {
+            'action': 'update_profile', 'nome': 'Maria Silva', 'email': 'maria@exemplo.com', 'tipo': 'usuario'
+        })
+        resposta = self.client.get('/usuario/')
+        self.assertEqual(resposta.context['user_info'].nome, 'Maria Silva')
+
+    def test_anonimo(self):
+        self.client.get('/logout/')
+        resposta = self.client.get('/')
+        self.assertFalse(resposta.context['user_info'].is_authenticated)
+
+
+# ===============================================================
+# LISTAGENS PAGINADAS POR CHAVE
+# ===============================================================
+class ListagemKeysetTests(TestCase):
+    TAMANHO = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        # Títulos repetidos forçam o desempate pelo id
+        desastres = Desastre.objects.bulk_create([Desastre(titulo=f"Desastre {i % 7}") for i in range(23)])
+        Risco.objects.bulk_create([Risco(nome="Risco", nivel="Alto", desastre=d) for d in desastres])
+        TopicoDesastre.objects.bulk_create([TopicoDesastre(titulo="Tópico", desastre=d) for d in desastres])
+        Acontecimento.objects.bulk_create([
+            Acontecimento(titulo=f"Evento {i}", dataAcontecimento=f"2025-0{i % 3 + 1}-01") for i in range(17)
+        ] + [Acontecimento(titulo="Sem data")])
+        artigos = Artigo.objects.bulk_create([Artigo(titulo=f"Artigo {i}") for i in range(14)])
+        TopicoArtigo.objects.bulk_create([TopicoArtigo(titulo="Introdução", artigo=a) for a in artigos])
+
+    def percorrer(self, queryset, ordem):
+        vistos, cursor = [], None
+        while True:
+            pagina = paginar_keyset(queryset, ordem, cursor, tamanho=self.TAMANHO)
+            vistos.extend(item.pk for item in pagina.itens)
+            if not pagina.tem_proxima:
+                return vistos
+            cursor = pagina.proximo_cursor
+
+    def test_percorre_tudo_na_ordem_sem_repetir(self):
+        casos = [
+            (Desastre.objects.all(), ('titulo', 'id')),
+            (Acontecimento.objects.filter(dataAcontecimento__isnull=False), ('-dataAcontecimento', '-id')),
+            (Artigo.objects.all(), ('-id',)),
+        ]
+        for queryset, ordem in casos:
+            esperado = list(queryset.order_by(*ordem).values_list('pk', flat=True))
+            self.assertEqual(self.percorrer(queryset, ordem), esperado, ordem)
+
+    def test_pagina_profunda_com_mesmas_consultas(self):
+        # 1 consulta da página + 2 prefetches (riscos e tópicos), em qualquer profundidade
+        with self.assertNumQueries(3):
+            primeira = pagina_desastres()
+        with self.assertNumQueries(3):
+            segunda = pagina_desastres(primeira.proximo_cursor)
+        self.assertTrue(all(hasattr(d, 'riscos') and hasattr(d, 'topicos') for d in segunda.itens))
+        cursor = pagina_artigos().proximo_cursor
+        with self.assertNumQueries(2):
+            self.assertEqual(len(pagina_artigos(cursor).itens), 2)
+
+    def test_cursor_invalido_volta_para_o_inicio(self):
+        self.assertEqual(pagina_acontecimentos('lixo!').itens, pagina_acontecimentos().itens)
+
+    def test_cursor_com_valores_de_tipo_errado(self):
+        primeira = {
+            'cursor': pagina_desastres().itens,
+            'cursor_historico': pagina_acontecimentos().itens,
+        }
+        casos = [
+            ('/desastres/', 'cursor_historico', ['abc', 1]),
+            ('/desastres/', 'cursor_historico', [{'a': 1}, 1]),
+            ('/desastres/', 'cursor', ['t', 'abc']),
+            ('/desastres/', 'cursor', ['t', 10 ** 30]),
+            ('/artigos/', 'cursor', ['abc']),
+            ('/artigos/', 'cursor', [{'a': 1}]),
+            ('/artigos/', 'cursor', [None]),
+        ]
+        for url, parametro, valores in casos:
+            with self.subTest(url=url, parametro=parametro, valores=valores):
+                resposta = self.client.get(url, {parametro: codificar_cursor(valores)})
+                self.assertEqual(resposta.status_code, 200)
+                if url == '/desastres/':
+                    chave = 'pagina' if parametro == 'cursor' else 'acontecimentos'
+                    self.assertEqual(resposta.context[chave].itens, primeira[parametro])
+        self.assertEqual(pagina_artigos(codificar_cursor(['abc'])).itens, pagina_artigos().itens)
+
+    def test_links_mantem_o_outro_cursor(self):
+        cursor = pagina_desastres().proximo_cursor
+        cursor_historico = pagina_acontecimentos().proximo_cursor
+        resposta = self.client.get('/desastres/', {'cursor_historico': cursor_historico})
+        self.assertContains(resposta, f'?cursor={cursor}&cursor_historico={cursor_historico}"')
+        resposta = self.client.get('/desastres/', {'cursor': cursor})
+        self.assertContains(resposta, f'?cursor={cursor}&cursor_historico={cursor_historico}#historico"')
+
+    def test_views(self):
+        desastre = Desastre.objects.order_by('titulo', 'id').first()
+        resposta = self.client.get('/desastres/')
+        self.assertContains(resposta, f'/desastre/{desastre.pk}/')
+        self.assertContains(resposta, 'Evento')
+        self.assertContains(self.client.get(f'/desastre/{desastre.pk}/'), desastre.titulo)
+        artigo = Artigo.objects.order_by('-id').first()
+        self.assertContains(self.client.get('/artigos/'), f'/artigo/{artigo.pk}/')
+        self.assertContains(self.client.get(f'/artigo/{artigo.pk}/'), 'Introdução')
+        self.assertEqual(self.client.get('/desastre/999999/').status_code, 404)
+
+
+# ===============================================================
+# MAPA DE DESASTRES
+# ===============================================================
+class MapaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        desastre = Desastre.objects.create(titulo="Enchentes")
+        Acontecimento.objects.bulk_create([
+            criar_ponto(Acontecimento(titulo=f"Evento {i}", risco="alto"), i) for i in range(1500)
+        ])
+        Risco.objects.bulk_create([
+            criar_ponto(Risco(nome=f"Risco {i}", nivel="Muito alto", desastre=desastre), i * 7) for i in range(200)
+        ])
+
+    def test_indice_devolve_exatamente_os_pontos_da_caixa(self):
+        caixas = [
+            Caixa(-10, -40, 10, -20),
+            Caixa(-85, -180, 85, 180),
+            Caixa(30.5, 100.25, 31, 100.75),
+            Caixa(-20, 170, 20, 190),      # atravessa a linha de data
+            Caixa(-20, -200, 20, -170),
+        ]
+        for caixa in caixas:
+            esperado = {
+                a.pk for a in Acontecimento.objects.all()
+                if any(p.sul <= a.latitude <= p.norte and p.oeste <= a.longitude <= p.leste for p in caixa.partes())
+            }
+            obtido = set(Acontecimento.objects.filter(filtro_caixa(caixa)).values_list('pk', flat=True))
+            self.assertEqual(obtido, esperado, caixa)
+
+    def test_save_atualiza_quadkey(self):
+        acontecimento = Acontecimento.objects.create(titulo="Novo", latitude=-8.05, longitude=-34.9)
+        quadkey = acontecimento.quadkey
+        self.assertIsNotNone(quadkey)
+        acontecimento.latitude = 13.75
+        acontecimento.save(update_fields=['latitude'])
+        acontecimento.refresh_from_db()
+        self.assertNotEqual(acontecimento.quadkey, quadkey)
+
+    def test_endpoint(self):
+        resposta = self.client.get('/desastres/mapa/pontos/', {'sul': -10, 'oeste': -40, 'norte': 10, 'leste': -20})
+        self.assertEqual(resposta.status_code, 200)
+        dados = resposta.json()
+        self.assertTrue(dados['pontos'])
+        for ponto in dados['pontos']:
+            self.assertTrue(-10 <= ponto['lat'] <= 10 and -40 <= ponto['lon'] <= -20)
+            self.assertEqual(ponto['gravidade'], 4 if ponto['tipo'] == 'risco' else 3)
+
+        mundo = self.client.get('/desastres/mapa/pontos/', {'sul': -90, 'oeste': -180, 'norte': 90, 'leste': 180}).json()
+        self.assertTrue(mundo['truncado'])
+        self.assertEqual(self.client.get('/desastres/mapa/pontos/', {'sul': 'x'}).status_code, 400)
+
+
+class AgrupamentoMapaTests(TestCase):
+    MUNDO = Caixa(-85, -180, 85, 180)
+
+    @classmethod
+    def setUpTestData(cls):
+        desastre = Desastre.objects.create(titulo="Enchentes")
+        Acontecimento.objects.bulk_create([
+            criar_ponto(Acontecimento(titulo=f"Evento {i}", risco="baixo"), i) for i in range(3000)
+        ])
+        Risco.objects.bulk_create([criar_ponto(Risco(nome="Risco", nivel="extremo", desastre=desastre), 5)])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_celulas_somam_todos_os_pontos(self):
+        for zoom in (0, 2, 5):
+            agrupamentos, zoom_usado = agrupamentos_na_caixa(self.MUNDO, zoom)
+            self.assertLessEqual(zoom_usado, zoom)
+            self.assertLessEqual(len(agrupamentos), 16 * 48)
+            self.assertEqual(sum(g['total'] for g in agrupamentos), 3001)
+            self.assertEqual(max(g['gravidade'] for g in agrupamentos), 4)
+
+    def test_tiles_em_cache(self):
+        agrupamentos_na_caixa(self.MUNDO, 3)
+        with self.assertNumQueries(0):
+            agrupamentos_na_caixa(self.MUNDO, 3)
+
+    def test_ponto_novo_atualiza_tiles_em_cache(self):
+        agrupamentos_na_caixa(self.MUNDO, 4)
+        Acontecimento.objects.create(titulo="Novo", latitude=-8.05, longitude=-34.9, risco="muito alto")
+        with self.assertNumQueries(0):
+            incremental, _ = agrupamentos_na_caixa(self.MUNDO, 4)
+        cache.clear()
+        recalculado, _ = agrupamentos_na_caixa(self.MUNDO, 4)
+        chave = lambda g: (round(g['lat'], 6), round(g['lon'], 6), g['total'], g['gravidade'])
+        self.assertEqual(sorted(map(chave, incremental)), sorted(map(chave, recalculado)))
+
+    def test_alteracao_e_remocao_descartam_tiles(self):
+        acontecimento = Acontecimento.objects.get(titulo="Evento 0")
+        agrupamentos_na_caixa(self.MUNDO, 4)
+        acontecimento.latitude, acontecimento.longitude = 50.0, 10.0
+        acontecimento.save()
+        agrupamentos, _ = agrupamentos_na_caixa(self.MUNDO, 4)
+        self.assertEqual(sum(g['total'] for g in agrupamentos), 3001)
+        acontecimento.delete()
+        agrupamentos, _ = agrupamentos_na_caixa(self.MUNDO, 4)
+        self.assertEqual(sum(g['total'] for g in agrupamentos), 3000)
+
+    def test_endpoint_com_pouco_zoom_devolve_agrupamentos(self):
+        dados = self.client.get('/desastres/mapa/pontos/', {
+            'sul': -85, 'oeste': -180, 'norte': 85, 'leste': 180, 'zoom': 2
+        }).json()
+        self.assertNotIn('pontos', dados)
+        self.assertEqual(sum(g['total'] for g in dados['agrupamentos']), 3001)
+
+
+
+class TileMapaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        desastre = Desastre.objects.create(titulo="Enchentes")
+        Acontecimento.objects.bulk_create([
+            criar_ponto(Acontecimento(titulo=f"Evento {i}", risco="alto"), i) for i in range(500)
+        ])
+        Risco.objects.create(nome="Encosta", nivel="extremo", desastre=desastre, latitude=-22.9, longitude=-43.2)
+
+    def setUp(self):
+        cache.clear()
+        diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(diretorio.cleanup)
+        configuracao = override_settings(MAPA_TILES_DIR=diretorio.name)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        self.diretorio = diretorio.name
+
+    def total_do_tile(self, url):
+        return sum(f['properties']['total'] for f in self.client.get(url).json()['features'])
+
+    def test_tile_em_disco_com_etag(self):
+        resposta = self.client.get('/tiles/0/0/0.json')
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta['Content-Type'], 'application/geo+json')
+        self.assertIn('max-age=', resposta['Cache-Control'])
+        self.assertEqual(sum(f['properties']['total'] for f in resposta.json()['features']), 501)
+
+        # Revalidação: só stat do arquivo, nenhuma consulta e nenhum corpo
+        with self.assertNumQueries(0):
+            revalidada = self.client.get('/tiles/0/0/0.json', HTTP_IF_NONE_MATCH=resposta['ETag'])
+        self.assertEqual(revalidada.status_code, 304)
+
+    def test_tile_com_pontos_no_zoom_alto(self):
+        x, y = tile_do_ponto(-22.9, -43.2, 14)
+        dados = self.client.get(f'/tiles/14/{x}/{y}.json').json()
+        self.assertEqual([f['properties']['titulo'] for f in dados['features']], ['Encosta'])
+        self.assertEqual(dados['features'][0]['geometry']['coordinates'], [-43.2, -22.9])
+
+    def test_ponto_novo_apaga_tiles_em_disco(self):
+        anterior = self.client.get('/tiles/0/0/0.json')
+        Acontecimento.objects.create(titulo="Novo", latitude=10, longitude=10, risco="baixo")
+        atual = self.client.get('/tiles/0/0/0.json')
+        self.assertNotEqual(anterior['ETag'], atual['ETag'])
+        self.assertEqual(self.total_do_tile('/tiles/0/0/0.json'), 502)
+
+    def test_tile_inexistente(self):
+        self.assertEqual(self.client.get('/tiles/2/4/0.json').status_code, 404)
+        self.assertEqual(self.client.get('/tiles/17/0/0.json').status_code, 404)
+
+    def test_tile_vazio_nao_vai_para_o_disco(self):
+        resposta = self.client.get('/tiles/14/0/0.json')
+        self.assertEqual(resposta.json()['features'], [])
+        self.assertEqual(self.client.get('/tiles/14/0/0.json', HTTP_IF_NONE_MATCH=resposta['ETag']).status_code, 304)
+        self.assertEqual(sum(len(nomes) for _, _, nomes in os.walk(self.diretorio)), 0)
+
+    def test_despejo_remove_os_menos_usados(self):
+        caminhos = [CacheTilesDisco(diretorio=self.diretorio).caminho(10, i, 0) for i in range(4)]
+        for i, caminho in enumerate(caminhos):
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            with open(caminho, 'wb') as arquivo:
+                arquivo.write(b'x' * 100)
+            os.utime(caminho, (time.time() - 100 + i, time.time()))
+        os.utime(caminhos[0], (time.time(), time.time()))  # o mais antigo acabou de ser lido
+        # O limite conta os blocos ocupados, não os 100 bytes de cada tile
+        discos = CacheTilesDisco(diretorio=self.diretorio, limite_bytes=int(espaco_em_disco(os.stat(caminhos[0])) * 3.5))
+        discos.despejar()
+        self.assertEqual([os.path.exists(c) for c in caminhos], [True, False, True, True])
+
+    def test_despejo_fica_para_um_trabalhador(self):
+        discos = CacheTilesDisco(diretorio=self.diretorio, limite_bytes=1)
+        with mock.patch.object(discos, 'despejar') as despejar:
+            discos.gravar(discos.caminho(10, 0, 0), b'x')
+            discos.gravar(discos.caminho(10, 1, 0), b'x')
+        despejar.assert_not_called()
+        self.assertEqual(Tarefa.objects.filter(tipo='despejar_tiles', status='pendente').count(), 1)
+
+    def test_aquecer_tiles(self):
+        call_command('aquecer_tiles', '--zoom-maximo', '2', stdout=StringIO())
+        gravados = sum(len(nomes) for _, _, nomes in os.walk(self.diretorio))
+        self.assertEqual(gravados, 1 + 4 + 16)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.total_do_tile('/tiles/1/0/0.json') + self.total_do_tile('/tiles/1/1/0.json')
+                             + self.total_do_tile('/tiles/1/0/1.json') + self.total_do_tile('/tiles/1/1/1.json'), 501)
+
+
+# ===============================================================
+# BUSCA
+# ===============================================================
+class BuscaTests(TestCase):
+    def setUp(self):
+        busca.descartar_indice_memoria()
+        self.addCleanup(busca.descartar_indice_memoria)
+        self.jogo = Jogo.objects.create(titulo="A Crise G")
+        self.desastre = Desastre.objects.create(titulo="Enchentes")
+        self.artigo = Artigo.objects.create(titulo="Enchentes urbanas", resumo="Como cidades lidam com cheias.")
+        TopicoArtigo.objects.create(
+            artigo=self.artigo, titulo="Drenagem",
+            texto="Galerias pluviais. " * 30 + "Uma enchente pode ocorrer quando a drenagem falha.",
+        )
+        TopicoDesastre.objects.create(desastre=self.desastre, titulo="Rotas de fuga",
+                                      texto="Planeje a evacuação da família com antecedência.")
+        self.faq = FAQJogo.objects.create(jogo=self.jogo, pergunta="O jogo ensina sobre enchentes?",
+                                          resposta="Sim, há uma fase inteira sobre cheias.")
+
+    def test_documentos_mantidos_a_cada_save(self):
+        self.assertEqual(DocumentoBusca.objects.count(), 4)
+        self.faq.visivel = False
+        self.faq.save()
+        self.assertFalse(DocumentoBusca.objects.filter(tipo='faq').exists())
+        self.artigo.delete()  # leva junto o tópico
+        self.assertEqual(list(DocumentoBusca.objects.values_list('tipo', flat=True)), ['topico_desastre'])
+
+    def test_resultados_ranqueados_com_radical_e_sem_acento(self):
+        resultados = busca.buscar('enchente')
+        self.assertEqual(resultados[0].url, f'/artigo/{self.artigo.pk}/')
+        self.assertEqual({r.tipo for r in resultados}, {'artigo', 'topico_artigo', 'faq'})
+        drenagem = next(r for r in resultados if r.tipo == 'topico_artigo')
+        self.assertIn('enchente', drenagem.trecho)
+        self.assertLessEqual(len(drenagem.trecho), busca.TAMANHO_TRECHO + 2)
+
+        self.assertEqual([r.tipo for r in busca.buscar('EVACUACAO familia')], ['topico_desastre'])
+        self.assertEqual(busca.buscar('enchente inexistente'), [])
+
+    def test_indice_em_memoria_atualizado_sem_reconstruir(self):
+        busca.buscar('cheias')
+        indice = busca._indice_memoria
+        Artigo.objects.create(titulo="Secas prolongadas", resumo="Cheias e secas se alternam.")
+        with self.assertNumQueries(2):  # sincronização + carga dos documentos
+            self.assertEqual(len(busca.buscar('cheias')), 3)
+        self.assertIs(busca._indice_memoria, indice)
+
+    def test_acoes_em_massa_e_reindexacao(self):
+        FAQJogo.objects.filter(pk=self.faq.pk).update(ativo=False)
+        busca.reindexar_modelo(FAQJogo, FAQJogo.objects.filter(pk=self.faq.pk))
+        self.assertFalse(DocumentoBusca.objects.filter(tipo='faq').exists())
+
+        TopicoDesastre.objects.bulk_create([
+            TopicoDesastre(desastre=self.desastre, titulo=f"Abrigo {i}", texto="Abrigos temporários") for i in range(5)
+        ])
+        call_command('reindexar_busca', stdout=StringIO())
+        self.assertEqual(DocumentoBusca.objects.count(), 8)
+        self.assertEqual(len(busca.buscar('abrigo')), 5)
+
+    def test_endpoint(self):
+        dados = self.client.get('/busca/', {'q': 'enchentes', 'limite': 2}).json()
+        self.assertEqual(dados['consulta'], 'enchentes')
+        self.assertEqual(len(dados['resultados']), 2)
+        self.assertEqual(self.client.get('/busca/', {'q': ''}).json()['resultados'], [])
+
+
+class AutocompletarTests(TestCase):
+    def setUp(self):
+        autocompletar.descartar_autocompletar()
+        self.addCleanup(autocompletar.descartar_autocompletar)
+        self.jogo = Jogo.objects.create(titulo="A Crise G", avaliacoes_total=10)
+        self.inundacao = Desastre.objects.create(titulo="Inundação")
+        self.incendio = Desastre.objects.create(titulo="Incêndio Florestal")
+        Risco.objects.create(nome="Encosta", desastre=self.incendio)
+        self.artigo = Artigo.objects.create(titulo="Como agir em incêndios")
+
+    def titulos(self, consulta, **kwargs):
+        return [s.titulo for s in autocompletar.sugerir(consulta, **kwargs)]
+
+    def test_prefixo_sem_acento_e_por_popularidade(self):
+        self.assertEqual(self.titulos('in'), ["Incêndio Florestal", "Inundação", "Como agir em incêndios"])
+        self.assertEqual(self.titulos('INUNDAC'), ["Inundação"])
+        self.assertEqual(self.titulos('florest'), ["Incêndio Florestal"])
+        self.assertEqual(self.titulos('crise'), ["A Crise G"])
+        self.assertEqual(self.titulos('em'), [])  # preposição só casa no começo
+        self.assertEqual(self.titulos('in', limite=1), ["Incêndio Florestal"])
+
+    def test_sinais_corrigem_a_lista_sem_consultar_o_banco(self):
+        self.titulos('in')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.titulos('incendio'), ["Incêndio Florestal", "Como agir em incêndios"])
+
+        faq = FAQJogo.objects.create(jogo=self.jogo, pergunta="Incêndios aparecem no jogo?", resposta="Sim.")
+        self.inundacao.titulo = "Enchente"
+        self.inundacao.save()
+        self.artigo.delete()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.titulos('in'), ["Incêndio Florestal", faq.pergunta])
+            self.assertEqual(self.titulos('ench'), ["Enchente"])
+
+        FAQJogo.objects.filter(pk=faq.pk).update(visivel=False)
+        autocompletar.atualizar_autocompletar(*FAQJogo.objects.filter(pk=faq.pk))
+        self.assertEqual(self.titulos('in'), ["Incêndio Florestal"])
+
+    def test_lista_vencida_e_remontada_em_segundo_plano(self):
+        autocompletar.aquecer_autocompletar().montado_em -= autocompletar.RECONSTRUIR_APOS + 1
+        # update() não dispara sinais: como uma alteração feita em outro processo
+        Desastre.objects.filter(pk=self.inundacao.pk).update(titulo="Inundação Urbana")
+
+        with mock.patch.object(autocompletar.threading, 'Thread') as thread, self.assertNumQueries(0):
+            self.assertEqual(self.titulos('urbana'), [])  # a lista antiga responde sem esperar
+            self.titulos('urbana')
+        thread.assert_called_once()  # a segunda chamada encontra a remontagem em andamento
+
+        with mock.patch.object(autocompletar.connections, 'close_all'):
+            thread.call_args.kwargs['target']()
+        self.assertEqual(self.titulos('urbana'), ["Inundação Urbana"])
+        self.assertFalse(autocompletar._trava_montagem.locked())
+
+    def test_endpoint(self):
+        resposta = self.client.get('/busca/sugestoes/', {'q': 'incê'})
+        self.assertIn('max-age=60', resposta['Cache-Control'])
+        self.assertEqual(resposta.json()['sugestoes'][0], {
+            'tipo': 'desastre', 'titulo': "Incêndio Florestal", 'url': f'/desastre/{self.incendio.pk}/',
+        })
+        self.assertEqual(self.client.get('/busca/sugestoes/', {'q': ' '}).json()['sugestoes'], [])
+
+
+# ===============================================================
+# ADMIN
+# ===============================================================
+class AdminListagemTests(TestCase):
+    LISTAGENS = [
+        'usuario', 'desastre', 'acontecimento', 'risco', 'artigo', 'jogo', 'pagina', 'avaliacao',
+        'topicoartigo', 'topicodesastre', 'pergunta', 'caracteristicajogo', 'requisitojogo',
+        'atualizacaojogo', 'faqjogo', 'imagemjogo', 'perguntausuario', 'tarefa',
+        'emailpendente',
+    ]
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@acriseg.com', 'admin123'))
+        self.pergunta = self.popular(0)
+
+    def popular(self, i):
+        jogo = criar_jogo_completo(2)
+        usuario = Usuario.objects.create(nome=f"Usuário {i}", email=f"usuario{i}@exemplo.com", senha="x")
+        desastre = Desastre.objects.create(titulo=f"Desastre {i}")
+        Risco.objects.create(nome=f"Risco {i}", desastre=desastre)
+        artigo = Artigo.objects.create(titulo=f"Artigo {i}", usuario=usuario)
+        TopicoArtigo.objects.create(artigo=artigo, titulo="Tópico", texto="...")
+        TopicoDesastre.objects.create(desastre=desastre, titulo="Tópico", texto="...")
+        acontecimento = Acontecimento.objects.create(titulo=f"Acontecimento {i}", dataAcontecimento="2024-01-01")
+        Pagina.objects.create(titulo=f"Página {i}", artigo=artigo, desastre=desastre, jogo=jogo,
+                              acontecimento=acontecimento)
+        Pergunta.objects.create(pergunta="Como jogar?", jogo=jogo, usuario=usuario)
+        pergunta = PerguntaUsuario.objects.create(
+            usuario=usuario, jogo=jogo, pergunta="Tem modo offline?", email=usuario.email,
+            publicado_como_faq=jogo.faqs.first(),
+        )
+        EmailPendente.objects.create(pergunta=pergunta, destinatario=usuario.email, assunto="Oi", corpo="...", chave=f"teste:{i}")
+        return pergunta
+
+    def consultas(self):
+        urls = [f'/admin/app/{nome}/' for nome in self.LISTAGENS]
+        urls.append(f'/admin/app/perguntausuario/{self.pergunta.pk}/change/')
+        contagem = {}
+        for url in urls:
+            with CaptureQueriesContext(connection) as consultas:
+                self.assertEqual(self.client.get(url).status_code, 200, url)
+            contagem[url] = len(consultas)
+        return contagem
+
+    def test_consultas_nao_crescem_com_as_linhas(self):
+        self.consultas()  # caches do admin (content types, sessão)
+        poucas = self.consultas()
+        for i in range(1, 6):
+            self.popular(i)
+        self.assertEqual(self.consultas(), poucas)
+
+    def test_listagem_carrega_so_as_colunas_exibidas(self):
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get('/admin/app/perguntausuario/')
+        listagem = next(
+            q['sql'] for q in consultas.captured_queries
+            if q['sql'].startswith('SELECT "app_perguntausuario"."id"')
+        )
+        self.assertIn('"app_usuario"."nome"', listagem)
+        self.assertNotIn('resposta_admin', listagem)
+
+        # Ações recebem os objetos completos
+        self.pergunta.resposta_admin = "Sim."
+        self.pergunta.save()
+        self.client.post('/admin/app/perguntausuario/', {
+            'action': 'marcar_como_pendente', '_selected_action': [self.pergunta.pk],
+        })
+        self.pergunta.refresh_from_db()
+        self.assertEqual(self.pergunta.resposta_admin, "Sim.")
+
+
+
+class AcoesFAQAdminTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@acriseg.com', 'admin123'))
+        self.jogo = criar_jogo_completo(2)  # FAQs com ordem 0 e 1
+        self.outro = Jogo.objects.create(titulo="Outro Jogo")
+        busca.descartar_indice_memoria()
+        self.addCleanup(busca.descartar_indice_memoria)
+
+    def publicar(self, perguntas):
+        """Consultas feitas (pela requisição do admin, pelo trabalhador da fila)."""
+        with CaptureQueriesContext(connection) as requisicao:
+            self.client.post('/admin/app/perguntausuario/', {
+                'action': 'publicar_como_faq', '_selected_action': [p.pk for p in perguntas],
+            })
+        with CaptureQueriesContext(connection) as trabalhador:
+            call_command('run_workers', '--threads=1', '--ate-esvaziar', stdout=StringIO())
+        return len(requisicao), len(trabalhador)
+
+    def criar_perguntas(self, quantidade):
+        return [
+            PerguntaUsuario.objects.create(
+                jogo=self.jogo if i % 2 else self.outro, pergunta=f"Dúvida {i}?", email="a@exemplo.com",
+                resposta_admin="Resposta." if i % 5 else None,
+            )
+            for i in range(quantidade)
+        ]
+
+    def test_publicar_como_faq_em_lote(self):
+        perguntas = self.criar_perguntas(10)
+        self.publicar(perguntas)
+
+        publicadas = PerguntaUsuario.objects.filter(status='publicada').select_related('publicado_como_faq')
+        self.assertEqual(publicadas.count(), 8)  # sem resposta não publica
+        self.assertEqual(
+            sorted(FAQJogo.objects.filter(jogo=self.jogo).values_list('ordem', flat=True)), [0, 1, 2, 3, 4, 5]
+        )
+        self.assertEqual(sorted(FAQJogo.objects.filter(jogo=self.outro).values_list('ordem', flat=True)), [1, 2, 3, 4])
+        for pergunta in publicadas:
+            self.assertEqual(pergunta.publicado_como_faq.pergunta, pergunta.pergunta)
+        self.assertEqual(len(busca.buscar('duvida')), 8)
+        self.assertEqual(Tarefa.objects.get().resultado, '8 pergunta(s) publicada(s) como FAQ.')
+
+        # Publicar de novo não duplica
+        self.publicar(perguntas)
+        self.assertEqual(FAQJogo.objects.count(), 10)
+
+    def test_consultas_nao_crescem_com_a_selecao(self):
+        self.publicar(self.criar_perguntas(1))  # caches do admin (content types, sessão)
+        poucas = self.publicar(self.criar_perguntas(4))
+        muitas = self.publicar(self.criar_perguntas(40))
+        self.assertEqual(muitas, poucas)
+
+    def test_criar_do_template_por_jogo(self):
+        FAQJogo.objects.create(jogo=self.outro, pergunta="Existe?", resposta="Sim.", ordem=7)
+        selecionadas = list(FAQJogo.objects.values_list('pk', flat=True))
+        for _ in range(2):  # a segunda vez não duplica os templates
+            self.client.post('/admin/app/faqjogo/', {'action': 'criar_do_template', '_selected_action': selecionadas})
+            call_command('run_workers', '--threads=1', '--ate-esvaziar', stdout=StringIO())
+        self.assertEqual(sorted(FAQJogo.objects.filter(jogo=self.jogo).values_list('ordem', flat=True)), [0, 1, 2, 3, 4])
+        self.assertEqual(sorted(FAQJogo.objects.filter(jogo=self.outro).values_list('ordem', flat=True)), [7, 8, 9, 10])
+
+
+# ===============================================================
+# FILA DE TAREFAS
+# ===============================================================
+class FilaTarefasTests(TestCase):
+    def setUp(self):
+        self.execucoes = []
+
+        def instavel(tarefa, falhas):
+            self.execucoes.append(tarefa.tentativas)
+            tarefas.informar_progresso(tarefa, 1, 2)
+            if tarefa.tentativas <= falhas:
+                raise RuntimeError('falha temporária')
+            return 'ok'
+
+        tarefas.TAREFAS['instavel'] = instavel
+        self.addCleanup(tarefas.TAREFAS.pop, 'instavel')
+
+    def rodar_fila(self):
+        saida = StringIO()
+        call_command('run_workers', '--threads=1', '--ate-esvaziar', stdout=saida)
+        return saida.getvalue()
+
+    def liberar_espera(self):
+        Tarefa.objects.filter(status='pendente').update(disponivel_em=timezone.now())
+
+    def test_chave_de_idempotencia(self):
+        primeira = tarefas.enfileirar('instavel', chave='lote:1', falhas=0)
+        self.assertEqual(tarefas.enfileirar('instavel', chave='lote:1', falhas=0), primeira)
+        self.rodar_fila()
+        # Concluída, a mesma chave pode voltar para a fila
+        self.assertNotEqual(tarefas.enfileirar('instavel', chave='lote:1', falhas=0), primeira)
+        with self.assertRaises(ValueError):
+            tarefas.enfileirar('inexistente')
+
+    def test_novas_tentativas_com_espera(self):
+        tarefa = tarefas.enfileirar('instavel', falhas=1)
+        self.assertIn('falhou', self.rodar_fila())
+        tarefa.refresh_from_db()
+        self.assertEqual((tarefa.status, tarefa.tentativas), ('pendente', 1))
+        self.assertIn('falha temporária', tarefa.erro)
+        self.assertGreater(tarefa.disponivel_em, timezone.now())
+        self.rodar_fila()  # ainda esperando
+        self.assertEqual(self.execucoes, [1])
+
+        self.liberar_espera()
+        self.rodar_fila()
+        tarefa.refresh_from_db()
+        self.assertEqual((tarefa.status, tarefa.resultado, tarefa.erro, tarefa.percentual), ('concluida', 'ok', '', 100))
+
+    def test_desiste_depois_do_maximo_de_tentativas(self):
+        tarefa = tarefas.enfileirar('instavel', falhas=99)
+        for _ in range(tarefa.maximo_tentativas):
+            self.liberar_espera()
+            self.rodar_fila()
+        tarefa.refresh_from_db()
+        self.assertEqual((tarefa.status, tarefa.tentativas, tarefa.progresso, tarefa.total), ('falhou', 3, 1, 2))
+        self.assertEqual(tarefas.reservar('t'), None)
+
+    def test_tarefa_de_trabalhador_morto_volta_para_a_fila(self):
+        tarefa = tarefas.enfileirar('instavel', falhas=0)
+        self.assertEqual(tarefas.reservar('morto').pk, tarefa.pk)
+        self.assertIsNone(tarefas.reservar('vivo'))
+
+        Tarefa.objects.filter(pk=tarefa.pk).update(prazo=timezone.now() - timedelta(seconds=1))
+        reservada = tarefas.reservar('vivo')
+        self.assertEqual((reservada.pk, reservada.tentativas), (tarefa.pk, 2))
+        # O trabalhador antigo não sobrescreve o resultado
+        tarefas.informar_progresso(Tarefa(pk=tarefa.pk, trabalhador='morto'), 99)
+        self.assertTrue(tarefas.executar(reservada))
+        tarefa.refresh_from_db()
+        self.assertEqual((tarefa.status, tarefa.progresso), ('concluida', 1))
+
+
+class ContadorEmailBackend(locmem.EmailBackend):
+    """locmem que conta as conexões abertas e recusa alguns destinatários."""
+    aberturas = 0
+    recusados = set()
+    servidor_fora = False  # recusa reabrir a conexão
+
+    def open(self):
+        if ContadorEmailBackend.servidor_fora and ContadorEmailBackend.aberturas:
+            raise smtplib.SMTPConnectError(421, b'Servidor indisponivel')
+        ContadorEmailBackend.aberturas += 1
+        return True
+
+    def send_messages(self, messages):
+        for message in messages:
+            if self.recusados.intersection(message.recipients()):
+                raise smtplib.SMTPRecipientsRefused({message.to[0]: (550, b'Caixa inexistente')})
+        return super().send_messages(messages)
+
+
+@override_settings(
+    EMAIL_BACKEND='app.tests.ContadorEmailBackend', EMAIL_LOTE=2,
+    EMAIL_ENVIOS_SIMULTANEOS=1, EMAIL_MAXIMO_TENTATIVAS=2,
+)
+class CaixaSaidaEmailTests(TestCase):
+    def setUp(self):
+        ContadorEmailBackend.aberturas = 0
+        ContadorEmailBackend.recusados = set()
+        ContadorEmailBackend.servidor_fora = False
+        self.jogo = Jogo.objects.create(titulo="Jogo Teste")
+
+    def rodar_fila(self):
+        call_command('run_workers', '--threads=1', '--ate-esvaziar', stdout=StringIO())
+
+    def liberar_espera(self):
+        agora = timezone.now()
+        EmailPendente.objects.filter(status='pendente').update(disponivel_em=agora)
+        Tarefa.objects.filter(status='pendente').update(disponivel_em=agora)
+
+    def test_respostas_em_lotes_por_uma_conexao(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@acriseg.com', 'admin123'))
+        perguntas = [
+            PerguntaUsuario.objects.create(
+                jogo=self.jogo, pergunta=f"Dúvida {i}?", email=f"jogador{i}@exemplo.com",
+                resposta_admin="Resposta." if i else None,
+            )
+            for i in range(6)
+        ]
+        self.client.post('/admin/app/perguntausuario/', {
+            'action': 'enviar_resposta_email', '_selected_action': [p.pk for p in perguntas],
+        })
+        self.rodar_fila()
+
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), [f"jogador{i}@exemplo.com" for i in range(1, 6)])
+        self.assertEqual(ContadorEmailBackend.aberturas, 1)  # 3 lotes, uma conexão
+        self.assertEqual(PerguntaUsuario.objects.filter(status='respondida').count(), 6)
+        self.assertEqual(EmailPendente.objects.filter(status='enviado').count(), 5)
+        self.assertTrue(Tarefa.objects.get(tipo='enviar_emails').resultado.startswith('5 enviado(s), 0 falha(s)'))
+
+        # Rodar a fila de novo não reenvia
+        tarefas.enfileirar('enviar_emails', chave='enviar_emails:0')
+        self.rodar_fila()
+        self.assertEqual(len(mail.outbox), 5)
+
+    def test_falha_volta_com_espera_e_desiste_no_maximo(self):
+        ContadorEmailBackend.recusados = {'sumido@exemplo.com'}
+        for destinatario in ['sumido@exemplo.com', 'ok@exemplo.com']:
+            EmailPendente.objects.create(destinatario=destinatario, assunto="Oi", corpo="Texto", chave=destinatario)
+        emails.agendar_envio()
+        self.rodar_fila()
+
+        self.assertEqual([m.to[0] for m in mail.outbox], ['ok@exemplo.com'])
+        falho = EmailPendente.objects.get(destinatario='sumido@exemplo.com')
+        self.assertEqual((falho.status, falho.tentativas), ('pendente', 1))
+        self.assertIn('SMTPRecipientsRefused', falho.erro)
+        self.assertGreater(falho.disponivel_em, timezone.now())
+        # A execução volta para a fila quando o email estiver liberado, sem contar como falha
+        envio = Tarefa.objects.get(tipo='enviar_emails')
+        self.assertEqual((envio.status, envio.tentativas, envio.disponivel_em), ('pendente', 0, falho.disponivel_em))
+
+        self.liberar_espera()
+        self.rodar_fila()
+        falho.refresh_from_db()
+        self.assertEqual((falho.status, falho.tentativas), ('falhou', 2))
+        self.assertEqual(Tarefa.objects.get(tipo='enviar_emails').status, 'concluida')
+        metricas = emails.metricas_envio()
+        self.assertEqual((metricas['enviados'], metricas['falhas'], metricas['pendentes']), (1, 1, 0))
+        self.assertIsNotNone(metricas['espera_media'])
+
+    @override_settings(EMAIL_LOTE=3)
+    def test_conexao_que_nao_reabre_nao_perde_os_ja_enviados(self):
+        ContadorEmailBackend.recusados = {'sumido@exemplo.com'}
+        ContadorEmailBackend.servidor_fora = True
+        for destinatario in ['ok@exemplo.com', 'sumido@exemplo.com', 'depois@exemplo.com']:
+            EmailPendente.objects.create(destinatario=destinatario, assunto="Oi", corpo="Texto", chave=destinatario)
+        emails.agendar_envio()
+        self.rodar_fila()
+
+        status = dict(EmailPendente.objects.values_list('destinatario', 'status'))
+        self.assertEqual(status, {
+            'ok@exemplo.com': 'enviado', 'sumido@exemplo.com': 'pendente', 'depois@exemplo.com': 'pendente',
+        })
+        self.assertIn('SMTPConnectError', EmailPendente.objects.get(destinatario='depois@exemplo.com').erro)
+
+        ContadorEmailBackend.servidor_fora = False
+        ContadorEmailBackend.recusados = set()
+        self.liberar_espera()
+        self.rodar_fila()
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox),
+                         ['depois@exemplo.com', 'ok@exemplo.com', 'sumido@exemplo.com'])
+
+    def test_email_novo_nao_espera_a_nova_tentativa_de_outro(self):
+        ContadorEmailBackend.recusados = {'sumido@exemplo.com'}
+        EmailPendente.objects.create(destinatario='sumido@exemplo.com', assunto="Oi", corpo="Texto", chave='sumido')
+        emails.agendar_envio()
+        self.rodar_fila()
+        self.assertGreater(Tarefa.objects.get(tipo='enviar_emails').disponivel_em, timezone.now())
+
+        EmailPendente.objects.create(destinatario='novo@exemplo.com', assunto="Oi", corpo="Texto", chave='novo')
+        emails.agendar_envio()
+        self.rodar_fila()
+        self.assertEqual([m.to[0] for m in mail.outbox], ['novo@exemplo.com'])
+        self.assertEqual(EmailPendente.objects.get(chave='sumido').tentativas, 1)
+
+
+# ===============================================================
+# EXPORTAÇÃO
+# ===============================================================
+class ExportacaoTests(TestCase):
+    def setUp(self):
+        self.jogo = Jogo.objects.create(titulo="Jogo Teste")
+        self.usuario = Usuario.objects.create(nome="Ana", email="ana@exemplo.com", senha="segredo123")
+        for i in range(5):
+            PerguntaUsuario.objects.create(
+                jogo=self.jogo, usuario=self.usuario, email=self.usuario.email,
+                pergunta=f"Dúvida {i}?\nSegunda linha" if i else "=HYPERLINK(\"http://x\")",
+            )
+
+    def test_acao_do_admin_gera_csv_em_pedacos(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@acriseg.com', 'admin123'))
+        with mock.patch.object(exportacao, 'LINHAS_POR_PEDACO', 2):
+            resposta = self.client.post('/admin/app/perguntausuario/', {
+                'action': 'exportar_csv',
+                '_selected_action': list(PerguntaUsuario.objects.values_list('pk', flat=True)),
+            })
+            self.assertTrue(resposta.streaming)
+            self.assertIn('attachment; filename="perguntausuario-', resposta['Content-Disposition'])
+            pedacos = list(resposta.streaming_content)
+
+        self.assertEqual(len(pedacos), 4)  # cabeçalho, 2 + 2 linhas, 1 linha
+        linhas = list(csv.reader(io.StringIO(b''.join(pedacos).decode())))
+        self.assertEqual(linhas[0], exportacao.COLUNAS_EXPORTACAO[PerguntaUsuario])
+        self.assertEqual(len(linhas), 6)
+        self.assertEqual(linhas[1][linhas[0].index('pergunta')], '\'=HYPERLINK("http://x")')
+        self.assertEqual(linhas[2][linhas[0].index('pergunta')], "Dúvida 1?\nSegunda linha")
+        self.assertEqual(linhas[2][linhas[0].index('jogo__titulo')], "Jogo Teste")
+
+    def test_acao_do_admin_exporta_usuarios(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@acriseg.com', 'admin123'))
+        pagina = self.client.get('/admin/app/usuario/')
+        for acao in ('tornar_administrador', 'tornar_usuario_padrao', 'exportar_csv', 'exportar_jsonl'):
+            self.assertContains(pagina, f'value="{acao}"')
+        resposta = self.client.post('/admin/app/usuario/', {
+            'action': 'exportar_jsonl', '_selected_action': [self.usuario.pk],
+        })
+        registros = [json.loads(linha) for linha in b''.join(resposta.streaming_content).decode().splitlines()]
+        self.assertEqual([r['email'] for r in registros], ["ana@exemplo.com"])
+        self.assertNotIn('senha', registros[0])
+
+    def test_comando_exporta_jsonl_numa_consulta(self):
+        for i in range(30):
+            Usuario.objects.create(nome=f"Usuário {i}", email=f"usuario{i}@exemplo.com", senha="x")
+        saida = StringIO()
+        with CaptureQueriesContext(connection) as consultas:
+            call_command('exportar_dados', 'usuario', '--formato=jsonl', stdout=saida, stderr=StringIO())
+        self.assertEqual(len(consultas), 1)
+
+        registros = [json.loads(linha) for linha in saida.getvalue().splitlines()]
+        self.assertEqual(len(registros), 31)
+        self.assertEqual(registros[0], {
+            'id': self.usuario.pk, 'nome': "Ana", 'email': "ana@exemplo.com",
+            'tipo': "usuario", 'data': self.usuario.data.isoformat(),
+        })
+
+
+# ===============================================================
+# IMPORTAÇÃO
+# ===============================================================
+class ImportacaoTests(TestCase):
+    def arquivo(self, nome, conteudo):
+        diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(diretorio.cleanup)
+        caminho = os.path.join(diretorio.name, nome)
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(conteudo)
+        return caminho
+
+    def importar(self, *args):
+        saida, erros = StringIO(), StringIO()
+        call_command('import_eventos', *args, stdout=saida, stderr=erros)
+        return saida.getvalue(), erros.getvalue()
+
+    def test_upsert_de_desastres_e_riscos(self):
+        Desastre.objects.create(titulo="Seca")
+        self.importar('desastre', self.arquivo('desastres.csv', (
+            "codigo,titulo,icone\n"
+            "D1,Enchente,🌊\n"
+            "D2,Incêndio,🔥\n"
+        )))
+        riscos = self.arquivo('riscos.jsonl', '\n'.join(json.dumps(linha) for linha in [
+            {'codigo': 'R1', 'nome': 'Rio cheio', 'desastre': 'D1', 'latitude': -23.5, 'longitude': -46.6},
+            {'codigo': 'R2', 'nome': 'Estiagem', 'desastre': 'Seca'},
+            {'codigo': 'R3', 'nome': 'Sem desastre', 'desastre': 'D9'},
+            {'codigo': 'R4', 'nome': 'Longe', 'desastre': 'D2', 'latitude': 123},
+            {'codigo': 'R1', 'nome': 'Rio transbordando', 'desastre': 'D1', 'latitude': -23.5, 'longitude': -46.6},
+        ]) + '\nnão é json\n')
+        with CaptureQueriesContext(connection) as consultas:
+            saida, erros = self.importar('risco', riscos, '--lote=10')
+        self.assertLessEqual(len(consultas), 6)  # mapa de desastres + um INSERT por lote
+        self.assertIn('2 risco(s) gravado(s), 3 inválido(s)', saida)
+        self.assertIn("linha 3: desastre: 'D9' não encontrado", erros)
+        self.assertIn('linha 4: latitude: fora do intervalo', erros)
+        self.assertIn('linha 6: JSON inválido', erros)
+
+        rio = Risco.objects.get(codigo_externo='R1')
+        self.assertEqual((rio.nome, rio.desastre.titulo), ('Rio transbordando', 'Enchente'))
+        self.assertIsNotNone(rio.quadkey)
+        self.assertEqual(Risco.objects.get(codigo_externo='R2').desastre.titulo, 'Seca')
+
+        # Reimportar atualiza; colunas ausentes no arquivo ficam como estão
+        self.importar('desastre', self.arquivo('desastres.csv', "codigo,titulo\nD1,Enchente urbana\n"))
+        self.assertEqual(Desastre.objects.count(), 3)
+        enchente = Desastre.objects.get(codigo_externo='D1')
+        self.assertEqual((enchente.titulo, enchente.icone), ('Enchente urbana', '🌊'))
+
+    def test_acontecimentos_e_topicos(self):
+        desastre = Desastre.objects.create(titulo="Deslizamento", codigo_externo="D1")
+        self.importar('acontecimento', self.arquivo('acontecimentos.csv', (
+            "codigo,titulo,data,risco,latitude,longitude\n"
+            "A1,Deslizamento na serra,15/03/2022,alto,-22.9,-43.2\n"
+            "A2,Chuva forte,2023-01-10,,,\n"
+            "A3,Data ruim,31/02/2023,,,\n"
+        )))
+        self.assertEqual(
+            list(Acontecimento.objects.order_by('codigo_externo').values_list('codigo_externo', 'dataAcontecimento')),
+            [('A1', date(2022, 3, 15)), ('A2', date(2023, 1, 10))],
+        )
+        self.assertIsNone(Acontecimento.objects.get(codigo_externo='A2').quadkey)
+
+        busca.descartar_indice_memoria()
+        self.addCleanup(busca.descartar_indice_memoria)
+        self.importar('topicodesastre', self.arquivo('topicos.jsonl', json.dumps(
+            {'codigo': 'T1', 'titulo': 'Sinais de alerta', 'texto': 'Rachaduras no terreno.', 'desastre': 'D1'}
+        )))
+        self.assertEqual(TopicoDesastre.objects.get().desastre, desastre)
+        self.assertEqual([r.titulo for r in busca.buscar('rachaduras')], ['Sinais de alerta'])
+
+
+# ===============================================================
+# ARQUIVOS ESTÁTICOS
+# ===============================================================
+class EstaticosTests(TestCase):
+    def test_minificacao_preserva_strings_regex_e_quebras(self):
+        js = (
+            "// comentário\n"
+            "const url = 'http://x/*y*/';  /* bloco */\n"
+            "const re = /[\"/]+/g, metade = total / 2\n"
+            "const texto = `a  ${ {b: 1}.b }  c`\n"
+            "function f () {\n    return /x/.test(url)\n}\n"
+        )
+        minificado = estaticos.minificar_js(js)
+        self.assertEqual(minificado, (
+            "const url='http://x/*y*/';const re=/[\"/]+/g,metade=total / 2\n"
+            "const texto=`a  ${{b:1}.b}  c`\n"
+            "function f(){return /x/.test(url)}\n"
+        ))
+        self.assertEqual(estaticos.minificar_js(minificado), minificado)
+
+        css = "/* tema */\na :hover , b > c {\n  content: \"a  b\";\n  margin: 0 auto ;\n}\n"
+        self.assertEqual(estaticos.minificar_css(css), 'a :hover,b>c{content:"a  b";margin:0 auto}')
+
+    def test_divisao_depois_de_operando(self):
+        js = (
+            "x++ / 2; var y = x ++ + 1\n"
+            "z = b-- / 2;  w = a + +/x/.source\n"
+            "m = (a) / 2;  n = b[0] / 2;  o = 1\n"
+        )
+        self.assertEqual(estaticos.minificar_js(js), (
+            "x++ / 2;var y=x ++ + 1\n"
+            "z=b-- / 2;w=a + +/x/.source\n"
+            "m=(a)/ 2;n=b[0]/ 2;o=1\n"
+        ))
+
+    def test_collectstatic_e_servidor(self):
+        diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(diretorio.cleanup)
+        with override_settings(STATIC_ROOT=diretorio.name):
+            call_command('collectstatic', '--noinput', stdout=StringIO())
+            url = static('styles/geral.css')
+            self.assertRegex(url, r'^/static/styles/geral\.[0-9a-f]{12}\.css$')
+            self.assertEqual(static('images/og-image.jpg'), '/static/images/og-image.jpg')
+            with self.assertRaises(ValueError):
+                static('images/nao-existe.jpg')
+
+            resposta = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+            self.assertEqual(resposta['Content-Encoding'], 'gzip')
+            self.assertEqual(resposta['Cache-Control'], f'public, max-age={60 * 60 * 24 * 365}, immutable')
+            self.assertEqual(resposta['Vary'], 'Accept-Encoding')
+            css = gzip.decompress(b''.join(resposta.streaming_content)).decode()
+            with open('app/static/styles/geral.css', encoding='utf-8') as original:
+                self.assertLess(len(css), len(original.read()) * 0.8)
+            self.assertRegex(css, r'url\("\.\./images/icon-pag\.[0-9a-f]{12}\.png"\)')
+
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=resposta['ETag'],
+                                             HTTP_ACCEPT_ENCODING='gzip').status_code, 304)
+            sem_compressao = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip;q=0')
+            self.assertNotIn('Content-Encoding', sem_compressao)
+            self.assertEqual(b''.join(sem_compressao.streaming_content).decode(), css)
+
+            sem_hash = self.client.get('/static/styles/geral.css')
+            self.assertEqual(sem_hash['Cache-Control'], 'public, max-age=3600')
+            self.assertEqual(self.client.get('/static/../config/settings.py').status_code, 404)
+            self.assertLess(
+                os.path.getsize(os.path.join(diretorio.name, 'images', 'icon-pag.png')),
+                os.path.getsize('app/static/images/icon-pag.png'),
+            )
+
+
+# ===============================================================
+# TEMPLATES
+# ===============================================================
+class TemplatesTests(TestCase):
+    def test_loader_em_cache_aquecido_na_inicializacao(self):
+        engine = engines['django'].engine
+        self.assertEqual(engine.dirs, [])
+        [loader] = engine.template_loaders
+        self.assertEqual(type(loader).__module__, 'django.template.loaders.cached')
+
+        loader.reset()
+        tempos = aquecer_templates()
+        self.assertEqual(list(tempos), templates_das_paginas())
+        self.assertIn('base.html', tempos)
+        self.assertIn('jogo.html', tempos)
+        compilados = dict(loader.get_template_cache)
+
+        self.assertEqual(self.client.get('/').status_code, 200)
+        # A página usa os templates já compilados, sem ler nada de novo
+        self.assertIs(loader.get_template_cache['index.html'], compilados['index.html'])
+        self.assertIs(loader.get_template_cache['base.html'], compilados['base.html'])
+
+    def test_benchmark(self):
+        saida = StringIO()
+        call_command('benchmark_templates', '--repeticoes', '1', stdout=saida)
+        self.assertIn('jogo.html', saida.getvalue())
+        self.assertIn('/desastres/ (desastres.html)', saida.getvalue())
+
+
+# ===============================================================
+# SEED
+# ===============================================================
+class SeedDataTests(TestCase):
+    def test_reexecucao_nao_duplica(self):
+        call_command('seed_data', '--scale', '1', stdout=StringIO())
+        contagens = {modelo: modelo.objects.count() for modelo in (Usuario, Jogo, Avaliacao, PerguntaUsuario, FAQJogo)}
+        call_command('seed_data', '--scale', '1', stdout=StringIO())
+        for modelo, total in contagens.items():
+            self.assertEqual(modelo.objects.count(), total, modelo.__name__)
+        jogo = Jogo.objects.get(titulo__startswith='[seed]')
+        self.assertEqual(jogo.avaliacoes_total, Avaliacao.objects.filter(jogo=jogo).count())
+
+    def test_busca_por_titulo_em_lotes(self):
+        with CaptureQueriesContext(connection) as consultas:
+            call_command('seed_data', '--scale', '1', '--lote', '7', stdout=StringIO())
+        listas = [c['sql'].split('"titulo" IN (')[1].split(')')[0] for c in consultas if '"titulo" IN (' in c['sql']]
+        self.assertGreater(len(listas), 1)
+        self.assertLessEqual(max(lista.count(',') + 1 for lista in listas), 7)
+        self.assertFalse(Desastre.objects.filter(titulo__startswith='[seed]', risco__isnull=True).exists())
@@ -0,0 +1,200 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from django.conf import settings
+
+from .estaticos import etag_do_arquivo
+from .geo import ZOOM_INDICE, faixa_do_tile, filtro_faixas, intercalar, separar
+from .mapa import (
+    ZOOM_MAXIMO_AGRUPAMENTO, celulas_dos_tiles, deslocamento, geracao_agrupamentos,
+    pontos_do_filtro, resumir_celulas
+)
+from .tarefas import enfileirar, tarefa
+
+# ===============================================================
+# TILES JSON DO MAPA
+# ===============================================================
+# /tiles/{z}/{x}/{y}.json devolve um GeoJSON (FeatureCollection) com os
+# agrupamentos do tile (zoom <= ZOOM_MAXIMO_AGRUPAMENTO) ou com os próprios
+# pontos. O tile pronto fica em disco e é servido como arquivo estático:
+# o ETag vem do mtime/tamanho, sem ler nem regerar o conteúdo. Tiles sem
+# pontos (a maior parte do mundo) não vão para o disco: o conteúdo é sempre
+# o mesmo. O despejo roda fora da requisição, na tarefa despejar_tiles.
+MAXIMO_PONTOS_TILE = 2000
+
+# Fração do limite gravada por um processo antes de enfileirar o despejo LRU
+FRACAO_DESPEJO = 0.05
+
+# Bloco usado para arredondar o tamanho quando o sistema não informa st_blocks
+BLOCO_DISCO = 4096
+
+
+def feature(latitude, longitude, propriedades):
+    return {
+        'type': 'Feature',
+        'geometry': {'type': 'Point', 'coordinates': [round(longitude, 6), round(latitude, 6)]},
+        'properties': propriedades,
+    }
+
+
+def gerar_tile(zoom, x, y):
+    """Conteúdo (bytes) do tile, direto do banco/cache de agrupamentos."""
+    truncado = False
+    if zoom <= ZOOM_MAXIMO_AGRUPAMENTO:
+        codigo = intercalar(x, y)
+        features = [
+            feature(grupo.pop('lat'), grupo.pop('lon'), {'agrupamento': True, **grupo})
+            for grupo in resumir_celulas(celulas_dos_tiles(zoom, [codigo])[codigo])
+        ]
+    else:
+        pontos, truncado = pontos_do_filtro(filtro_faixas([faixa_do_tile(zoom, x, y)]), MAXIMO_PONTOS_TILE)
+        features = [feature(ponto.pop('lat'), ponto.pop('lon'), ponto) for ponto in pontos]
+
+    colecao = {'type': 'FeatureCollection', 'features': features, 'truncado': truncado}
+    return json.dumps(colecao, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+TILE_VAZIO = json.dumps(
+    {'type': 'FeatureCollection', 'features': [], 'truncado': False}, separators=(',', ':')
+).encode()
+ETAG_TILE_VAZIO = '"vazio"'
+
+
+def espaco_em_disco(info):
+    """Bytes ocupados pelo arquivo: um tile pequeno gasta um bloco inteiro."""
+    blocos = getattr(info, 'st_blocks', None)
+    if blocos is not None:
+        return blocos * 512
+    return -(-info.st_size // BLOCO_DISCO) * BLOCO_DISCO
+
+
+class CacheTilesDisco:
+    """Tiles prontos em disco, separados pela geração dos agrupamentos.
+
+    O despejo remove gerações antigas e, acima de MAPA_TILES_LIMITE_BYTES
+    (espaço ocupado em disco, em blocos), os tiles usados há mais tempo
+    (atime, marcado a cada leitura).
+    """
+
+    def __init__(self, diretorio=None, limite_bytes=None):
+        self._diretorio = diretorio
+        self._limite_bytes = limite_bytes
+        self.gravados_desde_despejo = 0
+
+    @property
+    def diretorio(self):
+        return self._diretorio or settings.MAPA_TILES_DIR
+
+    @property
+    def limite_bytes(self):
+        return self._limite_bytes or settings.MAPA_TILES_LIMITE_BYTES
+
+    def caminho(self, zoom, x, y, geracao=None):
+        if geracao is None:
+            geracao = geracao_agrupamentos()
+        return os.path.join(self.diretorio, str(geracao), str(zoom), str(x), f'{y}.json')
+
+    def obter(self, zoom, x, y):
+        """(caminho, etag, conteudo) do tile; gera e grava em disco se ainda não existir.
+
+        `conteudo` só vem preenchido quando não é preciso ler o arquivo: no
+        tile recém-gerado e no tile vazio, que nunca é gravado (caminho None).
+        """
+        caminho = self.caminho(zoom, x, y)
+        try:
+            info = os.stat(caminho)
+            # Marca o uso para o LRU sem mexer no mtime, que compõe o ETag
+            os.utime(caminho, ns=(time.time_ns(), info.st_mtime_ns))
+            return caminho, etag_do_arquivo(info), None
+        except FileNotFoundError:
+            pass
+        conteudo = gerar_tile(zoom, x, y)
+        if conteudo == TILE_VAZIO:
+            return None, ETAG_TILE_VAZIO, conteudo
+        info = self.gravar(caminho, conteudo)
+        return caminho, etag_do_arquivo(info), conteudo
+
+    def gravar(self, caminho, conteudo):
+        # Arquivo temporário + os.replace: quem lê nunca vê um tile pela metade
+        diretorio = os.path.dirname(caminho)
+        os.makedirs(diretorio, exist_ok=True)
+        descritor, temporario = tempfile.mkstemp(dir=diretorio, suffix='.tmp')
+        with os.fdopen(descritor, 'wb') as arquivo:
+            arquivo.write(conteudo)
+        info = os.stat(temporario)
+        os.replace(temporario, caminho)
+
+        self.gravados_desde_despejo += espaco_em_disco(info)
+        if self.gravados_desde_despejo > self.limite_bytes * FRACAO_DESPEJO:
+            # O os.walk do despejo fica com um trabalhador, não com a requisição
+            self.gravados_desde_despejo = 0
+            enfileirar('despejar_tiles', chave='despejar_tiles')
+        return info
+
+    def remover_do_ponto(self, *quadkeys):
+        """Apaga, em todos os zooms, os tiles que contêm as posições informadas."""
+        geracao = geracao_agrupamentos()
+        for quadkey in quadkeys:
+            if quadkey is None:
+                continue
+            for zoom in range(ZOOM_INDICE + 1):
+                x, y = separar(quadkey >> deslocamento(zoom))
+                try:
+                    os.remove(self.caminho(zoom, x, y, geracao))
+                except FileNotFoundError:
+                    pass
+
+    def arquivos(self, geracao):
+        """[(atime, espaço em disco, caminho)] dos tiles de uma geração."""
+        arquivos = []
+        for raiz, _, nomes in os.walk(os.path.join(self.diretorio, str(geracao))):
+            for nome in nomes:
+                caminho = os.path.join(raiz, nome)
+                try:
+                    info = os.stat(caminho)
+                except FileNotFoundError:
+                    continue
+                arquivos.append((info.st_atime_ns, espaco_em_disco(info), caminho))
+        return arquivos
+
+    def despejar(self):
+        """Libera espaço até 90% do limite; retorna a quantidade de bytes removida."""
+        self.gravados_desde_despejo = 0
+        if not os.path.isdir(self.diretorio):
+            return 0
+
+        atual = str(geracao_agrupamentos())
+        liberados = 0
+        for nome in os.listdir(self.diretorio):
+            if nome != atual:
+                liberados += sum(tamanho for _, tamanho, _ in self.arquivos(nome))
+                shutil.rmtree(os.path.join(self.diretorio, nome), ignore_errors=True)
+
+        arquivos = self.arquivos(atual)
+        total = sum(tamanho for _, tamanho, _ in arquivos)
+        if total <= self.limite_bytes:
+            return liberados
+
+        alvo = self.limite_bytes * 0.9
+        for _, tamanho, caminho in sorted(arquivos):
+            if total <= alvo:
+                break
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                pass
+            total -= tamanho
+            liberados += tamanho
+        return liberados
+
+
+tiles_em_disco = CacheTilesDisco()
+
+
+@tarefa('despejar_tiles')
+def tarefa_despejar_tiles(tarefa):
+    liberados = tiles_em_disco.despejar()
+    return f'{liberados / 1024:.0f} KiB liberados pelo despejo de tiles.'
@@ -2,18 +2,28 @@ from django.urls import path
 from .views import (
     IndexView, AdminView, ArtigoView, ArtigosView,
     DesastreView, DesastresView, GeneralizadoView,
-    JogoView, LoginView, UsuarioView, RegistroView, LogoutView
+    JogoView, LoginView, UsuarioView, RegistroView, LogoutView,
+    MapaPontosView, TileMapaView, BuscaView, AutocompletarView, FAQsJogoView, MinhasPerguntasView
 )
 
 urlpatterns = [
     path('', IndexView.as_view(), name='index'),
     path('admin/', AdminView.as_view(), name='admin_personalizado'),
     path('artigo/', ArtigoView.as_view(), name='artigo'),
+    path('artigo/<int:pk>/', ArtigoView.as_view(), name='artigo_detalhe'),
     path('artigos/', ArtigosView.as_view(), name='artigos'),
+    path('busca/', BuscaView.as_view(), name='busca'),
+    path('busca/sugestoes/', AutocompletarView.as_view(), name='autocompletar'),
     path('desastre/', DesastreView.as_view(), name='desastre'),
+    path('desastre/<int:pk>/', DesastreView.as_view(), name='desastre_detalhe'),
     path('desastres/', DesastresView.as_view(), name='desastres'),
+    path('desastres/mapa/pontos/', MapaPontosView.as_view(), name='mapa_pontos'),
+    path('tiles/<int:z>/<int:x>/<int:y>.json', TileMapaView.as_view(), name='mapa_tile'),
     path('generalizado/', GeneralizadoView.as_view(), name='generalizado'),
     path('jogo/', JogoView.as_view(), name='jogo'),
+    path('jogo/minhas-perguntas/', MinhasPerguntasView.as_view(), name='minhas_perguntas'),
+    path('jogo/<int:jogo_id>/faqs/', FAQsJogoView.as_view(), name='jogo_faqs'),
+    path('jogo/<int:jogo_id>/faqs/<str:categoria>/', FAQsJogoView.as_view(), name='jogo_faqs_categoria'),
     path('login/', LoginView.as_view(), name='login'),
     path('registro/', RegistroView.as_view(), name='registro'),
     path('logout/', LogoutView.as_view(), name='logout'),
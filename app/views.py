@@ -1,10 +1,22 @@
 from django.views.generic import TemplateView
+from django.conf import settings
+from django.http import Http404, HttpResponse, JsonResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers, set_response_etag
 from django.shortcuts import render, redirect
 from django.views import View
 from django.contrib import messages
 from .forms import LoginForm, RegistroForm
-from .models import Usuario, Jogo, CaracteristicaJogo, RequisitoJogo, AtualizacaoJogo, FAQJogo, ImagemJogo, Avaliacao, PerguntaUsuario
-from django.db.models import Avg, Count
+from .models import Usuario, Jogo, PerguntaUsuario
+from .autocompletar import LIMITE_SUGESTOES, MAXIMO_SUGESTOES, sugerir
+from .busca import LIMITE_RESULTADOS, buscar
+from .geo import ZOOM_INDICE, Caixa
+from .mapa import ZOOM_MAXIMO_AGRUPAMENTO, agrupamentos_na_caixa, pontos_na_caixa
+from .paginas import (
+    arvore_faqs, obter_pagina_jogo, pagina_perguntas_do_usuario, pagina_desastres, pagina_acontecimentos, pagina_artigos,
+    carregar_desastre, carregar_artigo, estatisticas_desastres
+)
+from .tiles import gerar_tile, tiles_em_disco
 
 # View para a página inicial
 class IndexView(View):
@@ -15,88 +27,176 @@ class IndexView(View):
 class AdminView(View):
     def get(self, request, *args, **kwargs):
         # Verificar se o usuário está logado
-        if 'usuario_id' not in request.session:
+        if not request.usuario.is_authenticated:
             messages.error(request, 'Você precisa fazer login para acessar esta página.')
             return redirect('login')
         return render(request, 'admin.html')
 
 class ArtigoView(View):
-    def get(self, request, *args, **kwargs):
-        return render(request, 'artigo.html')
+    def get(self, request, pk=None, *args, **kwargs):
+        # Sem pk continua exibindo o artigo de exemplo do template
+        artigo = None
+        if pk is not None:
+            artigo = carregar_artigo(pk)
+            if artigo is None:
+                raise Http404('Artigo não encontrado.')
+        return render(request, 'artigo.html', {'artigo': artigo})
 
 class ArtigosView(View):
     def get(self, request, *args, **kwargs):
-        return render(request, 'artigos.html')
+        pagina = pagina_artigos(request.GET.get('cursor'))
+        return render(request, 'artigos.html', {'pagina': pagina})
 
 class DesastreView(View):
-    def get(self, request, *args, **kwargs):
-        return render(request, 'desastre.html')
+    def get(self, request, pk=None, *args, **kwargs):
+        # Sem pk continua exibindo o desastre de exemplo do template
+        desastre = None
+        if pk is not None:
+            desastre = carregar_desastre(pk)
+            if desastre is None:
+                raise Http404('Desastre não encontrado.')
+        return render(request, 'desastre.html', {'desastre': desastre})
 
 class DesastresView(View):
     def get(self, request, *args, **kwargs):
-        return render(request, 'desastres.html')
+        return render(request, 'desastres.html', {
+            'pagina': pagina_desastres(request.GET.get('cursor')),
+            'acontecimentos': pagina_acontecimentos(request.GET.get('cursor_historico')),
+            'estatisticas': estatisticas_desastres(),
+        })
+
+class MapaPontosView(View):
+    """JSON com os riscos e acontecimentos dentro da área visível do mapa.
+
+    Com zoom até ZOOM_MAXIMO_AGRUPAMENTO devolve agrupamentos em vez de pontos.
+    """
+    def get(self, request, *args, **kwargs):
+        try:
+            caixa = Caixa.dos_parametros(request.GET)
+        except ValueError as e:
+            return JsonResponse({'erro': str(e)}, status=400)
+        try:
+            zoom = int(request.GET.get('zoom', ZOOM_MAXIMO_AGRUPAMENTO + 1))
+        except ValueError:
+            return JsonResponse({'erro': 'Zoom inválido.'}, status=400)
+
+        if zoom <= ZOOM_MAXIMO_AGRUPAMENTO:
+            agrupamentos, zoom = agrupamentos_na_caixa(caixa, zoom)
+            return JsonResponse({'agrupamentos': agrupamentos, 'zoom': zoom})
+
+        pontos, truncado = pontos_na_caixa(caixa)
+        return JsonResponse({'pontos': pontos, 'truncado': truncado})
+
+class TileMapaView(View):
+    """GeoJSON de um tile do mapa, servido do cache em disco com ETag."""
+    def get(self, request, z, x, y, *args, **kwargs):
+        if z > ZOOM_INDICE or x >= 1 << z or y >= 1 << z:
+            raise Http404('Tile inexistente.')
+
+        caminho, etag, conteudo = tiles_em_disco.obter(z, x, y)
+        resposta = get_conditional_response(request, etag=etag)
+        if resposta is None:
+            if conteudo is None:
+                try:
+                    with open(caminho, 'rb') as arquivo:
+                        conteudo = arquivo.read()
+                except FileNotFoundError:
+                    # Apagado por uma alteração ou pelo despejo entre o stat e a leitura
+                    conteudo = gerar_tile(z, x, y)
+            resposta = HttpResponse(conteudo, content_type='application/geo+json')
+        resposta['ETag'] = etag
+        patch_cache_control(resposta, public=True, max_age=settings.MAPA_TILES_MAX_AGE)
+        return resposta
+
+class BuscaView(View):
+    """JSON com os resultados da busca do site (?q=...), do mais relevante ao menos."""
+    def get(self, request, *args, **kwargs):
+        consulta = request.GET.get('q', '').strip()
+        try:
+            limite = min(int(request.GET.get('limite', LIMITE_RESULTADOS)), 50)
+        except ValueError:
+            limite = LIMITE_RESULTADOS
+        resultados = buscar(consulta, max(limite, 1))
+        return JsonResponse({'consulta': consulta, 'resultados': [r.como_dict() for r in resultados]})
+
+
+class AutocompletarView(View):
+    """Sugestões para o campo de busca (?q=prefixo), das mais populares às menos."""
+    def get(self, request, *args, **kwargs):
+        consulta = request.GET.get('q', '')
+        try:
+            limite = min(int(request.GET.get('limite', LIMITE_SUGESTOES)), MAXIMO_SUGESTOES)
+        except ValueError:
+            limite = LIMITE_SUGESTOES
+        sugestoes = sugerir(consulta, max(limite, 1))
+        resposta = JsonResponse({'consulta': consulta, 'sugestoes': [s.como_dict() for s in sugestoes]})
+        # O navegador repete prefixos ao apagar e redigitar
+        patch_cache_control(resposta, public=True, max_age=60)
+        return resposta
 
 class GeneralizadoView(View):
     def get(self, request, *args, **kwargs):
         return render(request, 'generalizado.html')
 
+class FAQsJogoView(View):
+    """JSON das FAQs do jogo: o índice das categorias ou, com `categoria`, as FAQs dela."""
+    def get(self, request, jogo_id, categoria=None, *args, **kwargs):
+        arvore = arvore_faqs(jogo_id)
+        if not arvore.jogo_ativo:
+            raise Http404('Jogo inexistente.')
+        if categoria is None:
+            conteudo, etag = arvore.json, arvore.etag
+        elif categoria in arvore.categorias:
+            conteudo, etag = arvore.categorias[categoria].json, arvore.categorias[categoria].etag
+        else:
+            raise Http404('Categoria sem FAQs.')
+
+        resposta = get_conditional_response(request, etag=etag)
+        if resposta is None:
+            resposta = HttpResponse(conteudo, content_type='application/json')
+        resposta['ETag'] = etag
+        patch_cache_control(resposta, public=True, max_age=60)
+        return resposta
+
+class MinhasPerguntasView(View):
+    """JSON paginado (?cursor=...) com as perguntas do usuário logado, das mais recentes às mais antigas.
+
+    Só códigos de status e datas ISO; os rótulos e o HTML ficam no jogo.js.
+    """
+    def get(self, request, *args, **kwargs):
+        if not request.usuario.is_authenticated:
+            return JsonResponse({'erro': 'Faça login para ver suas perguntas.'}, status=403)
+
+        pagina = pagina_perguntas_do_usuario(request.usuario.id, request.GET.get('cursor'))
+        resposta = JsonResponse({
+            'perguntas': [
+                {
+                    'id': pergunta.pk,
+                    'pergunta': pergunta.pergunta,
+                    'status': pergunta.status,
+                    'data': timezone.localdate(pergunta.data_envio).isoformat(),
+                }
+                for pergunta in pagina.itens
+            ],
+            'proximo': pagina.proximo_cursor,
+        }, json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')})
+        # ETag do conteúdo: abrir a lista de novo sem mudanças volta 304, sem corpo
+        set_response_etag(resposta)
+        patch_cache_control(resposta, private=True, no_cache=True)
+        patch_vary_headers(resposta, ('Cookie',))
+        return get_conditional_response(request, etag=resposta['ETag'], response=resposta)
+
 class JogoView(View):
     def get(self, request, *args, **kwargs):
         try:
-            # Buscar o jogo principal
-            jogo = Jogo.objects.filter(ativo=True).first()
+            # Página do jogo principal (cache versionado; ver app/paginas.py)
+            pagina = obter_pagina_jogo()
             
-            if not jogo:
+            if not pagina:
                 messages.error(request, 'Nenhum jogo disponível no momento.')
                 return redirect('index')
             
-            # Buscar FAQs visíveis
-            faqs = FAQJogo.objects.filter(
-                jogo=jogo, 
-                ativo=True, 
-                visivel=True
-            ).order_by('ordem', 'categoria')
-            
-            # Agrupar FAQs por categoria
-            faqs_por_categoria = {}
-            for faq in faqs:
-                categoria = faq.get_categoria_display()
-                if categoria not in faqs_por_categoria:
-                    faqs_por_categoria[categoria] = []
-                faqs_por_categoria[categoria].append(faq)
-            
-            # Buscar dados relacionados
-            caracteristicas = CaracteristicaJogo.objects.filter(jogo=jogo).order_by('ordem')
-            requisitos_minimos = RequisitoJogo.objects.filter(jogo=jogo, tipo='minimo')
-            requisitos_recomendados = RequisitoJogo.objects.filter(jogo=jogo, tipo='recomendado')
-            atualizacoes = AtualizacaoJogo.objects.filter(jogo=jogo).order_by('-data')[:5]
-            imagens = ImagemJogo.objects.filter(jogo=jogo).order_by('ordem')
-            
-            # Buscar avaliações de especialistas
-            avaliacoes_especialistas = Avaliacao.objects.filter(
-                jogo=jogo,
-                usuario__tipo__in=['especialista', 'admin', 'editor']
-            ).select_related('usuario').order_by('-nota')[:3]
-            
-            # Calcular média das avaliações
-            media_avaliacoes = Avaliacao.objects.filter(jogo=jogo).aggregate(
-                media=Avg('nota'),
-                total=Count('id')
-            )
-            
-            context = {
-                'jogo': jogo,
-                'caracteristicas': caracteristicas,
-                'requisitos_minimos': requisitos_minimos,
-                'requisitos_recomendados': requisitos_recomendados,
-                'atualizacoes': atualizacoes,
-                'faqs_por_categoria': faqs_por_categoria,
-                'faqs': faqs,
-                'imagens': imagens[:4],
-                'avaliacoes_especialistas': avaliacoes_especialistas,
-                'media_avaliacoes': media_avaliacoes['media'] or 4.8,
-                'total_avaliacoes': media_avaliacoes['total'] or 50,
-            }
+            context = pagina.contexto()
             
             return render(request, 'jogo.html', context)
             
@@ -127,17 +227,12 @@ class JogoView(View):
                     messages.error(request, 'Por favor, forneça seu email para resposta.')
                     return redirect('jogo')
                 
-                # Verificar se o usuário está logado
-                usuario = None
-                if 'usuario_id' in request.session:
-                    try:
-                        usuario = Usuario.objects.get(id=request.session['usuario_id'])
-                    except Usuario.DoesNotExist:
-                        pass
+                # Usuário logado (None para anônimos)
+                usuario_id = request.usuario.id
                 
                 # Criar a pergunta do usuário
                 PerguntaUsuario.objects.create(
-                    usuario=usuario,
+                    usuario_id=usuario_id,
                     jogo=jogo,
                     pergunta=pergunta_texto,
                     email=email,
@@ -155,7 +250,7 @@ class JogoView(View):
 class LoginView(View):
     def get(self, request, *args, **kwargs):
         # Se já estiver logado, redirecionar para index
-        if 'usuario_id' in request.session:
+        if request.usuario.is_authenticated:
             return redirect('index')
         
         form = LoginForm()
@@ -178,11 +273,8 @@ class LoginView(View):
             try:
                 usuario = Usuario.objects.get(email=email)
                 if usuario.verificar_senha(senha):  # Usando o método verificar_senha
-                    # Armazenar informações do usuário na sessão
+                    # Só o id vai para a sessão; nome, email e tipo vêm de request.usuario
                     request.session['usuario_id'] = usuario.id
-                    request.session['usuario_nome'] = usuario.nome
-                    request.session['usuario_email'] = usuario.email
-                    request.session['usuario_tipo'] = usuario.tipo
                     
                     messages.success(request, f'Bem-vindo(a), {usuario.nome}!')
                     return redirect('index')
@@ -210,9 +302,6 @@ class RegistroView(View):
                 
                 # Login automático após registro
                 request.session['usuario_id'] = usuario.id
-                request.session['usuario_nome'] = usuario.nome
-                request.session['usuario_email'] = usuario.email
-                request.session['usuario_tipo'] = usuario.tipo
                 
                 messages.success(request, 'Cadastro realizado com sucesso!')
                 return redirect('index')
@@ -232,15 +321,9 @@ class RegistroView(View):
 
 class LogoutView(View):
     def get(self, request, *args, **kwargs):
-        # Limpar a sessão
-        if 'usuario_id' in request.session:
-            del request.session['usuario_id']
-        if 'usuario_nome' in request.session:
-            del request.session['usuario_nome']
-        if 'usuario_email' in request.session:
-            del request.session['usuario_email']
-        if 'usuario_tipo' in request.session:
-            del request.session['usuario_tipo']
+        # Limpar a sessão (nome/email/tipo só existem em sessões antigas)
+        for chave in ('usuario_id', 'usuario_nome', 'usuario_email', 'usuario_tipo'):
+            request.session.pop(chave, None)
         
         messages.success(request, 'Logout realizado com sucesso!')
         return redirect('index')
@@ -248,26 +331,20 @@ class LogoutView(View):
 class UsuarioView(View):
     def get(self, request, *args, **kwargs):
         # Verificar se o usuário está logado
-        if 'usuario_id' not in request.session:
+        if not request.usuario.is_authenticated:
             messages.error(request, 'Você precisa fazer login para acessar esta página.')
             return redirect('login')
         
-        # Obter informações do usuário
-        usuario_id = request.session.get('usuario_id')
-        try:
-            usuario = Usuario.objects.get(id=usuario_id)
-            return render(request, 'usuario.html', {'usuario': usuario})
-        except Usuario.DoesNotExist:
-            messages.error(request, 'Usuário não encontrado.')
-            return redirect('index')
+        # request.usuario já tem o que o template usa; sem nova consulta
+        return render(request, 'usuario.html', {'usuario': request.usuario})
     
     def post(self, request, *args, **kwargs):
         # Verificar se o usuário está logado
-        if 'usuario_id' not in request.session:
+        if not request.usuario.is_authenticated:
             messages.error(request, 'Você precisa fazer login para executar esta ação.')
             return redirect('login')
         
-        usuario_id = request.session.get('usuario_id')
+        usuario_id = request.usuario.id
         action = request.POST.get('action')
         
         try:
@@ -280,11 +357,6 @@ class UsuarioView(View):
                 usuario.tipo = request.POST.get('tipo', 'usuario')
                 usuario.save()
                 
-                # Atualizar sessão
-                request.session['usuario_nome'] = usuario.nome
-                request.session['usuario_email'] = usuario.email
-                request.session['usuario_tipo'] = usuario.tipo
-                
                 messages.success(request, 'Perfil atualizado com sucesso!')
                 
             elif action == 'change_password':
@@ -293,7 +365,7 @@ class UsuarioView(View):
                 confirm_password = request.POST.get('confirm_password')
                 
                 # Verificar senha atual
-                if usuario.senha != current_password:
+                if not usuario.verificar_senha(current_password):
                     messages.error(request, 'Senha atual incorreta.')
                 elif new_password != confirm_password:
                     messages.error(request, 'As senhas não coincidem.')
@@ -23,10 +23,13 @@ INSTALLED_APPS = [
 
 # o template usado
 MIDDLEWARE = [
+	'app.middleware.ArquivosEstaticosMiddleware',
 	'django.middleware.common.CommonMiddleware',
 	'django.middleware.csrf.CsrfViewMiddleware',
 	'django.middleware.security.SecurityMiddleware',
 	'django.contrib.sessions.middleware.SessionMiddleware',
+	'app.middleware.RenovacaoSessaoMiddleware',
+	'app.middleware.UsuarioSessaoMiddleware',
 	'django.contrib.messages.middleware.MessageMiddleware',
 	'django.middleware.clickjacking.XFrameOptionsMiddleware',
 	'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -34,19 +37,27 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'config.urls'
 
+# Os templates ficam em app/templates e são achados pelo loader de apps
+# (DIRS vazio: nenhuma pasta a mais varrida a cada template). O loader em
+# cache compila cada template uma vez por processo; config/wsgi.py o aquece
+# na inicialização (app.paginas.aquecer_templates). Em DEBUG o autoreload
+# do runserver esvazia o cache quando um template muda.
 TEMPLATES = [
 	{
 		'BACKEND': 'django.template.backends.django.DjangoTemplates',
-		'DIRS': [
-			os.path.join(BASE_DIR, 'app/templates'),
-		],
-		'APP_DIRS': True,
+		'DIRS': [],
 		'OPTIONS': {
 			'context_processors': [
 				'django.template.context_processors.debug',
 				'django.template.context_processors.request',
 				'django.contrib.auth.context_processors.auth',
 				'django.contrib.messages.context_processors.messages',
+				'config.settings.usuario_context',
+			],
+			'loaders': [
+				('django.template.loaders.cached.Loader', [
+					'django.template.loaders.app_directories.Loader',
+				]),
 			],
 		},
 	},
@@ -65,6 +76,18 @@ DATABASES = {
 	}
 }
 
+# O primeiro hasher é usado para senhas novas; os demais só verificam hashes
+# antigos, que são regravados no próximo login (Usuario.verificar_senha).
+# scrypt é memory-hard e não depende de pacotes extras. Para Argon2, instale
+# argon2-cffi e mova Argon2PasswordHasher para o topo.
+PASSWORD_HASHERS = [
+	'django.contrib.auth.hashers.ScryptPasswordHasher',
+	'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+	'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+	'django.contrib.auth.hashers.Argon2PasswordHasher',
+	'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+
 AUTH_PASSWORD_VALIDATORS = [
 	{
 		'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -97,6 +120,16 @@ STATICFILES_DIRS = [
 	os.path.join(BASE_DIR, "app/static/"),
 ]
 
+# collectstatic grava nomes com hash, CSS/JS minificados e versões .gz/.br
+# (app/estaticos.py; .br só com o pacote brotli instalado).
+# app.middleware.ArquivosEstaticosMiddleware serve o STATIC_ROOT com cache
+# imutável para os nomes com hash.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'app.estaticos.ArmazenamentoEstatico'},
+}
+ESTATICOS_MAX_AGE = 60 * 60  # arquivos sem hash no nome
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 CRISPY_ALLOWED_TEMPLATE_PACKS = ['bootstrap5']
 CRISPY_TEMPLATE_PACK = 'bootstrap5'
@@ -107,36 +140,48 @@ LOGOUT_REDIRECT_URL = '/'
 # Adicione isso no final do settings.py
 from django.conf import global_settings
 
+# Cache (contexto da página do jogo e contadores de versão).
+# Em produção com vários workers, aponte para um cache compartilhado
+# (Redis/Memcached) para que a invalidação valha para todos os processos.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'acriseg',
+    }
+}
+
+# Tiles JSON do mapa de desastres (app/tiles.py). O diretório é um cache
+# descartável; os tiles menos usados são apagados (pela tarefa despejar_tiles)
+# quando o espaço ocupado em disco passa do limite.
+MAPA_TILES_DIR = os.path.join(BASE_DIR, 'cache', 'tiles')
+MAPA_TILES_LIMITE_BYTES = 256 * 1024 * 1024
+MAPA_TILES_MAX_AGE = 60 * 60  # navegador/CDN revalida com o ETag depois disso
+
+# Emails (app/emails.py): gravados na caixa de saída EmailPendente e
+# enviados pela fila de tarefas (run_workers), em lotes por uma única
+# conexão SMTP. EMAIL_ENVIOS_SIMULTANEOS limita as conexões abertas ao
+# mesmo tempo.
+DEFAULT_FROM_EMAIL = 'A Crise G <nao-responda@acriseg.com.br>'
+EMAIL_LOTE = 100
+EMAIL_ENVIOS_SIMULTANEOS = 2
+EMAIL_MAXIMO_TENTATIVAS = 5
+
 # Configurações de sessão
+# Sessões lidas do cache e gravadas no banco só quando mudam; a expiração
+# deslizante de 2 semanas é renovada no máximo uma vez por janela
+# (app.middleware.RenovacaoSessaoMiddleware) em vez de a cada requisição.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
 SESSION_COOKIE_AGE = 1209600  # 2 semanas em segundos
-SESSION_SAVE_EVERY_REQUEST = True
+SESSION_SAVE_EVERY_REQUEST = False
+SESSAO_JANELA_RENOVACAO = 60 * 60 * 24  # 1 dia em segundos
 SESSION_EXPIRE_AT_BROWSER_CLOSE = False
 
 # Context processor customizado
+# user_info é o mesmo objeto preguiçoso de request.usuario (ver
+# app.middleware.UsuarioSessaoMiddleware): uma leitura da sessão por requisição.
 def usuario_context(request):
-    usuario_info = {
-        'is_authenticated': 'usuario_id' in request.session,
-        'id': request.session.get('usuario_id'),
-        'nome': request.session.get('usuario_nome'),
-        'email': request.session.get('usuario_email'),
-        'tipo': request.session.get('usuario_tipo'),
-    }
-    return {'user_info': usuario_info}
-
-# Adicione ao TEMPLATES context processors
-TEMPLATES = [
-    {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
-        'OPTIONS': {
-            'context_processors': [
-                'django.template.context_processors.debug',
-                'django.template.context_processors.request',
-                'django.contrib.auth.context_processors.auth',
-                'django.contrib.messages.context_processors.messages',
-                'config.settings.usuario_context',  # Adicione esta linha
-            ],
-        },
-    },
-]
\ No newline at end of file
+    usuario = getattr(request, 'usuario', None)
+    if usuario is None:
+        from app.middleware import principal_da_requisicao
+        usuario = principal_da_requisicao(request)
+    return {'user_info': usuario}
@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+# Templates compilados e lista do autocompletar montada antes da primeira
+# requisição (ver TEMPLATES em settings e app/autocompletar.py)
+from app.autocompletar import aquecer_autocompletar  # noqa: E402
+from app.paginas import aquecer_templates  # noqa: E402
+
+aquecer_templates()
+aquecer_autocompletar()